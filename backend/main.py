@@ -44,20 +44,44 @@ async def lifespan(app: FastAPI):
     logger.info(f"Environment: {ENVIRONMENT}")
     logger.info(f"Debug mode: {DEBUG}")
     
-    # Test Firebase connection
+    # Test storage connection
     try:
-        from services.firebase import test_firestore_connection
-        if test_firestore_connection():
-            logger.info("✅ Firebase connection established")
+        from services.datastore import test_storage_connection, start_health_prober, get_storage_backend_name
+        logger.info(f"Storage backend: {get_storage_backend_name()}")
+        if await test_storage_connection():
+            logger.info("✅ Storage connection established")
         else:
-            logger.error("❌ Firebase connection failed")
+            logger.error("❌ Storage connection failed")
+        start_health_prober()
     except Exception as e:
-        logger.error(f"❌ Firebase initialization error: {e}")
+        logger.error(f"❌ Storage initialization error: {e}")
+
+    # Start moderation (verdict cache, pooled upstream client and async workers)
+    try:
+        from services.moderation import start_moderation
+        await start_moderation()
+        from services.moderation_worker import start_moderation_workers
+        await start_moderation_workers()
+    except Exception as e:
+        logger.error(f"❌ Moderation initialization error: {e}")
     
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down VORTEX Backend...")
+    from services.datastore import stop_health_prober, shutdown_executor
+    await stop_health_prober()
+    from services.engagement_buffer import stop_engagement_buffer
+    await stop_engagement_buffer()
+    from services.bulk_jobs import stop_bulk_jobs
+    await stop_bulk_jobs()
+    from services.moderation_worker import stop_moderation_workers
+    await stop_moderation_workers()
+    from services.moderation import stop_moderation
+    await stop_moderation()
+    from services.media import shutdown_image_pool
+    shutdown_image_pool()
+    shutdown_executor()
 
 # Initialize app
 app = FastAPI(
@@ -82,6 +106,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Has-More", "X-Next-Cursor"],  # Feed pagination
 )
 
 # Global exception handlers
@@ -126,18 +151,20 @@ async def validation_exception_handler(request, exc):
 async def health_check():
     """Health check endpoint to verify service status"""
     try:
-        from services.firebase import get_firestore_client, test_firestore_connection
-        db = get_firestore_client()
-        db_status = "connected" if db and test_firestore_connection() else "disconnected"
+        from services.datastore import is_storage_connected, get_storage_backend_name
+        db_status = "connected" if is_storage_connected() else "disconnected"
+        storage_backend = get_storage_backend_name()
     except Exception as e:
-        logger.error(f"Health check Firebase error: {e}")
+        logger.error(f"Health check storage error: {e}")
         db_status = "error"
+        storage_backend = "unknown"
     
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
         "environment": ENVIRONMENT,
         "firebase": db_status,
+        "storage_backend": storage_backend,
         "message": "VORTEX backend is live! 🚀"
     }
 
@@ -151,10 +178,20 @@ async def api_status():
         "timestamp": datetime.utcnow().isoformat()
     }
 
+@app.get("/api/v1/metrics", tags=["API"])
+async def api_metrics():
+    """In-process cache and pipeline statistics for this worker"""
+    from utils.metrics import collect_metrics
+    return {
+        "metrics": collect_metrics(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 # Import and register routers
 from routes.users import router as user_router
 from routes.posts import router as post_router
 from routes import ai
+from routes import media
 
 # Register routers with versioning
 app.include_router(
@@ -173,6 +210,8 @@ app.include_router(
 
 app.include_router(ai.router, prefix="/ai")
 
+app.include_router(media.router, prefix="/media", tags=["Media"])
+
 # Root endpoint
 @app.get("/", tags=["Root"])
 async def root():
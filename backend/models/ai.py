@@ -1,9 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Literal
 
 class AIRequest(BaseModel):
     text: str
 
 class AIResponse(BaseModel):
-    trust_score: int
-    trust_tag: str
-    explanation: str 
\ No newline at end of file
+    trust_score: int = Field(..., ge=0, le=100)
+    trust_tag: Literal["🟢", "🟡", "🔴"]
+    explanation: str
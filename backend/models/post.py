@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 import re
 
@@ -86,12 +86,23 @@ class CommentCreate(BaseModel):
             raise ValueError('Comment text cannot be empty')
         return v.strip()
 
+class LikeRequest(BaseModel):
+    wallet_address: str = Field(..., min_length=32, max_length=44)
+
+    @validator('wallet_address')
+    def validate_wallet_address(cls, v):
+        if not re.match(r'^[A-Za-z0-9]{32,44}$', v):
+            raise ValueError('Invalid wallet address format')
+        return v
+
 class PostOut(BaseModel):
     post_id: str
     wallet_address: str
     display_name: str
     text: str
     image_url: Optional[str] = ""
+    image_hash: Optional[str] = None  # Blob store key when the image lives in /media
+    image_variants: Dict[str, str] = Field(default_factory=dict)  # e.g. {"thumb": url, "full": url}
     timestamp: str
     created_at: str
     updated_at: str
@@ -119,7 +130,10 @@ class CommentOut(BaseModel):
     is_deleted: bool = False
     likes: int = Field(0, ge=0)
     parent_comment_id: Optional[str] = None
+    thread_id: Optional[str] = None  # Top-level comment of the thread (replies only)
+    reply_count: int = Field(0, ge=0)  # Live replies in the thread (top-level comments only)
     replies: List['CommentOut'] = Field(default_factory=list)
+    replies_cursor: Optional[str] = None  # Next page of the thread after the reply preview
     user_liked: bool = False
 
     class Config:
@@ -129,6 +143,18 @@ class PostResponse(BaseModel):
     success: bool
     message: str
     post: Optional[PostOut] = None
+    moderation_status: Optional[str] = None  # pending_moderation | published | rejected | failed
+    timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
+
+class ModerationStatusResponse(BaseModel):
+    success: bool
+    post_id: str
+    status: str  # pending_moderation | published | rejected | failed
+    trust_score: Optional[float] = None
+    trust_tag: Optional[str] = None
+    explanation: Optional[str] = None
+    attempts: int = 0
+    post: Optional[PostOut] = None
     timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
 
 class PostListResponse(BaseModel):
@@ -136,6 +162,7 @@ class PostListResponse(BaseModel):
     posts: List[PostOut]
     total: int
     has_more: bool
+    next_cursor: Optional[str] = None
     timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
 
 class CommentResponse(BaseModel):
@@ -148,4 +175,6 @@ class CommentListResponse(BaseModel):
     success: bool
     comments: List[CommentOut]
     total: int
+    has_more: bool = False
+    next_cursor: Optional[str] = None
     timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
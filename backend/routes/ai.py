@@ -1,10 +1,10 @@
 from fastapi import APIRouter
 from models.ai import AIRequest, AIResponse
-from services.openrouter_client import call_openrouter
+from services.moderation import moderate_text
 
 router = APIRouter()
 
 @router.post("/verify-content", response_model=AIResponse)
 async def verify_post(payload: AIRequest):
-    result = await call_openrouter(payload.text)
+    result = await moderate_text(payload.text)
     return AIResponse(**result) 
\ No newline at end of file
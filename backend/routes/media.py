@@ -0,0 +1,80 @@
+from fastapi import APIRouter, HTTPException, Request, Response, status, Path
+from typing import Optional, Tuple
+import logging
+
+from services.blob_store import get_blob_store, BLOB_HASH_RE
+from services.datastore import run_blocking
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Blobs are content-addressed, so a URL always refers to the same bytes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single ``bytes=`` range into inclusive ``(start, end)``.
+    Returns None if the header should be ignored; raises ValueError if unsatisfiable.
+    """
+    if not range_header.startswith('bytes=') or ',' in range_header:
+        return None
+    start_str, _, end_str = range_header[6:].strip().partition('-')
+    try:
+        if start_str == '':
+            # Suffix range: the last N bytes
+            length = int(end_str)
+            if length <= 0:
+                raise ValueError("Empty suffix range")
+            return max(size - length, 0), size - 1
+        start = int(start_str)
+        end = int(end_str) if end_str else size - 1
+    except ValueError:
+        raise ValueError("Malformed range")
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, size - 1)
+
+@router.api_route("/{blob_hash}", methods=["GET", "HEAD"])
+async def get_media(request: Request, blob_hash: str = Path(..., min_length=64, max_length=64)):
+    """
+    Serve a stored media blob with immutable caching and byte-range support
+    """
+    if not BLOB_HASH_RE.match(blob_hash):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+
+    store = get_blob_store()
+    info = await run_blocking(store.stat, blob_hash)
+    if not info:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+    size, content_type = info
+
+    etag = f'"{blob_hash}"'
+    headers = {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+    }
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if range_header and request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, headers=headers)
+
+    start, end = byte_range if byte_range else (0, size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    status_code = status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK
+
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=content_type)
+
+    body = await run_blocking(store.read, blob_hash, start, end) if size else b""
+    return Response(content=body, status_code=status_code, headers=headers, media_type=content_type)
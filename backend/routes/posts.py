@@ -1,25 +1,54 @@
-from fastapi import APIRouter, HTTPException, status, Query, Path
+from fastapi import APIRouter, HTTPException, status, Query, Path, Response
 from models.post import (
-    PostCreate, PostOut, PostUpdate, CommentCreate, CommentOut,
-    PostResponse, PostListResponse, CommentResponse, CommentListResponse
+    PostCreate, PostOut, PostUpdate, CommentCreate, CommentOut, LikeRequest,
+    PostResponse, PostListResponse, CommentResponse, CommentListResponse, ModerationStatusResponse
 )
-from services.firebase import (
-    create_post, fetch_posts, soft_delete_post, get_user_posts, update_post_likes,
+from services.datastore import (
+    create_post, fetch_posts, soft_delete_post, get_user_posts,
     update_post, get_post_by_id, create_comment, get_post_comments,
-    update_comment_likes, delete_comment, clear_all_collections
+    delete_comment, set_post_like, mark_user_liked, NotFoundError,
+    get_comment_replies, InvalidCursorError
 )
+from services.engagement_buffer import record_post_like, record_comment_like
+from services.bulk_jobs import start_clear_all, start_tombstone_purge, get_job, list_jobs
 from typing import Optional, List
 import logging
 from routes.ai import verify_post
-from services.openrouter_client import call_openrouter
+from services.moderation import moderate_text, is_acceptable, verdict_fields
+from services.moderation_worker import should_queue, enqueue_post, get_moderation_job
+from services.media import ingest_image
+from utils.mappers import map_post_firestore_to_backend
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+async def store_post_image(post_data: dict):
+    """Move an inline base64 image into the blob store, leaving only a reference on the post.
+
+    When ``image_url`` is set to anything that isn't ingested (a remote URL, or
+    nothing to remove the image) the blob store fields are cleared, so an edit
+    doesn't keep serving the variants of the previous image.
+    """
+    try:
+        image_ref = await ingest_image(post_data.get('image_url'))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if image_ref:
+        post_data.update(image_ref)
+    elif 'image_url' in post_data:
+        post_data.update({"image_hash": None, "image_variants": None})
+
 @router.post("/create", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
-async def create_new_post(post: PostCreate):
+async def create_new_post(post: PostCreate, response: Response):
     """
-    Create a new post with text, image, or both, with AI moderation
+    Create a new post with text, image, or both, with AI moderation.
+
+    With async moderation (or while the moderation upstream is down and
+    MODERATION_DEGRADED_MODE=queue) the post is queued and the route answers
+    202; poll ``GET /{post_id}/moderation`` for the outcome.
     """
     try:
         # Validate content
@@ -34,39 +63,40 @@ async def create_new_post(post: PostCreate):
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Image is too large. Please upload an image smaller than 1MB."
             )
+        post_data = post.dict()
+        if should_queue():
+            # Async mode, or the moderation upstream is down: a worker publishes or rejects the post
+            await store_post_image(post_data)
+            await enqueue_post(post_data)
+            response.status_code = status.HTTP_202_ACCEPTED
+            return PostResponse(
+                success=True,
+                message="Post accepted and pending moderation",
+                moderation_status="pending_moderation"
+            )
         # --- AI Moderation ---
-        ai_result = await call_openrouter(post.text)
-        trust_score = ai_result.get('trust_score', 50)
-        trust_tag = ai_result.get('trust_tag', '🟡')
-        ai_explanation = ai_result.get('explanation', 'AI moderation unavailable')
-        # Only allow posts with trust_score >= 60
-        if trust_score < 60:
+        ai_result = await moderate_text(post.text)
+        # Only allow posts with trust_score >= MIN_TRUST_SCORE
+        if not is_acceptable(ai_result):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Post rejected by AI moderation. Trust score: {trust_score}. Explanation: {ai_explanation}"
+                detail=f"Post rejected by AI moderation. Trust score: {ai_result.get('trust_score', 50)}. "
+                       f"Explanation: {ai_result.get('explanation', 'AI moderation unavailable')}"
             )
         # Save post with AI moderation fields
-        post_data = post.dict()
-        post_data["ai_verified"] = trust_score >= 90
-        post_data["ai_trust_score"] = trust_score
-        post_data["ai_explanation"] = ai_explanation
-        success = create_post(post_data)
-        if not success:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create post. Please try again."
-            )
-        # Get created post
-        created_post = get_post_by_id(post.post_id, for_backend=True)
+        post_data.update(verdict_fields(ai_result))
+        await store_post_image(post_data)
+        created_post = await create_post(post_data)
         if not created_post:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Post created but could not be retrieved"
+                detail="Failed to create post. Please try again."
             )
         return PostResponse(
             success=True,
             message="Post created successfully",
-            post=PostOut(**created_post)
+            post=PostOut(**map_post_firestore_to_backend(created_post)),
+            moderation_status="published"
         )
     except HTTPException:
         raise
@@ -77,19 +107,34 @@ async def create_new_post(post: PostCreate):
             detail="Internal server error during post creation"
         )
 
+def _set_page_headers(response: Response, next_cursor: Optional[str]):
+    """List-shaped endpoints return pagination state in headers"""
+    response.headers["X-Has-More"] = "true" if next_cursor else "false"
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
 @router.get("/feed", response_model=List[PostOut])
 async def get_post_feed(
+    response: Response,
     limit: int = Query(20, ge=1, le=100, description="Number of posts to fetch"),
-    start_after: Optional[str] = Query(None, description="Cursor for pagination")
+    cursor: Optional[str] = Query(None, max_length=512, description="X-Next-Cursor of the previous page"),
+    start_after: Optional[str] = Query(None, deprecated=True, description="Raw created_at cursor; use cursor"),
+    viewer: Optional[str] = Query(None, max_length=44, description="Viewer wallet address; sets user_liked")
 ):
     """
-    Get paginated feed of all posts
+    Get paginated feed of all posts (next page cursor in the X-Next-Cursor header)
     """
     try:
-        posts, _ = fetch_posts(limit=limit, start_after=start_after, for_backend=True)
+        posts, next_cursor = await fetch_posts(limit=limit, cursor=cursor, start_after=start_after, for_backend=True)
+        _set_page_headers(response, next_cursor)
         
-        return posts
+        return await mark_user_liked(posts, viewer)
         
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
     except Exception as e:
         logger.error(f"Error fetching post feed: {e}")
         raise HTTPException(
@@ -99,33 +144,44 @@ async def get_post_feed(
 
 @router.get("/all", response_model=List[PostOut])
 async def get_all_posts(
+    response: Response,
     limit: int = Query(50, ge=1, le=100, description="Number of posts to fetch"),
-    start_after: Optional[str] = Query(None, description="Cursor for pagination")
+    cursor: Optional[str] = Query(None, max_length=512, description="X-Next-Cursor of the previous page"),
+    start_after: Optional[str] = Query(None, deprecated=True, description="Raw created_at cursor; use cursor"),
+    viewer: Optional[str] = Query(None, max_length=44, description="Viewer wallet address; sets user_liked")
 ):
     """
     Get all posts (alias for /feed endpoint)
     """
-    posts, _ = fetch_posts(limit=limit, start_after=start_after, for_backend=True)
-    return posts
+    return await get_post_feed(response, limit=limit, cursor=cursor, start_after=start_after, viewer=viewer)
 
 @router.get("/user/{wallet_address}", response_model=PostListResponse)
 async def get_user_posts_route(
     wallet_address: str = Path(..., min_length=32, max_length=44),
-    limit: int = Query(20, ge=1, le=100, description="Number of posts to fetch")
+    limit: int = Query(20, ge=1, le=100, description="Number of posts to fetch"),
+    cursor: Optional[str] = Query(None, max_length=512, description="next_cursor of the previous page"),
+    viewer: Optional[str] = Query(None, max_length=44, description="Viewer wallet address; sets user_liked")
 ):
     """
     Get posts by specific user
     """
     try:
-        posts = get_user_posts(wallet_address, limit=limit, for_backend=True)
+        posts, next_cursor = await get_user_posts(wallet_address, limit=limit, cursor=cursor, for_backend=True)
+        await mark_user_liked(posts, viewer)
         
         return PostListResponse(
             success=True,
             posts=posts,  # posts are already in PostOut format from fetch_posts
             total=len(posts),
-            has_more=len(posts) == limit
+            has_more=next_cursor is not None,
+            next_cursor=next_cursor
         )
         
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
     except Exception as e:
         logger.error(f"Error fetching user posts: {e}")
         raise HTTPException(
@@ -133,18 +189,84 @@ async def get_user_posts_route(
             detail="Internal server error while fetching user posts"
         )
 
+@router.delete("/clear-all", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
+async def clear_all_data():
+    """
+    Clear all data from database in a background job (for testing only)
+    """
+    try:
+        job = start_clear_all()
+        return {
+            "success": True,
+            "message": "Clearing all data in the background",
+            "job": job.to_dict()
+        }
+        
+    except Exception as e:
+        logger.error(f"Error clearing data: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error while clearing data"
+        )
+
+@router.post("/maintenance/purge-deleted", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
+async def purge_deleted_posts(
+    older_than_days: float = Query(30, ge=0, description="Purge posts and comments soft deleted longer ago than this")
+):
+    """
+    Hard-delete soft-deleted posts and comments in a background job
+    """
+    try:
+        job = start_tombstone_purge(older_than_days)
+        return {
+            "success": True,
+            "message": "Purging deleted posts and comments in the background",
+            "job": job.to_dict()
+        }
+        
+    except Exception as e:
+        logger.error(f"Error starting purge: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error while starting purge"
+        )
+
+@router.get("/jobs", response_model=dict)
+async def get_bulk_jobs():
+    """
+    List recent bulk jobs (clear-all, purges, migrations), newest first
+    """
+    return {"success": True, "jobs": [job.to_dict() for job in list_jobs()]}
+
+@router.get("/jobs/{job_id}", response_model=dict)
+async def get_bulk_job(job_id: str = Path(..., min_length=1, max_length=64)):
+    """
+    Progress of a bulk job
+    """
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return {"success": True, "job": job.to_dict()}
+
 @router.get("/{post_id}", response_model=PostResponse)
-async def get_post(post_id: str = Path(..., min_length=1, max_length=100)):
+async def get_post(
+    post_id: str = Path(..., min_length=1, max_length=100),
+    viewer: Optional[str] = Query(None, max_length=44, description="Viewer wallet address; sets user_liked")
+):
     """
     Get a specific post by ID
     """
     try:
-        post = get_post_by_id(post_id, for_backend=True)
+        post = await get_post_by_id(post_id, for_backend=True)
         if not post:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Post not found"
             )
+        await mark_user_liked([post], viewer)
         
         return PostResponse(
             success=True,
@@ -161,6 +283,51 @@ async def get_post(post_id: str = Path(..., min_length=1, max_length=100)):
             detail="Internal server error while retrieving post"
         )
 
+@router.get("/{post_id}/moderation", response_model=ModerationStatusResponse)
+async def get_post_moderation_status(post_id: str = Path(..., min_length=1, max_length=100)):
+    """
+    Get the moderation status of a post created with async moderation
+    """
+    try:
+        job = await get_moderation_job(post_id)
+        post = None
+        if job is None or job['status'] == "published":
+            post = await get_post_by_id(post_id, for_backend=True)
+        if job is None:
+            if not post:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Post not found"
+                )
+            # Moderated synchronously, or the job record has expired
+            return ModerationStatusResponse(
+                success=True,
+                post_id=post_id,
+                status="published",
+                post=PostOut(**post)
+            )
+
+        result = job['result'] or {}
+        return ModerationStatusResponse(
+            success=True,
+            post_id=post_id,
+            status=job['status'],
+            trust_score=result.get('trust_score'),
+            trust_tag=result.get('trust_tag'),
+            explanation=result.get('explanation') or result.get('error'),
+            attempts=job['attempts'],
+            post=PostOut(**post) if post else None
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting moderation status: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error while retrieving moderation status"
+        )
+
 @router.put("/{post_id}", response_model=PostResponse)
 async def edit_post(
     post_update: PostUpdate,
@@ -170,36 +337,28 @@ async def edit_post(
     Edit an existing post
     """
     try:
-        # Check if post exists
-        existing_post = get_post_by_id(post_id, for_backend=True)
-        if not existing_post:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Post not found"
-            )
-        
-        # Update post
-        success = update_post(post_id, post_update.dict(exclude_unset=True))
-        if not success:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to update post. Please try again."
-            )
-        
-        # Get updated post
-        updated_post = get_post_by_id(post_id, for_backend=True)
+        # Update post; the storage layer returns the committed post, or raises
+        # NotFoundError if there is no live post to update
+        update_data = post_update.dict(exclude_unset=True)
+        await store_post_image(update_data)
+        updated_post = await update_post(post_id, update_data)
         if not updated_post:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Post updated but could not be retrieved"
+                detail="Failed to update post. Please try again."
             )
         
         return PostResponse(
             success=True,
             message="Post updated successfully",
-            post=PostOut(**updated_post)
+            post=PostOut(**map_post_firestore_to_backend(updated_post))
         )
         
+    except NotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Post not found"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -215,15 +374,8 @@ async def delete_post(post_id: str = Path(..., min_length=1, max_length=100)):
     Soft delete a post
     """
     try:
-        # Check if post exists
-        existing_post = get_post_by_id(post_id, for_backend=True)
-        if not existing_post:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Post not found"
-            )
-        
-        success = soft_delete_post(post_id)
+        # The delete itself fails with NotFoundError if the post doesn't exist
+        success = await soft_delete_post(post_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -235,6 +387,11 @@ async def delete_post(post_id: str = Path(..., min_length=1, max_length=100)):
             "message": "Post deleted successfully"
         }
         
+    except NotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Post not found"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -245,20 +402,21 @@ async def delete_post(post_id: str = Path(..., min_length=1, max_length=100)):
         )
 
 @router.post("/{post_id}/like", response_model=dict)
-async def like_post(post_id: str = Path(..., min_length=1, max_length=100)):
+async def like_post(
+    like: LikeRequest,
+    post_id: str = Path(..., min_length=1, max_length=100)
+):
     """
-    Like a post
+    Like a post (idempotent: liking twice counts once)
     """
     try:
-        # Check if post exists
-        existing_post = get_post_by_id(post_id, for_backend=True)
-        if not existing_post:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Post not found"
-            )
-        
-        success = update_post_likes(post_id, increment=True)
+        # Fails with NotFoundError if the post doesn't exist; only a like that
+        # actually changed the ledger moves the counter
+        changed = await set_post_like(like.wallet_address, post_id, True)
+        if changed:
+            success = await record_post_like(post_id, increment=True)
+        else:
+            success = changed is not None
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -267,9 +425,15 @@ async def like_post(post_id: str = Path(..., min_length=1, max_length=100)):
         
         return {
             "success": True,
-            "message": "Post liked successfully"
+            "message": "Post liked successfully" if changed else "Post already liked",
+            "user_liked": True
         }
         
+    except NotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Post not found"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -280,20 +444,21 @@ async def like_post(post_id: str = Path(..., min_length=1, max_length=100)):
         )
 
 @router.post("/{post_id}/unlike", response_model=dict)
-async def unlike_post(post_id: str = Path(..., min_length=1, max_length=100)):
+async def unlike_post(
+    like: LikeRequest,
+    post_id: str = Path(..., min_length=1, max_length=100)
+):
     """
-    Unlike a post
+    Unlike a post (idempotent: only removes a like the user actually made)
     """
     try:
-        # Check if post exists
-        existing_post = get_post_by_id(post_id, for_backend=True)
-        if not existing_post:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Post not found"
-            )
-        
-        success = update_post_likes(post_id, increment=False)
+        # Fails with NotFoundError if the post doesn't exist; only a like that
+        # actually changed the ledger moves the counter
+        changed = await set_post_like(like.wallet_address, post_id, False)
+        if changed:
+            success = await record_post_like(post_id, increment=False)
+        else:
+            success = changed is not None
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -302,9 +467,15 @@ async def unlike_post(post_id: str = Path(..., min_length=1, max_length=100)):
         
         return {
             "success": True,
-            "message": "Post unliked successfully"
+            "message": "Post unliked successfully" if changed else "Post was not liked",
+            "user_liked": False
         }
         
+    except NotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Post not found"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -324,20 +495,12 @@ async def create_post_comment(
     Create a comment on a post
     """
     try:
-        # Check if post exists
-        existing_post = get_post_by_id(post_id, for_backend=True)
-        if not existing_post:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Post not found"
-            )
-        
         # Set post_id from path
         comment.post_id = post_id
         
-        # Create comment
-        success = create_comment(comment.dict())
-        if not success:
+        # Create comment; fails with NotFoundError if the post doesn't exist
+        created_comment = await create_comment(comment.dict())
+        if not created_comment:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to create comment. Please try again."
@@ -345,9 +508,15 @@ async def create_post_comment(
         
         return CommentResponse(
             success=True,
-            message="Comment created successfully"
+            message="Comment created successfully",
+            comment=CommentOut(**created_comment)
         )
         
+    except NotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Parent comment not found" if comment.parent_comment_id else "Post not found"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -360,28 +529,37 @@ async def create_post_comment(
 @router.get("/{post_id}/comments", response_model=CommentListResponse)
 async def get_post_comments_route(
     post_id: str = Path(..., min_length=1, max_length=100),
-    limit: int = Query(50, ge=1, le=100, description="Number of comments to fetch")
+    limit: int = Query(50, ge=1, le=100, description="Number of top-level comments to fetch"),
+    cursor: Optional[str] = Query(None, max_length=512, description="next_cursor of the previous page"),
+    replies: Optional[int] = Query(None, ge=0, le=20, description="Replies previewed under each comment (default COMMENT_REPLY_PREVIEW)")
 ):
     """
-    Get comments for a post
+    Get comment threads for a post: top-level comments with reply previews
     """
     try:
         # Check if post exists
-        existing_post = get_post_by_id(post_id, for_backend=True)
+        existing_post = await get_post_by_id(post_id, for_backend=True)
         if not existing_post:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Post not found"
             )
         
-        comments = get_post_comments(post_id, limit=limit)
+        comments, next_cursor = await get_post_comments(post_id, limit=limit, cursor=cursor, previews=replies)
         
         return CommentListResponse(
             success=True,
             comments=[CommentOut(**comment) for comment in comments],
-            total=len(comments)
+            total=len(comments),
+            has_more=next_cursor is not None,
+            next_cursor=next_cursor
         )
         
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -391,13 +569,45 @@ async def get_post_comments_route(
             detail="Internal server error while fetching comments"
         )
 
+@router.get("/comments/{comment_id}/replies", response_model=CommentListResponse)
+async def get_comment_replies_route(
+    comment_id: str = Path(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100, description="Number of replies to fetch"),
+    cursor: Optional[str] = Query(None, max_length=512, description="replies_cursor or next_cursor of the previous page")
+):
+    """
+    Get a page of replies in a comment thread
+    """
+    try:
+        replies, next_cursor = await get_comment_replies(comment_id, limit=limit, cursor=cursor)
+        
+        return CommentListResponse(
+            success=True,
+            comments=[CommentOut(**reply) for reply in replies],
+            total=len(replies),
+            has_more=next_cursor is not None,
+            next_cursor=next_cursor
+        )
+        
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    except Exception as e:
+        logger.error(f"Error fetching replies: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error while fetching replies"
+        )
+
 @router.post("/comments/{comment_id}/like", response_model=dict)
 async def like_comment(comment_id: str = Path(..., min_length=1, max_length=100)):
     """
     Like a comment
     """
     try:
-        success = update_comment_likes(comment_id, increment=True)
+        success = await record_comment_like(comment_id, increment=True)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -424,7 +634,7 @@ async def unlike_comment(comment_id: str = Path(..., min_length=1, max_length=10
     Unlike a comment
     """
     try:
-        success = update_comment_likes(comment_id, increment=False)
+        success = await record_comment_like(comment_id, increment=False)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -451,7 +661,7 @@ async def delete_comment_route(comment_id: str = Path(..., min_length=1, max_len
     Delete a comment
     """
     try:
-        success = delete_comment(comment_id)
+        success = await delete_comment(comment_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -471,30 +681,3 @@ async def delete_comment_route(comment_id: str = Path(..., min_length=1, max_len
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error while deleting comment"
         )
-
-@router.delete("/clear-all", response_model=dict)
-async def clear_all_data():
-    """
-    Clear all data from database (for testing only)
-    """
-    try:
-        success = clear_all_collections()
-        if not success:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to clear database"
-            )
-        
-        return {
-            "success": True,
-            "message": "All data cleared successfully"
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error clearing data: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal server error while clearing data"
-        )
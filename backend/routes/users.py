@@ -1,15 +1,26 @@
 from fastapi import APIRouter, HTTPException, status, Query, Path
 from models.user import UserCreate, UserOut, UserProfileUpdate, UserResponse, UserListResponse
-from services.firebase import (
+from services.datastore import (
     create_user, get_user, update_user_profile, check_user_exists, 
-    get_user_by_username, get_connection_status
+    get_user_by_username, get_connection_status, soft_delete_user
 )
+from services.media import ingest_avatar
 from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+async def store_profile_image(profile_image: Optional[str]) -> Optional[str]:
+    """Move an inline base64 profile image into the blob store and return its avatar URL"""
+    try:
+        return await ingest_avatar(profile_image)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register_user(user: UserCreate):
     """
@@ -17,7 +28,7 @@ async def register_user(user: UserCreate):
     """
     try:
         # Check if user already exists
-        existing_user = get_user(user.wallet_address)
+        existing_user = await get_user(user.wallet_address)
         if existing_user:
             return UserResponse(
                 success=False,
@@ -26,11 +37,12 @@ async def register_user(user: UserCreate):
             )
         
         # Create user
-        success = create_user(
+        profile_image = await store_profile_image(user.profile_image)
+        success = await create_user(
             wallet_address=user.wallet_address,
             username=user.username,
             display_name=user.display_name,
-            profile_image=user.profile_image,
+            profile_image=profile_image,
             bio=user.bio,
             website=user.website,
             twitter=user.twitter,
@@ -46,7 +58,7 @@ async def register_user(user: UserCreate):
             )
         
         # Get created user
-        created_user = get_user(user.wallet_address)
+        created_user = await get_user(user.wallet_address)
         if not created_user:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -74,11 +86,11 @@ async def get_user_profile(wallet_address: str = Path(..., min_length=32, max_le
     Get user profile by wallet address - auto-creates if doesn't exist
     """
     try:
-        user = get_user(wallet_address)
+        user = await get_user(wallet_address)
         if not user:
             # Auto-create new user with default values
             logger.info(f"Auto-creating new user: {wallet_address}")
-            success = create_user(
+            success = await create_user(
                 wallet_address=wallet_address,
                 username="",  # Empty username for wallet-only users
                 display_name=f"{wallet_address[:8]}...{wallet_address[-4:]}",  # Default display name
@@ -98,7 +110,7 @@ async def get_user_profile(wallet_address: str = Path(..., min_length=32, max_le
                 )
             
             # Get the newly created user
-            user = get_user(wallet_address)
+            user = await get_user(wallet_address)
             if not user:
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -132,7 +144,7 @@ async def get_user_by_username_route(username: str = Path(..., min_length=3, max
     Get user profile by username
     """
     try:
-        user = get_user_by_username(username)
+        user = await get_user_by_username(username)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -164,7 +176,7 @@ async def update_profile(
     """
     try:
         # Check if user exists
-        existing_user = get_user(wallet_address)
+        existing_user = await get_user(wallet_address)
         if not existing_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -172,10 +184,11 @@ async def update_profile(
             )
         
         # Update profile
-        success = update_user_profile(
+        profile_image = await store_profile_image(profile.profile_image)
+        success = await update_user_profile(
             wallet_address=wallet_address,
             display_name=profile.display_name,
-            profile_image=profile.profile_image,
+            profile_image=profile_image,
             bio=profile.bio,
             website=profile.website,
             twitter=profile.twitter,
@@ -191,7 +204,7 @@ async def update_profile(
             )
         
         # Get updated user
-        updated_user = get_user(wallet_address)
+        updated_user = await get_user(wallet_address)
         if not updated_user:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -219,7 +232,7 @@ async def check_profile_completion(wallet_address: str = Path(..., min_length=32
     Check if user profile is completed
     """
     try:
-        exists = check_user_exists(wallet_address)
+        exists = await check_user_exists(wallet_address)
         return {
             "success": True,
             "profile_completed": exists,
@@ -240,7 +253,7 @@ async def delete_user(wallet_address: str = Path(..., min_length=32, max_length=
     """
     try:
         # Check if user exists
-        existing_user = get_user(wallet_address)
+        existing_user = await get_user(wallet_address)
         if not existing_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -248,19 +261,13 @@ async def delete_user(wallet_address: str = Path(..., min_length=32, max_length=
             )
         
         # Soft delete user (mark as deleted)
-        from services.firebase import get_firestore_client
-        db = get_firestore_client()
-        if not db:
+        success = await soft_delete_user(wallet_address)
+        if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Database connection error"
+                detail="Failed to delete user account. Please try again."
             )
-        
-        db.collection('users').document(wallet_address).update({
-            'is_deleted': True,
-            'updated_at': '2025-01-08T12:00:00Z'  # Use proper datetime
-        })
-        
+
         return {
             "success": True,
             "message": "User account deleted successfully"
@@ -281,7 +288,7 @@ async def get_connection_status_route():
     Get database connection status
     """
     try:
-        status_info = get_connection_status()
+        status_info = await get_connection_status()
         return {
             "success": True,
             "connection": status_info,
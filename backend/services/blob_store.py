@@ -0,0 +1,105 @@
+"""
+Content-addressed blob store for post media.
+
+Blobs are keyed by the SHA-256 of their bytes, so identical uploads are stored
+once and a blob never changes after it is written (which is what lets
+``/media/{hash}`` be served with immutable cache headers). ``LocalBlobStore``
+keeps them on the local filesystem under ``MEDIA_ROOT``.
+"""
+
+from typing import Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', 'media')
+MEDIA_BASE_URL = os.getenv('MEDIA_BASE_URL', 'http://localhost:8000').rstrip('/')
+
+BLOB_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+
+class LocalBlobStore:
+    """Blob store on the local filesystem, sharded two levels deep by hash prefix"""
+
+    def __init__(self, root: str = MEDIA_ROOT):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, blob_hash: str) -> str:
+        return os.path.join(self.root, blob_hash[:2], blob_hash[2:4], blob_hash)
+
+    def put(self, data: bytes, content_type: str) -> str:
+        """Store ``data`` and return its SHA-256 hex digest"""
+        blob_hash = hashlib.sha256(data).hexdigest()
+        path = self._path(blob_hash)
+        if os.path.exists(path):
+            return blob_hash
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            with open(path + '.meta', 'w') as f:
+                json.dump({"content_type": content_type, "size": len(data)}, f)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        logger.info(f"✅ Stored blob {blob_hash} ({len(data)} bytes, {content_type})")
+        return blob_hash
+
+    def stat(self, blob_hash: str) -> Optional[Tuple[int, str]]:
+        """Return ``(size, content_type)`` for a stored blob, or None if missing"""
+        if not BLOB_HASH_RE.match(blob_hash):
+            return None
+        path = self._path(blob_hash)
+        if not os.path.exists(path):
+            return None
+        content_type = 'application/octet-stream'
+        try:
+            with open(path + '.meta') as f:
+                content_type = json.load(f).get('content_type', content_type)
+        except (OSError, ValueError):
+            pass
+        return os.path.getsize(path), content_type
+
+    def read(self, blob_hash: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Read bytes ``start``..``end`` (inclusive) of a stored blob"""
+        with open(self._path(blob_hash), 'rb') as f:
+            f.seek(start)
+            if end is None:
+                return f.read()
+            return f.read(end - start + 1)
+
+    def delete(self, blob_hash: str) -> bool:
+        """Remove a blob; returns False if it did not exist"""
+        path = self._path(blob_hash)
+        if not os.path.exists(path):
+            return False
+        os.remove(path)
+        if os.path.exists(path + '.meta'):
+            os.remove(path + '.meta')
+        return True
+
+def media_url(blob_hash: str) -> str:
+    """Public URL the API hands out for a stored blob"""
+    return f"{MEDIA_BASE_URL}/media/{blob_hash}"
+
+_blob_store: Optional[LocalBlobStore] = None
+
+def get_blob_store() -> LocalBlobStore:
+    """Get the process-wide blob store"""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = LocalBlobStore(MEDIA_ROOT)
+    return _blob_store
@@ -0,0 +1,180 @@
+"""
+Background bulk jobs: clear-all, tombstone purges and data migrations.
+
+A job is a list of steps, each one a storage bulk operation
+(``bulk_delete`` / ``bulk_update``) over one collection. Steps run one after
+another on the datastore executor, while the storage engine pages through
+documents and commits batches in parallel. The API gets a job ID back at once
+and polls ``GET /api/posts/jobs/{job_id}`` for progress. Only one job of each
+kind runs at a time; starting another returns the running one. Jobs live in
+memory on the worker that started them.
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import threading
+import uuid
+
+from services.datastore import run_blocking, get_storage, clear_caches
+from utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+BULK_JOB_HISTORY = int(os.getenv('BULK_JOB_HISTORY', '50'))  # Finished jobs kept for status queries
+PURGE_ID_CHUNK = 30  # Post IDs per cascade delete (Firestore 'in' filters take at most 30 values)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+Step = Tuple[str, str, Callable[..., Dict[str, int]], Dict[str, Any]]  # (name, collection, operation, kwargs)
+
+class BulkJob:
+    def __init__(self, kind: str, steps: List[Step]):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.steps = steps
+        self.progress = {name: {"collection": collection, "status": QUEUED, "written": 0, "failed": 0}
+                         for name, collection, _, _ in steps}
+        self._lock = threading.Lock()
+
+    def reporter(self, step: str) -> Callable[[int, int], None]:
+        """Progress callback for one step (called from the storage engine's threads)"""
+        def report(written: int, failed: int):
+            with self._lock:
+                self.progress[step]["written"] += written
+                self.progress[step]["failed"] += failed
+        return report
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            steps = {name: dict(step) for name, step in self.progress.items()}
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "error": self.error,
+            "written": sum(step["written"] for step in steps.values()),
+            "failed": sum(step["failed"] for step in steps.values()),
+            "steps": steps,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+_jobs: "OrderedDict[str, BulkJob]" = OrderedDict()
+_tasks = set()
+
+async def _run(job: BulkJob):
+    job.status = RUNNING
+    job.started_at = datetime.utcnow().isoformat()
+    logger.info(f"🧹 Bulk job {job.job_id} ({job.kind}) started")
+    try:
+        for name, collection, operation, kwargs in job.steps:
+            job.progress[name]["status"] = RUNNING
+            await run_blocking(operation, collection, progress=job.reporter(name), **kwargs)
+            job.progress[name]["status"] = COMPLETED
+        job.status = COMPLETED
+        logger.info(f"✅ Bulk job {job.job_id} ({job.kind}) completed: {job.to_dict()['written']} writes")
+    except Exception as e:
+        job.status = FAILED
+        job.error = str(e)
+        for step in job.progress.values():
+            if step["status"] == RUNNING:
+                step["status"] = FAILED
+        logger.error(f"❌ Bulk job {job.job_id} ({job.kind}) failed: {e}")
+    finally:
+        job.finished_at = datetime.utcnow().isoformat()
+        # Cached posts/users/likes may refer to documents the job removed or rewrote
+        clear_caches()
+
+def start_job(kind: str, steps: List[Step]) -> BulkJob:
+    """Start a job in the background, or return the running job of the same kind"""
+    for job in _jobs.values():
+        if job.kind == kind and job.status in (QUEUED, RUNNING):
+            return job
+
+    job = BulkJob(kind, steps)
+    _jobs[job.job_id] = job
+    finished = [job_id for job_id, old in _jobs.items() if old.status in (COMPLETED, FAILED)]
+    for job_id in finished[:max(0, len(finished) - BULK_JOB_HISTORY)]:
+        del _jobs[job_id]
+
+    task = asyncio.get_running_loop().create_task(_run(job))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
+
+def get_job(job_id: str) -> Optional[BulkJob]:
+    return _jobs.get(job_id)
+
+def list_jobs() -> List[BulkJob]:
+    return list(reversed(_jobs.values()))
+
+def start_clear_all() -> BulkJob:
+    """Delete every post (with counter shards), comment, like and user"""
+    storage = get_storage()
+    return start_job("clear_all", [
+        (collection, collection, storage.bulk_delete, {})
+        for collection in ('posts', 'comments', 'likes', 'users')
+    ])
+
+def _purge_posts(collection: str, filters, progress=None) -> Dict[str, int]:
+    """Hard-delete matching posts after their comments and like-ledger entries (blocking).
+
+    Posts go last, so a failed run leaves them tombstoned and the next purge finishes the cascade.
+    """
+    storage = get_storage()
+    post_ids = [post['post_id'] for post in storage.scan_documents(collection, filters=filters, fields=['post_id'])
+                if post.get('post_id')]
+    for start in range(0, len(post_ids), PURGE_ID_CHUNK):
+        chunk = post_ids[start:start + PURGE_ID_CHUNK]
+        for child in ('comments', 'likes'):
+            totals = storage.bulk_delete(child, filters=[('post_id', 'in', chunk)], progress=progress)
+            if totals['failed']:
+                raise RuntimeError(f"{totals['failed']} {child} of purged posts could not be deleted")
+    return storage.bulk_delete(collection, filters=filters, progress=progress)
+
+def start_tombstone_purge(older_than_days: float) -> BulkJob:
+    """Hard-delete posts (with all their comments and likes) and comments that were soft deleted
+    more than ``older_than_days`` ago"""
+    storage = get_storage()
+    cutoff = (datetime.utcnow() - timedelta(days=older_than_days)).isoformat()
+    filters = [('is_deleted', '==', True), ('updated_at', '<', cutoff)]
+    return start_job("tombstone_purge", [
+        ('posts', 'posts', _purge_posts, {"filters": filters}),
+        ('comments', 'comments', storage.bulk_delete, {"filters": filters}),
+    ])
+
+def start_migration(name: str, collection: str, transform: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+                    filters: Optional[List[Tuple[str, str, Any]]] = None) -> BulkJob:
+    """Run ``transform`` over a collection (see ``StorageBackend.bulk_update``) as a job named ``migration:{name}``"""
+    return start_job(f"migration:{name}", [
+        (collection, collection, get_storage().bulk_update, {"transform": transform, "filters": filters})
+    ])
+
+async def stop_bulk_jobs():
+    """Cancel running jobs on shutdown (their committed batches stay committed)"""
+    for task in list(_tasks):
+        task.cancel()
+    if _tasks:
+        await asyncio.gather(*_tasks, return_exceptions=True)
+
+def stats() -> Dict[str, Any]:
+    by_status: Dict[str, int] = {}
+    for job in _jobs.values():
+        by_status[job.status] = by_status.get(job.status, 0) + 1
+    return {"jobs": len(_jobs), "by_status": by_status}
+
+register_metrics("bulk_jobs", stats)
@@ -0,0 +1,176 @@
+"""
+Local moderation classifier (cascade stage).
+
+A hashed word n-gram logistic regression, trained offline from stored model
+verdicts (``train_moderation_model.py``) and loaded at startup from
+``CLASSIFIER_MODEL_PATH``. It predicts the probability that the model would
+accept a post (``trust_score >= MIN_TRUST_SCORE``). Confident predictions
+are answered locally. Uncertain ones, plus an audit sample of confident ones
+(``CLASSIFIER_AUDIT_RATE``), go on to the model, and the model's verdict is
+compared with the prediction so ``CLASSIFIER_CONFIDENCE`` can be tuned from
+the agreement metrics.
+"""
+
+from typing import Optional, Dict, Any, List, Tuple
+import logging
+import os
+import random
+import re
+import time
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; without it the cascade stage is skipped
+    np = None
+
+from services.moderation_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CLASSIFIER_MODEL_PATH = os.getenv('CLASSIFIER_MODEL_PATH', 'moderation_model.npz')
+CLASSIFIER_CONFIDENCE = float(os.getenv('CLASSIFIER_CONFIDENCE', '0.95'))  # Below this the model decides
+CLASSIFIER_AUDIT_RATE = float(os.getenv('CLASSIFIER_AUDIT_RATE', '0.02'))  # Confident posts still sent to the model
+CLASSIFIER_FEATURES = int(os.getenv('CLASSIFIER_FEATURES', str(2 ** 18)))
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+def feature_indices(text: str, dim: int) -> List[int]:
+    """Hashed word unigrams and bigrams of the normalized text (unique, unordered)"""
+    tokens = _TOKEN_RE.findall(normalize_text(text))
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    # crc32 rather than hash(): Python string hashing is salted per process
+    return list({zlib.crc32(gram.encode('utf-8')) % dim for gram in grams})
+
+class NgramClassifier:
+    """Logistic regression over hashed binary n-gram features"""
+
+    def __init__(self, weights, bias: float = 0.0, threshold: float = 60):
+        self.weights = weights
+        self.bias = float(bias)
+        self.threshold = float(threshold)  # trust_score the labels were split at
+        self.dim = len(weights)
+
+    def predict(self, text: str) -> float:
+        """Probability that the post would be accepted"""
+        indices = feature_indices(text, self.dim)
+        z = self.bias
+        if indices:
+            z += float(self.weights[indices].sum()) / len(indices) ** 0.5
+        return 1.0 / (1.0 + np.exp(-z))
+
+    @classmethod
+    def train(cls, texts: List[str], labels: List[int], dim: int = CLASSIFIER_FEATURES, epochs: int = 8,
+              learning_rate: float = 0.5, l2: float = 1e-6, threshold: float = 60, seed: int = 0) -> "NgramClassifier":
+        """Class-balanced SGD; offline only"""
+        rng = random.Random(seed)
+        weights = np.zeros(dim, dtype=np.float32)
+        bias = 0.0
+        samples = [(np.array(feature_indices(t, dim), dtype=np.int64), y) for t, y in zip(texts, labels)]
+        positives = sum(labels) or 1
+        negatives = (len(labels) - sum(labels)) or 1
+        class_weight = {1: len(labels) / (2 * positives), 0: len(labels) / (2 * negatives)}
+        for epoch in range(epochs):
+            rng.shuffle(samples)
+            rate = learning_rate / (1 + epoch)
+            for indices, y in samples:
+                scale = 1.0 / len(indices) ** 0.5 if len(indices) else 0.0
+                z = bias + float(weights[indices].sum()) * scale
+                p = 1.0 / (1.0 + np.exp(-z))
+                gradient = (p - y) * class_weight[y]
+                if len(indices):
+                    weights[indices] -= rate * (gradient * scale + l2 * weights[indices])
+                bias -= rate * gradient
+        return cls(weights, bias, threshold)
+
+    def save(self, path: str):
+        np.savez_compressed(path, weights=self.weights, bias=self.bias, threshold=self.threshold)
+
+    @classmethod
+    def load(cls, path: str) -> "NgramClassifier":
+        data = np.load(path)
+        return cls(data['weights'], float(data['bias']), float(data['threshold']))
+
+class ModerationCascade:
+    """Answers confident posts from the local classifier and tracks agreement with the model"""
+
+    def __init__(self, path: str = CLASSIFIER_MODEL_PATH, confidence: float = CLASSIFIER_CONFIDENCE,
+                 audit_rate: float = CLASSIFIER_AUDIT_RATE):
+        self.path = path
+        self.confidence = confidence
+        self.audit_rate = audit_rate
+        self.model: Optional[NgramClassifier] = None
+        self.scored = 0
+        self.answered = 0
+        self.escalated = 0
+        self.audited = 0
+        self.score_seconds = 0.0
+        # (predictions compared with the model, how many matched), for confident and uncertain predictions
+        self.agreement = {"confident": [0, 0], "uncertain": [0, 0]}
+
+    def load(self):
+        """Load the trained model if there is one (blocking; called at startup)"""
+        if np is None or not self.path or not os.path.exists(self.path):
+            return
+        try:
+            self.model = NgramClassifier.load(self.path)
+            logger.info(f"✅ Moderation classifier loaded from {self.path} ({self.model.dim} features)")
+        except Exception as e:
+            logger.error(f"❌ Failed to load moderation classifier {self.path}: {e}")
+
+    def classify(self, text: str) -> Tuple[Optional[Dict[str, Any]], Optional[float]]:
+        """
+        ``(verdict, probability)``. The verdict is None when the post should go
+        to the model; pass the probability to ``record`` with the model's verdict.
+        """
+        if self.model is None:
+            return None, None
+        started = time.perf_counter()
+        probability = self.model.predict(text)
+        self.score_seconds += time.perf_counter() - started
+        self.scored += 1
+
+        if max(probability, 1 - probability) < self.confidence:
+            self.escalated += 1
+            return None, probability
+        if random.random() < self.audit_rate:
+            self.audited += 1
+            self.escalated += 1
+            return None, probability
+
+        self.answered += 1
+        accepted = probability >= 0.5
+        return {
+            "trust_score": round(70 + 20 * probability) if accepted else round(40 * probability),
+            "trust_tag": "🟢" if accepted else "🔴",
+            "explanation": "Content resembles previously approved posts" if accepted
+                           else "Content resembles previously rejected posts",
+            "source": "classifier"
+        }, probability
+
+    def record(self, probability: Optional[float], verdict: Dict[str, Any]):
+        """Compare an escalated prediction with the model's verdict"""
+        if probability is None or not isinstance(verdict.get('trust_score'), (int, float)):
+            return
+        bucket = "confident" if max(probability, 1 - probability) >= self.confidence else "uncertain"
+        agrees = (probability >= 0.5) == (verdict['trust_score'] >= self.model.threshold)
+        self.agreement[bucket][0] += 1
+        self.agreement[bucket][1] += int(agrees)
+
+    def stats(self) -> Dict[str, Any]:
+        def rate(pair):
+            return round(pair[1] / pair[0], 4) if pair[0] else None
+        return {
+            "loaded": self.model is not None,
+            "confidence_threshold": self.confidence,
+            "scored": self.scored,
+            "answered_locally": self.answered,
+            "escalated": self.escalated,
+            "escalation_rate": round(self.escalated / self.scored, 4) if self.scored else 0.0,
+            "audited": self.audited,
+            "audit_agreement": rate(self.agreement["confident"]),
+            "uncertain_agreement": rate(self.agreement["uncertain"]),
+            "compared": self.agreement["confident"][0] + self.agreement["uncertain"][0],
+            "avg_score_us": round(self.score_seconds / self.scored * 1e6, 2) if self.scored else 0.0
+        }
@@ -0,0 +1,406 @@
+"""
+Async data layer for the route handlers.
+
+The storage backends (``services/storage.py``) are synchronous, so calling them
+straight from an ``async def`` handler blocks the event loop for the whole round
+trip. Every function here runs its blocking counterpart on a bounded thread pool
+and is awaited by the routers instead.
+
+Posts and user profiles are also served from bounded LRU+TTL caches; every
+write that touches a cached entity invalidates it here, so the caches stay
+consistent within a worker and bounded by the TTL across workers. Cache misses
+go through a single-flight layer, so concurrent reads of the same post or
+profile share one storage fetch.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Set, Tuple, Callable
+import asyncio
+import functools
+import logging
+import os
+
+from services.storage import get_storage, NotFoundError
+from utils.cache import TTLCache
+from utils.cursors import encode_cursor, decode_cursor, InvalidCursorError
+from utils.mappers import map_post_firestore_to_backend
+from utils.metrics import register_metrics
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DATASTORE_MAX_WORKERS = int(os.getenv('DATASTORE_MAX_WORKERS', '64'))
+STORAGE_PROBE_INTERVAL = float(os.getenv('STORAGE_PROBE_INTERVAL', '30'))
+POST_CACHE_SIZE = int(os.getenv('POST_CACHE_SIZE', '2048'))
+POST_CACHE_TTL = float(os.getenv('POST_CACHE_TTL', '30'))
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '4096'))
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '60'))
+LIKE_CACHE_SIZE = int(os.getenv('LIKE_CACHE_SIZE', '4096'))  # Viewers
+LIKE_CACHE_TTL = float(os.getenv('LIKE_CACHE_TTL', '60'))
+LIKE_CACHE_POSTS = int(os.getenv('LIKE_CACHE_POSTS', '1000'))  # Like states remembered per viewer
+COMMENT_REPLY_PREVIEW = int(os.getenv('COMMENT_REPLY_PREVIEW', '3'))  # Replies shown under each top-level comment
+
+_executor: Optional[ThreadPoolExecutor] = None
+_prober_task: Optional[asyncio.Task] = None
+
+# Entity caches: raw stored documents keyed by post ID / wallet address
+post_cache = TTLCache(max_size=POST_CACHE_SIZE, ttl=POST_CACHE_TTL)
+user_cache = TTLCache(max_size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+# Per-viewer like states ({post_id: liked}) keyed by wallet address, so feed
+# pages only look up posts the viewer hasn't been resolved against yet
+like_cache = TTLCache(max_size=LIKE_CACHE_SIZE, ttl=LIKE_CACHE_TTL)
+
+# Coalesces concurrent cache-miss reads; key classes: post, user, username
+read_flights = SingleFlight()
+
+register_metrics("post_cache", post_cache.stats)
+register_metrics("user_cache", user_cache.stats)
+register_metrics("like_cache", like_cache.stats)
+register_metrics("read_coalescing", read_flights.stats)
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get (or lazily create) the bounded executor used for blocking storage calls"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=DATASTORE_MAX_WORKERS,
+            thread_name_prefix='datastore'
+        )
+        logger.info(f"✅ Datastore executor started with {DATASTORE_MAX_WORKERS} workers")
+    return _executor
+
+def shutdown_executor(wait: bool = True):
+    """Shut down the datastore executor (called from the app lifespan)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait)
+        _executor = None
+        logger.info("✅ Datastore executor shut down")
+
+async def run_blocking(func: Callable, *args, **kwargs):
+    """Run a blocking storage function on the datastore executor and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+# Connection helpers
+async def test_storage_connection() -> bool:
+    return await run_blocking(get_storage().test_connection)
+
+async def get_connection_status() -> Dict[str, Any]:
+    return await run_blocking(get_storage().get_connection_status)
+
+def is_storage_connected() -> bool:
+    return get_storage().is_connected()
+
+def get_storage_backend_name() -> str:
+    return get_storage().name
+
+async def _probe_forever():
+    while True:
+        await asyncio.sleep(STORAGE_PROBE_INTERVAL)
+        try:
+            await test_storage_connection()
+        except Exception as e:
+            logger.error(f"❌ Storage prober error: {e}")
+
+def start_health_prober():
+    """Start the background task that keeps the storage connectivity state fresh"""
+    global _prober_task
+    if _prober_task is None and STORAGE_PROBE_INTERVAL > 0:
+        _prober_task = asyncio.create_task(_probe_forever())
+        logger.info(f"✅ Storage prober started (every {STORAGE_PROBE_INTERVAL}s)")
+
+async def stop_health_prober():
+    """Cancel the background storage prober"""
+    global _prober_task
+    if _prober_task is not None:
+        _prober_task.cancel()
+        try:
+            await _prober_task
+        except asyncio.CancelledError:
+            pass
+        _prober_task = None
+
+# User operations
+async def create_user(wallet_address: str, username: str, display_name: str,
+                      profile_image: Optional[str] = None, bio: Optional[str] = None,
+                      website: Optional[str] = None, twitter: Optional[str] = None,
+                      instagram: Optional[str] = None, location: Optional[str] = None,
+                      email: Optional[str] = None) -> bool:
+    success = await run_blocking(
+        get_storage().create_user, wallet_address, username, display_name,
+        profile_image=profile_image, bio=bio, website=website, twitter=twitter,
+        instagram=instagram, location=location, email=email
+    )
+    user_cache.invalidate(wallet_address)
+    read_flights.forget("user", wallet_address)
+    read_flights.forget("username", username)
+    return success
+
+async def get_user(wallet_address: str) -> Optional[Dict[str, Any]]:
+    cached = user_cache.get(wallet_address)
+    if cached is not None:
+        return dict(cached)
+
+    async def load():
+        token = user_cache.token(wallet_address)
+        user = await run_blocking(get_storage().get_user, wallet_address)
+        if user is not None:
+            user_cache.set(wallet_address, user, token=token)
+        return user
+
+    user = await read_flights.do("user", wallet_address, load)
+    return dict(user) if user is not None else None
+
+async def update_user_profile(wallet_address: str, display_name: str,
+                              profile_image: Optional[str] = None, bio: Optional[str] = None,
+                              website: Optional[str] = None, twitter: Optional[str] = None,
+                              instagram: Optional[str] = None, location: Optional[str] = None,
+                              email: Optional[str] = None) -> bool:
+    success = await run_blocking(
+        get_storage().update_user_profile, wallet_address, display_name,
+        profile_image=profile_image, bio=bio, website=website, twitter=twitter,
+        instagram=instagram, location=location, email=email
+    )
+    user_cache.invalidate(wallet_address)
+    read_flights.forget("user", wallet_address)
+    return success
+
+async def check_user_exists(wallet_address: str) -> bool:
+    user = await get_user(wallet_address)
+    return user is not None and user.get('profile_completed', False)
+
+async def get_user_by_username(username: str) -> Optional[Dict[str, Any]]:
+    user = await read_flights.do(
+        "username", username, lambda: run_blocking(get_storage().get_user_by_username, username)
+    )
+    return dict(user) if user is not None else None
+
+async def soft_delete_user(wallet_address: str) -> bool:
+    success = await run_blocking(get_storage().soft_delete_user, wallet_address)
+    user_cache.invalidate(wallet_address)
+    read_flights.forget("user", wallet_address)
+    return success
+
+# Post operations
+def _write_through(post_id: str, post: Optional[Dict[str, Any]]):
+    """Replace the cached post with the committed state a write returned"""
+    post_cache.invalidate(post_id)
+    read_flights.forget("post", post_id)
+    if post is not None:
+        post_cache.set(post_id, post)
+
+async def create_post(post_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Store a post; returns the stored document (None on failure)"""
+    post = await run_blocking(get_storage().create_post, post_data)
+    _write_through(post_data.get('post_id'), post)
+    return dict(post) if post is not None else None
+
+async def update_post(post_id: str, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Update a live post; returns its committed state, raises NotFoundError if there is none"""
+    try:
+        post = await run_blocking(get_storage().update_post, post_id, update_data)
+    except NotFoundError:
+        _write_through(post_id, None)
+        raise
+    _write_through(post_id, post)
+    return dict(post) if post is not None else None
+
+async def fetch_posts(limit: int = 50, cursor: Optional[str] = None,
+                      wallet_address: Optional[str] = None, for_backend: bool = False,
+                      start_after: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """A page of posts, newest first; returns (posts, next_cursor), next_cursor is None on the last page.
+
+    ``cursor`` is a previous page's next_cursor (raises InvalidCursorError if it wasn't issued for this
+    list); ``start_after`` is the deprecated raw ``created_at`` cursor.
+    """
+    scope = f"posts:{wallet_address or ''}"
+    if cursor:
+        after = decode_cursor(cursor, 2, scope=scope)
+    elif start_after:
+        after = (start_after, "")  # No post ID sorts below "", so this means created_at < start_after
+    else:
+        after = None
+    posts, has_more = await run_blocking(
+        get_storage().fetch_posts, limit=limit, after=after,
+        wallet_address=wallet_address, for_backend=for_backend
+    )
+    if not has_more or not posts:
+        return posts, None
+    last = posts[-1]
+    # Frontend-mapped posts name the ID ``id``
+    return posts, encode_cursor(last['created_at'], last.get('post_id', last.get('id')), scope=scope)
+
+async def get_user_posts(wallet_address: str, limit: int = 20, cursor: Optional[str] = None,
+                         for_backend: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    return await fetch_posts(limit=limit, cursor=cursor, wallet_address=wallet_address, for_backend=for_backend)
+
+async def _load_post(post_id: str) -> Optional[Dict[str, Any]]:
+    token = post_cache.token(post_id)
+    post = await run_blocking(get_storage().get_post_by_id, post_id)
+    if post is not None:
+        post_cache.set(post_id, post, token=token)
+    return post
+
+async def get_post_by_id(post_id: str, for_backend: bool = False) -> Optional[Dict[str, Any]]:
+    post = post_cache.get(post_id)
+    if post is None:
+        post = await read_flights.do("post", post_id, lambda: _load_post(post_id))
+        if post is None:
+            return None
+
+    return map_post_firestore_to_backend(post) if for_backend else dict(post)
+
+async def soft_delete_post(post_id: str) -> bool:
+    """Soft delete a post; raises NotFoundError if it does not exist"""
+    try:
+        return await run_blocking(get_storage().soft_delete_post, post_id)
+    finally:
+        _write_through(post_id, None)
+
+async def update_post_likes(post_id: str, increment: bool = True) -> bool:
+    success = await run_blocking(get_storage().update_post_likes, post_id, increment=increment)
+    post_cache.invalidate(post_id)
+    read_flights.forget("post", post_id)
+    return success
+
+# Like ledger
+def _capped(states: Dict[str, bool]) -> Dict[str, bool]:
+    """Keep the most recently added like states of a viewer"""
+    if len(states) > LIKE_CACHE_POSTS:
+        states = dict(list(states.items())[-LIKE_CACHE_POSTS:])
+    return states
+
+async def set_post_like(wallet_address: str, post_id: str, liked: bool) -> Optional[bool]:
+    """Record or remove a user's like; True if it changed, False if it already was, None on failure.
+
+    Raises NotFoundError when the post doesn't exist or was deleted.
+    """
+    # Checked through the post cache, so a hot post costs no extra read
+    if await get_post_by_id(post_id) is None:
+        raise NotFoundError(f"no post {post_id}")
+    changed = await run_blocking(get_storage().set_post_like, wallet_address, post_id, liked)
+    if changed is not None:
+        states = dict(like_cache.get(wallet_address) or {})
+        states.pop(post_id, None)
+        states[post_id] = liked
+        # Invalidate first so a feed lookup already in flight can't cache the old state
+        like_cache.invalidate(wallet_address)
+        like_cache.set(wallet_address, _capped(states))
+    return changed
+
+async def get_liked_post_ids(wallet_address: str, post_ids: List[str]) -> Set[str]:
+    """Which of ``post_ids`` the viewer liked: cached states plus one batched lookup for the rest"""
+    known = like_cache.get(wallet_address) or {}
+    unknown = [post_id for post_id in dict.fromkeys(post_ids) if post_id not in known]
+    if unknown:
+        token = like_cache.token(wallet_address)
+        liked = await run_blocking(get_storage().get_liked_post_ids, wallet_address, unknown)
+        if liked is None:
+            # Lookup failed: report the unknown posts as not liked, but don't cache that
+            return {post_id for post_id in post_ids if known.get(post_id)}
+        known = _capped({**known, **{post_id: post_id in liked for post_id in unknown}})
+        like_cache.set(wallet_address, known, token=token)
+    return {post_id for post_id in post_ids if known.get(post_id)}
+
+async def mark_user_liked(posts: List[Dict[str, Any]], wallet_address: Optional[str]) -> List[Dict[str, Any]]:
+    """Set ``user_liked`` on mapped posts for the given viewer (no-op without one)"""
+    if wallet_address and posts:
+        liked = await get_liked_post_ids(wallet_address, [post['post_id'] for post in posts])
+        for post in posts:
+            post['user_liked'] = post['post_id'] in liked
+    return posts
+
+# Comment operations
+async def create_comment(comment_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Store a comment; returns it, raises NotFoundError if the post does not exist"""
+    try:
+        return await run_blocking(get_storage().create_comment, comment_data)
+    finally:
+        _write_through(comment_data.get('post_id'), None)
+
+def _page(items: List[Dict[str, Any]], limit: int, scope: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Trim a ``limit + 1`` fetch of comments to ``limit`` and the cursor of the next page (None on the last page)"""
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor(items[-1]['created_at'], items[-1]['comment_id'], scope=scope)
+
+def _nest_replies(replies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Attach each reply to its parent in one pass; replies whose parent isn't in the list stay at the top"""
+    by_id = {reply['comment_id']: reply for reply in replies}
+    nested = []
+    for reply in replies:
+        reply['replies'] = []
+    for reply in replies:
+        parent = by_id.get(reply.get('parent_comment_id'))
+        if parent is not None:
+            parent['replies'].append(reply)
+        else:
+            nested.append(reply)
+    return nested
+
+async def get_post_comments(post_id: str, limit: int = 50, cursor: Optional[str] = None,
+                            previews: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """A page of comment threads: top-level comments oldest first, each with its first ``previews``
+    (default COMMENT_REPLY_PREVIEW) replies nested under ``replies``; returns (threads, next_cursor).
+    Raises InvalidCursorError."""
+    if previews is None:
+        previews = COMMENT_REPLY_PREVIEW
+    after = decode_cursor(cursor, 2, scope=f"comments:{post_id}") if cursor else None
+    storage = get_storage()
+    threads = await run_blocking(storage.get_post_comments, post_id, limit=limit + 1, after=after)
+    threads, next_cursor = _page(threads, limit, f"comments:{post_id}")
+
+    with_replies = [thread['comment_id'] for thread in threads if thread.get('reply_count', 0) > 0]
+    reply_pages = {}
+    if with_replies and previews > 0:
+        reply_pages = await run_blocking(storage.get_reply_previews, with_replies, previews + 1)
+    for thread in threads:
+        replies, thread['replies_cursor'] = _page(
+            reply_pages.get(thread['comment_id'], []), previews, f"replies:{thread['comment_id']}"
+        )
+        thread['replies'] = _nest_replies(replies)
+    return threads, next_cursor
+
+async def get_comment_replies(thread_id: str, limit: int = 50,
+                              cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """A page of a thread's replies, oldest first and nested within the page; returns (replies, next_cursor)"""
+    after = decode_cursor(cursor, 2, scope=f"replies:{thread_id}") if cursor else None
+    replies = await run_blocking(get_storage().get_comment_replies, thread_id, limit=limit + 1, after=after)
+    replies, next_cursor = _page(replies, limit, f"replies:{thread_id}")
+    return _nest_replies(replies), next_cursor
+
+async def update_comment_likes(comment_id: str, increment: bool = True) -> bool:
+    return await run_blocking(get_storage().update_comment_likes, comment_id, increment=increment)
+
+async def delete_comment(comment_id: str) -> bool:
+    success = await run_blocking(get_storage().delete_comment, comment_id)
+    # The parent post isn't known here; comment deletes are rare, so drop all
+    # cached posts rather than serve a stale comment count
+    post_cache.clear()
+    read_flights.clear("post")
+    return success
+
+async def apply_counter_increments(increments: Dict[Tuple[str, str], Dict[str, int]]) -> Set[Tuple[str, str]]:
+    """Apply merged counter increments ({(collection, doc_id): {field: amount}}) in batches;
+    returns the keys that were not written"""
+    try:
+        return await run_blocking(get_storage().apply_counter_increments, increments)
+    finally:
+        post_ids = [doc_id for collection, doc_id in increments if collection == 'posts']
+        post_cache.invalidate(*post_ids)
+        read_flights.forget("post", *post_ids)
+
+def clear_caches():
+    """Drop every cached entity (after bulk deletes or migrations)"""
+    post_cache.clear()
+    user_cache.clear()
+    like_cache.clear()
+    read_flights.clear()
+
+async def clear_all_collections() -> bool:
+    success = await run_blocking(get_storage().clear_all_collections)
+    clear_caches()
+    return success
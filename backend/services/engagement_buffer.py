@@ -0,0 +1,171 @@
+"""
+Write-behind buffer for engagement counters.
+
+Like/unlike calls on posts and comments are acknowledged as soon as they are
+buffered. Increments to the same document are merged in memory (a like and an
+unlike cancel out) and written as batched commits. A flush happens at the
+latest ``ENGAGEMENT_FLUSH_MS`` after the first buffered event, which bounds
+how much a crash can lose. It happens sooner once ``ENGAGEMENT_MAX_PENDING``
+documents are waiting. Documents a flush could not write are merged back
+and retried up to ``ENGAGEMENT_MAX_RETRIES`` times; the ones it did write
+are not. The app lifespan flushes whatever is left on shutdown.
+
+Counts read back from storage lag buffered likes by up to one flush window.
+"""
+
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+import asyncio
+import logging
+import os
+import time
+
+from services.datastore import apply_counter_increments, update_post_likes, update_comment_likes
+from utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+ENGAGEMENT_BUFFER_ENABLED = os.getenv('ENGAGEMENT_BUFFER_ENABLED', 'true').lower() == 'true'
+ENGAGEMENT_FLUSH_MS = float(os.getenv('ENGAGEMENT_FLUSH_MS', '1000'))  # Longest an event stays buffered
+ENGAGEMENT_MAX_PENDING = int(os.getenv('ENGAGEMENT_MAX_PENDING', '500'))  # Documents that trigger an early flush
+ENGAGEMENT_MAX_RETRIES = int(os.getenv('ENGAGEMENT_MAX_RETRIES', '3'))
+
+DocKey = Tuple[str, str]  # (collection, doc_id)
+
+class EngagementBuffer:
+    """Merges counter increments per document and flushes them as batched writes"""
+
+    def __init__(self, flush_ms: float = ENGAGEMENT_FLUSH_MS, max_pending: int = ENGAGEMENT_MAX_PENDING,
+                 max_retries: int = ENGAGEMENT_MAX_RETRIES):
+        self.wait = max(0.0, flush_ms) / 1000
+        self.max_pending = max(1, max_pending)
+        self.max_retries = max_retries
+        self._pending: Dict[DocKey, Dict[str, int]] = {}
+        self._attempts: Dict[DocKey, int] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self._flush_latencies = deque(maxlen=200)
+        self.events = 0
+        self.pending_events = 0
+        self.flushes = 0
+        self.flushed_docs = 0
+        self.failed_flushes = 0
+        self.dropped_increments = 0
+        self.last_flush_at: Optional[float] = None
+
+    def add(self, collection: str, doc_id: str, field: str, amount: int):
+        """Buffer ``amount`` for a counter field; written by the next flush"""
+        key = (collection, doc_id)
+        fields = self._pending.setdefault(key, {})
+        fields[field] = fields.get(field, 0) + amount
+        self.events += 1
+        self.pending_events += 1
+        if len(self._pending) >= self.max_pending:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.wait, self._flush)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        increments, self._pending = self._pending, {}
+        self.pending_events = 0
+        task = asyncio.get_running_loop().create_task(self._write(increments))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _write(self, increments: Dict[DocKey, Dict[str, int]]):
+        started = time.monotonic()
+        try:
+            failed = await apply_counter_increments(increments)
+        except Exception as e:
+            logger.error(f"❌ Engagement flush error: {e}")
+            failed = set(increments)
+        self._flush_latencies.append(time.monotonic() - started)
+
+        self.flushed_docs += len(increments) - len(failed)
+        for key in increments:
+            if key not in failed:
+                self._attempts.pop(key, None)
+        if not failed:
+            self.flushes += 1
+            self.last_flush_at = time.time()
+            return
+
+        # Only the documents that weren't written go back; the rest are committed
+        self.failed_flushes += 1
+        retried = 0
+        for key in failed:
+            fields = increments[key]
+            attempts = self._attempts.get(key, 0) + 1
+            if attempts > self.max_retries:
+                self._attempts.pop(key, None)
+                self.dropped_increments += sum(abs(amount) for amount in fields.values())
+                logger.error(f"❌ Dropping engagement increments for {key[0]}/{key[1]} after {attempts} attempts: {fields}")
+                continue
+            self._attempts[key] = attempts
+            for field, amount in fields.items():
+                self.add(key[0], key[1], field, amount)
+                retried += 1
+        # add() counted the re-buffered entries as new events
+        self.events -= retried
+        if retried:
+            logger.warning(f"⚠️ Engagement flush failed for {len(failed)} of {len(increments)} documents, retrying next window")
+
+    async def drain(self):
+        """Flush everything buffered and wait for in-flight writes (called on shutdown)"""
+        # Failed flushes are merged back, so loop until they are written or dropped
+        while self._pending or self._tasks:
+            self._flush()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._flush_latencies)
+        def ms(pct):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(pct / 100 * len(latencies)))] * 1000, 1)
+        return {
+            "enabled": ENGAGEMENT_BUFFER_ENABLED,
+            "pending_docs": len(self._pending),
+            "pending_events": self.pending_events,
+            "in_flight_flushes": len(self._tasks),
+            "events": self.events,
+            "flushes": self.flushes,
+            "flushed_docs": self.flushed_docs,
+            "events_per_doc_write": round(self.events / self.flushed_docs, 2) if self.flushed_docs else 0.0,
+            "failed_flushes": self.failed_flushes,
+            "dropped_increments": self.dropped_increments,
+            "flush_p50_ms": ms(50),
+            "flush_p99_ms": ms(99),
+            "last_flush_at": self.last_flush_at
+        }
+
+engagement_buffer = EngagementBuffer()
+
+register_metrics("engagement_buffer", engagement_buffer.stats)
+
+async def record_post_like(post_id: str, increment: bool = True) -> bool:
+    """Count a post like/unlike, buffered unless ENGAGEMENT_BUFFER_ENABLED is off"""
+    if not ENGAGEMENT_BUFFER_ENABLED:
+        return await update_post_likes(post_id, increment=increment)
+    engagement_buffer.add('posts', post_id, 'likes', 1 if increment else -1)
+    return True
+
+async def record_comment_like(comment_id: str, increment: bool = True) -> bool:
+    """Count a comment like/unlike, buffered unless ENGAGEMENT_BUFFER_ENABLED is off"""
+    if not ENGAGEMENT_BUFFER_ENABLED:
+        return await update_comment_likes(comment_id, increment=increment)
+    engagement_buffer.add('comments', comment_id, 'likes', 1 if increment else -1)
+    return True
+
+async def stop_engagement_buffer():
+    """Flush buffered engagement before shutdown"""
+    pending = engagement_buffer.pending_events
+    await engagement_buffer.drain()
+    if pending:
+        logger.info(f"✅ Engagement buffer flushed {pending} pending events on shutdown")
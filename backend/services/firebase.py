@@ -1,21 +1,48 @@
 import firebase_admin
 from firebase_admin import credentials, firestore
-from typing import Optional, List, Dict, Any, Tuple
+from google.api_core.exceptions import (
+    AlreadyExists, FailedPrecondition, NotFound,
+    Aborted, DeadlineExceeded, InternalServerError, ResourceExhausted, ServiceUnavailable
+)
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, List, Dict, Any, Set, Tuple, Callable, Iterator
 import logging
 import os
+import random
+import threading
+import time
 from datetime import datetime
+import functools
 import uuid
 
+from services.storage import NotFoundError, BULK_BATCH_SIZE
+from utils.mappers import map_post_firestore_to_frontend, map_post_firestore_to_backend, FEED_IMAGE_VARIANT
+from utils.metrics import register_metrics
+from utils.sharded_counter import ShardedCounters
+
 logger = logging.getLogger(__name__)
 
 # Configuration
 FIREBASE_SERVICE_ACCOUNT_PATH = os.getenv('FIREBASE_SERVICE_ACCOUNT_PATH', 'serviceAccount.json')
 FIREBASE_PROJECT_ID = os.getenv('FIREBASE_PROJECT_ID')
 FIREBASE_DATABASE_URL = os.getenv('FIREBASE_DATABASE_URL')
+FIRESTORE_ERROR_THRESHOLD = int(os.getenv('FIRESTORE_ERROR_THRESHOLD', '3'))
+COUNTER_SHARDS = int(os.getenv('COUNTER_SHARDS', '10'))
+COUNTER_PROMOTE_RATE = float(os.getenv('COUNTER_PROMOTE_RATE', '1.0'))  # Writes/second per post per worker; 0 disables
+COUNTER_RATE_WINDOW = float(os.getenv('COUNTER_RATE_WINDOW', '10'))  # Seconds
+COUNTER_SUM_TTL = float(os.getenv('COUNTER_SUM_TTL', '5'))  # Seconds a post's shard sums are cached
+FIRESTORE_BATCH_LIMIT = 500  # Writes per batch commit
+BULK_PARALLELISM = int(os.getenv('BULK_PARALLELISM', '8'))  # Batch commits in flight per bulk job
+BULK_PAGE_SIZE = int(os.getenv('BULK_PAGE_SIZE', '1000'))  # Documents read per page
+BULK_MAX_RETRIES = int(os.getenv('BULK_MAX_RETRIES', '5'))
+BULK_RETRY_DELAY = float(os.getenv('BULK_RETRY_DELAY', '0.5'))  # Seconds before the first retry, doubled per attempt
+COMMENT_PREVIEW_PARALLELISM = int(os.getenv('COMMENT_PREVIEW_PARALLELISM', '8'))  # Concurrent reply-preview queries per comment page
 
 # Initialize Firebase Admin SDK
 firebase_initialized = False
 firebase_app = None
+firestore_client = None
+_client_lock = threading.Lock()
 
 def initialize_firebase():
     """Initialize Firebase Admin SDK with proper error handling"""
@@ -51,62 +78,192 @@ def initialize_firebase():
         return False
 
 def get_firestore_client():
-    """Get Firestore client with connection validation"""
-    if not firebase_initialized:
-        if not initialize_firebase():
-            logger.error("Firebase not initialized. Cannot get Firestore client.")
+    """Get the process-wide Firestore client (no network round trip)"""
+    global firestore_client
+    if firestore_client is not None:
+        return firestore_client
+
+    with _client_lock:
+        if firestore_client is not None:
+            return firestore_client
+
+        if not firebase_initialized:
+            if not initialize_firebase():
+                logger.error("Firebase not initialized. Cannot get Firestore client.")
+                return None
+
+        try:
+            firestore_client = firestore.client()
+            return firestore_client
+        except Exception as e:
+            logger.error(f"Failed to get Firestore client: {e}")
             return None
-    
-    try:
-        client = firestore.client()
-        # Test connection
-        client.collection('_health_check').document('test').get()
-        return client
-    except Exception as e:
-        logger.error(f"Failed to get Firestore client: {e}")
-        return None
+
+# Connectivity tracking. Updated by the background prober (see
+# services/datastore.py) and passively by every data operation, so the hot
+# path never pays for an extra health-check read: failures count towards
+# FIRESTORE_ERROR_THRESHOLD and any success resets the count.
+_connection_state = {
+    "connected": False,
+    "consecutive_errors": 0,
+    "last_success": None,
+    "last_error": None,
+    "last_error_at": None,
+    "last_probe": None,
+}
+
+def record_firestore_success():
+    """Mark Firestore as reachable"""
+    _connection_state["connected"] = True
+    _connection_state["consecutive_errors"] = 0
+    _connection_state["last_success"] = datetime.utcnow().isoformat()
+
+def record_firestore_error(error: Exception):
+    """Count a failed Firestore operation; enough consecutive failures mark it unreachable"""
+    _thread_errors.count = getattr(_thread_errors, 'count', 0) + 1
+    _connection_state["consecutive_errors"] += 1
+    _connection_state["last_error"] = str(error)
+    _connection_state["last_error_at"] = datetime.utcnow().isoformat()
+    if _connection_state["consecutive_errors"] >= FIRESTORE_ERROR_THRESHOLD:
+        if _connection_state["connected"]:
+            logger.warning(f"⚠️ Firestore marked disconnected after {_connection_state['consecutive_errors']} consecutive errors")
+        _connection_state["connected"] = False
+
+# Errors recorded by the current thread, so a data operation can tell whether it failed
+_thread_errors = threading.local()
+
+def _tracked(func):
+    """Record a data operation that finished without recording an error as a Firestore success"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        errors = getattr(_thread_errors, 'count', 0)
+        result = func(*args, **kwargs)
+        if firebase_initialized and getattr(_thread_errors, 'count', 0) == errors:
+            record_firestore_success()
+        return result
+    return wrapper
+
+def is_firestore_connected() -> bool:
+    """Last known Firestore connectivity, without touching the network"""
+    return _connection_state["connected"]
 
 def test_firestore_connection():
-    """Test Firestore connection with timeout"""
+    """Probe Firestore with a single read and update the connectivity state"""
+    _connection_state["last_probe"] = datetime.utcnow().isoformat()
     try:
         db = get_firestore_client()
         if not db:
+            record_firestore_error(Exception("Failed to get Firestore client"))
             return False
         
         # Try to read a non-existent document
-        db.collection('test').document('connection_test').get()
-        logger.info("✅ Firestore connection test succeeded")
+        db.collection('_health_check').document('probe').get()
+        record_firestore_success()
+        logger.debug("✅ Firestore connection probe succeeded")
         return True
     except Exception as e:
+        record_firestore_error(e)
         logger.error(f"❌ Firestore connection test failed: {e}")
         return False
 
-def get_connection_status():
-    """Get detailed connection status"""
-    try:
-        db = get_firestore_client()
-        if db:
-            # Test with a simple operation
-            db.collection('_health_check').document('status').get()
-            return {
-                "status": "connected",
-                "timestamp": datetime.utcnow().isoformat(),
-                "project_id": FIREBASE_PROJECT_ID or "default"
-            }
+# Post counters (likes, comments). A post whose counters see sustained writes is
+# promoted to sharding: its document gets ``counter_shards: N`` and increments
+# go to a random doc in posts/{post_id}/counter_shards instead, so the post
+# document itself stops being a write hotspot. Reads add the shard sums to the
+# base fields on the post.
+post_counters = ShardedCounters(
+    shards=COUNTER_SHARDS, promote_rate=COUNTER_PROMOTE_RATE,
+    window=COUNTER_RATE_WINDOW, sum_ttl=COUNTER_SUM_TTL
+)
+register_metrics("counter_shards", post_counters.stats)
+
+def _counter_write(db, collection: str, doc_id: str, fields: Dict[str, int]):
+    """(ref, data, sharded) for adding ``fields`` to a document's counters; a shard doc for sharded posts"""
+    doc_ref = db.collection(collection).document(doc_id)
+    data = {field: firestore.Increment(amount) for field, amount in fields.items()}
+    shard_id = post_counters.pick_shard(doc_id) if collection == 'posts' else None
+    if shard_id is None:
+        return doc_ref, data, False
+    return doc_ref.collection('counter_shards').document(shard_id), data, True
+
+def _after_counter_write(db, collection: str, doc_id: str, fields: Dict[str, int], sharded: bool):
+    """Update the cached shard sums, or promote the post once its write rate is too high"""
+    if collection != 'posts':
+        return
+    if sharded:
+        for field, amount in fields.items():
+            post_counters.add_to_sums(doc_id, field, amount)
+    elif post_counters.record_write(doc_id):
+        try:
+            db.collection('posts').document(doc_id).update({'counter_shards': post_counters.shards})
+            post_counters.mark_sharded(doc_id, post_counters.shards)
+            logger.info(f"✅ Post {doc_id} promoted to {post_counters.shards} counter shards")
+        except Exception as e:
+            logger.error(f"❌ Failed to promote post counters for {doc_id}: {e}")
+
+def _commit_counter_write(ref, data: Dict[str, Any], sharded: bool, batch=None):
+    """Write one counter update, or add it to ``batch`` (a WriteBatch or Transaction); shard docs are created on first use"""
+    if batch is not None:
+        if sharded:
+            batch.set(ref, data, merge=True)
         else:
-            return {
-                "status": "disconnected",
-                "timestamp": datetime.utcnow().isoformat(),
-                "error": "Failed to get Firestore client"
-            }
-    except Exception as e:
+            batch.update(ref, data)
+    elif sharded:
+        ref.set(data, merge=True)
+    else:
+        ref.update(data)
+
+def increment_post_counter(db, post_id: str, field: str, amount: int):
+    """Add ``amount`` to a post counter, on a random shard once the post is sharded"""
+    ref, data, sharded = _counter_write(db, 'posts', post_id, {field: amount})
+    _commit_counter_write(ref, data, sharded)
+    _after_counter_write(db, 'posts', post_id, {field: amount}, sharded)
+
+def with_counter_shards(db, post_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the shard sums of a sharded post to its ``likes`` / ``comments`` fields"""
+    shards = post_data.get('counter_shards')
+    post_id = post_data.get('post_id')
+    if not shards or not post_id:
+        return post_data
+
+    post_counters.mark_sharded(post_id, shards)
+    sums = post_counters.cached_sums(post_id)
+    if sums is None:
+        token = post_counters.sums.token(post_id)
+        sums = {'likes': 0, 'comments': 0}
+        shard_docs = db.collection('posts').document(post_id).collection('counter_shards').stream()
+        for shard in shard_docs:
+            shard_data = shard.to_dict()
+            for field in sums:
+                sums[field] += shard_data.get(field, 0)
+        post_counters.store_sums(post_id, sums, token=token)
+
+    for field, value in sums.items():
+        post_data[field] = post_data.get(field, 0) + value
+    return post_data
+
+def get_connection_status():
+    """Get detailed connection status from the tracked connectivity state"""
+    if firestore_client is None and not get_firestore_client():
         return {
-            "status": "error",
+            "status": "disconnected",
             "timestamp": datetime.utcnow().isoformat(),
-            "error": str(e)
+            "error": "Failed to get Firestore client"
         }
 
+    return {
+        "status": "connected" if is_firestore_connected() else "disconnected",
+        "timestamp": datetime.utcnow().isoformat(),
+        "project_id": FIREBASE_PROJECT_ID or "default",
+        "consecutive_errors": _connection_state["consecutive_errors"],
+        "last_success": _connection_state["last_success"],
+        "last_error": _connection_state["last_error"],
+        "last_error_at": _connection_state["last_error_at"],
+        "last_probe": _connection_state["last_probe"]
+    }
+
 # User operations with improved error handling
+@_tracked
 def create_user(wallet_address: str, username: str, display_name: str, 
                 profile_image: Optional[str] = None, bio: Optional[str] = None, 
                 website: Optional[str] = None, twitter: Optional[str] = None,
@@ -157,8 +314,10 @@ def create_user(wallet_address: str, username: str, display_name: str,
         
     except Exception as e:
         logger.error(f"❌ Failed to create user: {e}")
+        record_firestore_error(e)
         return False
 
+@_tracked
 def get_user(wallet_address: str) -> Optional[Dict[str, Any]]:
     """Get user by wallet address"""
     try:
@@ -176,8 +335,10 @@ def get_user(wallet_address: str) -> Optional[Dict[str, Any]]:
         
     except Exception as e:
         logger.error(f"❌ Failed to get user: {e}")
+        record_firestore_error(e)
         return None
 
+@_tracked
 def update_user_profile(wallet_address: str, display_name: str, 
                        profile_image: Optional[str] = None, bio: Optional[str] = None, 
                        website: Optional[str] = None, twitter: Optional[str] = None,
@@ -219,6 +380,7 @@ def update_user_profile(wallet_address: str, display_name: str,
         
     except Exception as e:
         logger.error(f"❌ Failed to update user profile: {e}")
+        record_firestore_error(e)
         return False
 
 def check_user_exists(wallet_address: str) -> bool:
@@ -230,6 +392,7 @@ def check_user_exists(wallet_address: str) -> bool:
         logger.error(f"❌ Failed to check user existence: {e}")
         return False
 
+@_tracked
 def get_user_by_username(username: str) -> Optional[Dict[str, Any]]:
     """Get user by username"""
     try:
@@ -243,21 +406,43 @@ def get_user_by_username(username: str) -> Optional[Dict[str, Any]]:
         
     except Exception as e:
         logger.error(f"❌ Failed to get user by username: {e}")
+        record_firestore_error(e)
         return None
 
-# Post operations with improved error handling and pagination
-def create_post(post_data: Dict[str, Any]) -> bool:
-    """Create new post with validation"""
+@_tracked
+def soft_delete_user(wallet_address: str) -> bool:
+    """Soft delete user account"""
     try:
         db = get_firestore_client()
         if not db:
             return False
+
+        db.collection('users').document(wallet_address).update({
+            'is_deleted': True,
+            'updated_at': datetime.utcnow().isoformat()
+        })
+        logger.info(f"✅ User soft deleted: {wallet_address}")
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ Failed to delete user: {e}")
+        record_firestore_error(e)
+        return False
+
+# Post operations with improved error handling and pagination
+@_tracked
+def create_post(post_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Create new post with validation; returns the stored document"""
+    try:
+        db = get_firestore_client()
+        if not db:
+            return None
             
         # Validate content
         if (not post_data.get('text', '').strip() and 
             not post_data.get('image_url', '').strip()):
             logger.error("Post must have text, image, or both")
-            return False
+            return None
         
         # Add metadata
         post_data['created_at'] = datetime.utcnow().isoformat()
@@ -270,81 +455,59 @@ def create_post(post_data: Dict[str, Any]) -> bool:
         
         db.collection('posts').document(post_data['post_id']).set(post_data)
         logger.info(f"✅ Post created successfully: {post_data['post_id']}")
-        return True
+        # The write plus the fields set above is exactly what was stored
+        return dict(post_data)
         
     except Exception as e:
         logger.error(f"❌ Failed to create post: {e}")
-        return False
+        record_firestore_error(e)
+        return None
 
-def update_post(post_id: str, update_data: Dict[str, Any]) -> bool:
-    """Update existing post"""
+@firestore.transactional
+def _update_post_in_transaction(transaction, post_ref, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    post_doc = post_ref.get(transaction=transaction)
+    post_data = post_doc.to_dict() if post_doc.exists else None
+    if not post_data or post_data.get('is_deleted', False):
+        return None
+    transaction.update(post_ref, update_data)
+    post_data.update(update_data)
+    return post_data
+
+@_tracked
+def update_post(post_id: str, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Update existing post; returns its committed state (raises NotFoundError if there is no live post)"""
     try:
         db = get_firestore_client()
         if not db:
-            return False
+            return None
             
         # Validate content
         if (not update_data.get('text', '').strip() and 
             not update_data.get('image_url', '').strip()):
             logger.error("Post must have text, image, or both")
-            return False
+            return None
         
         update_data['updated_at'] = datetime.utcnow().isoformat()
         update_data['action_type'] = 1  # Edit action
         
-        db.collection('posts').document(post_id).update(update_data)
+        # The response needs the whole post, so read it in the same transaction
+        # as the update instead of checking before and re-fetching after
+        post_data = _update_post_in_transaction(db.transaction(), db.collection('posts').document(post_id), update_data)
+        if post_data is None:
+            raise NotFoundError(f"no post {post_id}")
+        post_data = with_counter_shards(db, post_data)
         logger.info(f"✅ Post updated successfully: {post_id}")
-        return True
+        return post_data
         
+    except NotFoundError:
+        raise
     except Exception as e:
         logger.error(f"❌ Failed to update post: {e}")
-        return False
-
-def map_post_firestore_to_frontend(post: dict) -> dict:
-    """Map Firestore post data to frontend format"""
-    return {
-        "id": post.get("post_id", ""),
-        "content": post.get("text", ""),
-        "image": post.get("image_url", ""),
-        "timestamp": post.get("timestamp", post.get("created_at", "")),
-        "author": {
-            "address": post.get("wallet_address", ""),
-            "displayName": post.get("display_name", "")
-        },
-        "likes": post.get("likes", 0),
-        "comments": post.get("comments", 0),
-        "post_hash": post.get("post_hash", ""),
-        "solanaTxHash": post.get("solana_tx_hash", None),
-        "is_deleted": post.get("is_deleted", False),
-        "action_type": post.get("action_type", 0),
-        "created_at": post.get("created_at", ""),
-        "updated_at": post.get("updated_at", ""),
-        # Add more fields as needed
-    }
-
-def map_post_firestore_to_backend(post: dict) -> dict:
-    """Map Firestore post data to backend API format (PostOut model)"""
-    return {
-        "post_id": post.get("post_id", ""),
-        "wallet_address": post.get("wallet_address", ""),
-        "display_name": post.get("display_name", ""),
-        "text": post.get("text", ""),
-        "image_url": post.get("image_url", ""),
-        "timestamp": post.get("timestamp", post.get("created_at", "")),
-        "created_at": post.get("created_at", ""),
-        "updated_at": post.get("updated_at", ""),
-        "is_deleted": post.get("is_deleted", False),
-        "likes": post.get("likes", 0),
-        "comments": post.get("comments", 0),
-        "solana_tx_hash": post.get("solana_tx_hash", None),
-        "post_hash": post.get("post_hash", ""),
-        "action_type": post.get("action_type", 0),
-        "tags": post.get("tags", []),
-        "location": post.get("location", None),
-        "user_liked": False  # Default value, can be updated later
-    }
+        record_firestore_error(e)
+        return None
 
-def fetch_posts(limit: int = 50, start_after: Optional[str] = None, 
+@_tracked
+def fetch_posts(limit: int = 50, after: Optional[Tuple[str, str]] = None,
                 wallet_address: Optional[str] = None, for_backend: bool = False) -> Tuple[List[Dict[str, Any]], bool]:
     """Fetch posts with pagination and filtering"""
     try:
@@ -354,29 +517,35 @@ def fetch_posts(limit: int = 50, start_after: Optional[str] = None,
         posts_ref = db.collection('posts').where('is_deleted', '==', False)
         if wallet_address:
             posts_ref = posts_ref.where('wallet_address', '==', wallet_address)
+        # post_id breaks created_at ties, so a page boundary never skips or repeats a post
         posts_ref = posts_ref.order_by('created_at', direction=firestore.Query.DESCENDING)
-        if start_after:
-            posts_ref = posts_ref.start_after({"created_at": start_after})
+        posts_ref = posts_ref.order_by('post_id', direction=firestore.Query.DESCENDING)
+        if after:
+            posts_ref = posts_ref.start_after({"created_at": after[0], "post_id": after[1]})
         posts_ref = posts_ref.limit(limit + 1)
         posts_docs = list(posts_ref.stream())
         has_more = len(posts_docs) > limit
         
         # Use appropriate mapping based on target
         if for_backend:
-            posts = [map_post_firestore_to_backend(doc.to_dict()) for doc in posts_docs[:limit]]
+            posts = [map_post_firestore_to_backend(with_counter_shards(db, doc.to_dict()), FEED_IMAGE_VARIANT)
+                     for doc in posts_docs[:limit]]
         else:
-            posts = [map_post_firestore_to_frontend(doc.to_dict()) for doc in posts_docs[:limit]]
+            posts = [map_post_firestore_to_frontend(with_counter_shards(db, doc.to_dict()), FEED_IMAGE_VARIANT)
+                     for doc in posts_docs[:limit]]
             
         logger.info(f"✅ Fetched {len(posts)} posts (has_more: {has_more})")
         return posts, has_more
     except Exception as e:
         logger.error(f"❌ Failed to fetch posts: {e}")
+        record_firestore_error(e)
         return [], False
 
 def get_user_posts(wallet_address: str, limit: int = 20, for_backend: bool = False) -> List[Dict[str, Any]]:
     posts, _ = fetch_posts(limit=limit, wallet_address=wallet_address, for_backend=for_backend)
     return posts
 
+@_tracked
 def get_post_by_id(post_id: str, for_backend: bool = False) -> Optional[Dict[str, Any]]:
     """Get single post by ID"""
     try:
@@ -389,6 +558,7 @@ def get_post_by_id(post_id: str, for_backend: bool = False) -> Optional[Dict[str
             post_data = doc.to_dict()
             if post_data.get('is_deleted', False):
                 return None
+            post_data = with_counter_shards(db, post_data)
             
             # Use appropriate mapping based on target
             if for_backend:
@@ -399,8 +569,10 @@ def get_post_by_id(post_id: str, for_backend: bool = False) -> Optional[Dict[str
         
     except Exception as e:
         logger.error(f"❌ Failed to get post: {e}")
+        record_firestore_error(e)
         return None
 
+@_tracked
 def soft_delete_post(post_id: str) -> bool:
     """Soft delete post"""
     try:
@@ -408,6 +580,7 @@ def soft_delete_post(post_id: str) -> bool:
         if not db:
             return False
             
+        # update() fails if the post doesn't exist, so no existence check is needed
         db.collection('posts').document(post_id).update({
             'is_deleted': True,
             'updated_at': datetime.utcnow().isoformat(),
@@ -416,10 +589,14 @@ def soft_delete_post(post_id: str) -> bool:
         logger.info(f"✅ Post soft deleted: {post_id}")
         return True
         
+    except NotFound:
+        raise NotFoundError(f"no post {post_id}")
     except Exception as e:
         logger.error(f"❌ Failed to delete post: {e}")
+        record_firestore_error(e)
         return False
 
+@_tracked
 def update_post_likes(post_id: str, increment: bool = True) -> bool:
     """Update post likes count"""
     try:
@@ -427,30 +604,78 @@ def update_post_likes(post_id: str, increment: bool = True) -> bool:
         if not db:
             return False
             
-        if increment:
-            db.collection('posts').document(post_id).update({
-                'likes': firestore.Increment(1),
-                'updated_at': datetime.utcnow().isoformat()
-            })
-        else:
-            db.collection('posts').document(post_id).update({
-                'likes': firestore.Increment(-1),
-                'updated_at': datetime.utcnow().isoformat()
-            })
+        # Counter bumps leave updated_at alone: it tracks edits, and rewriting
+        # it would make every like contend with them on the post document
+        increment_post_counter(db, post_id, 'likes', 1 if increment else -1)
         logger.info(f"✅ Post likes updated: {post_id} ({'increment' if increment else 'decrement'})")
         return True
         
     except Exception as e:
         logger.error(f"❌ Failed to update post likes: {e}")
+        record_firestore_error(e)
         return False
 
-# Comment operations
-def create_comment(comment_data: Dict[str, Any]) -> bool:
-    """Create new comment"""
+# Like ledger: one document per (wallet, post) in ``likes``
+def _like_ref(db, wallet_address: str, post_id: str):
+    return db.collection('likes').document(f"{wallet_address}_{post_id}")
+
+@_tracked
+def set_post_like(wallet_address: str, post_id: str, liked: bool) -> Optional[bool]:
+    """Record or remove a like; True if it changed, False if it already was ``liked``, None on failure"""
     try:
         db = get_firestore_client()
         if not db:
+            return None
+
+        like_ref = _like_ref(db, wallet_address, post_id)
+        # Preconditions make both directions idempotent without reading first
+        try:
+            if liked:
+                like_ref.create({
+                    'wallet_address': wallet_address,
+                    'post_id': post_id,
+                    'created_at': datetime.utcnow().isoformat()
+                })
+            else:
+                like_ref.delete(option=db.write_option(exists=True))
+        except (AlreadyExists, NotFound, FailedPrecondition):
             return False
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ Failed to update like ledger: {e}")
+        record_firestore_error(e)
+        return None
+
+@_tracked
+def get_liked_post_ids(wallet_address: str, post_ids: List[str]) -> Optional[Set[str]]:
+    """The subset of ``post_ids`` liked by ``wallet_address`` (one batched get); None if the read failed"""
+    if not post_ids:
+        return set()
+    try:
+        db = get_firestore_client()
+        if not db:
+            return None
+
+        refs = [_like_ref(db, wallet_address, post_id) for post_id in post_ids]
+        return {
+            snapshot.get('post_id') for snapshot in db.get_all(refs, field_paths=['post_id'])
+            if snapshot.exists
+        }
+
+    except Exception as e:
+        logger.error(f"❌ Failed to read like ledger: {e}")
+        record_firestore_error(e)
+        return None
+
+# Comment operations
+@_tracked
+def create_comment(comment_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Create new comment; returns the stored document (raises NotFoundError if the post doesn't exist)"""
+    try:
+        db = get_firestore_client()
+        if not db:
+            return None
             
         # Generate comment ID if not provided
         if 'comment_id' not in comment_data:
@@ -462,40 +687,114 @@ def create_comment(comment_data: Dict[str, Any]) -> bool:
         comment_data['is_deleted'] = False
         comment_data['likes'] = 0
         
-        # Create comment
-        db.collection('comments').document(comment_data['comment_id']).set(comment_data)
-        
-        # Update post comment count
-        db.collection('posts').document(comment_data['post_id']).update({
-            'comments': firestore.Increment(1),
-            'updated_at': datetime.utcnow().isoformat()
-        })
+        # A reply joins its parent's thread (replies to replies stay in the
+        # same thread); the thread root counts its replies
+        post_id = comment_data['post_id']
+        parent_id = comment_data.get('parent_comment_id')
+        thread_ref = None
+        if parent_id:
+            parent = db.collection('comments').document(parent_id).get()
+            parent_data = parent.to_dict() if parent.exists else None
+            if (not parent_data or parent_data.get('is_deleted', False)
+                    or parent_data.get('post_id') != post_id):
+                raise NotFoundError(f"no comment {parent_id} on post {post_id}")
+            comment_data['thread_id'] = parent_data.get('thread_id') or parent_id
+            thread_ref = db.collection('comments').document(comment_data['thread_id'])
+        else:
+            comment_data['thread_id'] = None
+            comment_data['reply_count'] = 0
+
+        # Comment and counters in one commit; the counter update fails (and
+        # takes the comment with it) if the post or thread doesn't exist
+        counter_ref, counter_data, sharded = _counter_write(db, 'posts', post_id, {'comments': 1})
+        batch = db.batch()
+        batch.set(db.collection('comments').document(comment_data['comment_id']), comment_data)
+        if thread_ref is not None:
+            batch.update(thread_ref, {'reply_count': firestore.Increment(1)})
+        _commit_counter_write(counter_ref, counter_data, sharded, batch=batch)
+        batch.commit()
+        _after_counter_write(db, 'posts', post_id, {'comments': 1}, sharded)
         
         logger.info(f"✅ Comment created successfully: {comment_data['comment_id']}")
-        return True
+        return dict(comment_data)
         
+    except NotFoundError:
+        raise
+    except NotFound:
+        raise NotFoundError(f"no post {comment_data.get('post_id')}")
     except Exception as e:
         logger.error(f"❌ Failed to create comment: {e}")
-        return False
+        record_firestore_error(e)
+        return None
+
+def _comment_page(query, limit: int, after: Optional[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """Page of a comment query ordered by (created_at, comment_id), after the ``after`` key"""
+    query = query.where('is_deleted', '==', False)
+    query = query.order_by('created_at', direction=firestore.Query.ASCENDING)
+    query = query.order_by('comment_id', direction=firestore.Query.ASCENDING)
+    if after:
+        query = query.start_after({'created_at': after[0], 'comment_id': after[1]})
+    return [doc.to_dict() for doc in query.limit(limit).stream()]
 
-def get_post_comments(post_id: str, limit: int = 50) -> List[Dict[str, Any]]:
-    """Get comments for a post"""
+@_tracked
+def get_post_comments(post_id: str, limit: int = 50, after: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+    """Get a page of top-level comments for a post"""
     try:
         db = get_firestore_client()
         if not db:
             return []
             
-        comments_ref = db.collection('comments').where('post_id', '==', post_id).where('is_deleted', '==', False)
-        comments_ref = comments_ref.order_by('created_at', direction=firestore.Query.ASCENDING).limit(limit)
-        
-        comments = [doc.to_dict() for doc in comments_ref.stream()]
+        query = db.collection('comments').where('post_id', '==', post_id).where('parent_comment_id', '==', None)
+        comments = _comment_page(query, limit, after)
         logger.info(f"✅ Fetched {len(comments)} comments for post: {post_id}")
         return comments
         
     except Exception as e:
         logger.error(f"❌ Failed to fetch comments: {e}")
+        record_firestore_error(e)
         return []
 
+@_tracked
+def get_comment_replies(thread_id: str, limit: int = 50, after: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+    """Get a page of replies in a comment thread"""
+    try:
+        db = get_firestore_client()
+        if not db:
+            return []
+            
+        replies = _comment_page(db.collection('comments').where('thread_id', '==', thread_id), limit, after)
+        logger.info(f"✅ Fetched {len(replies)} replies for comment: {thread_id}")
+        return replies
+        
+    except Exception as e:
+        logger.error(f"❌ Failed to fetch replies: {e}")
+        record_firestore_error(e)
+        return []
+
+@_tracked
+def get_reply_previews(thread_ids: List[str], limit: int) -> Dict[str, List[Dict[str, Any]]]:
+    """First replies of each thread; one limited query per thread, run concurrently"""
+    if not thread_ids:
+        return {}
+    try:
+        db = get_firestore_client()
+        if not db:
+            return {}
+
+        def preview(thread_id):
+            return _comment_page(db.collection('comments').where('thread_id', '==', thread_id), limit, None)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(len(thread_ids), COMMENT_PREVIEW_PARALLELISM)),
+                                thread_name_prefix='replies') as pool:
+            previews = dict(zip(thread_ids, pool.map(preview, thread_ids)))
+        return previews
+
+    except Exception as e:
+        logger.error(f"❌ Failed to fetch reply previews: {e}")
+        record_firestore_error(e)
+        return {}
+
+@_tracked
 def update_comment_likes(comment_id: str, increment: bool = True) -> bool:
     """Update comment likes count"""
     try:
@@ -503,23 +802,97 @@ def update_comment_likes(comment_id: str, increment: bool = True) -> bool:
         if not db:
             return False
             
-        if increment:
-            db.collection('comments').document(comment_id).update({
-                'likes': firestore.Increment(1),
-                'updated_at': datetime.utcnow().isoformat()
-            })
-        else:
-            db.collection('comments').document(comment_id).update({
-                'likes': firestore.Increment(-1),
-                'updated_at': datetime.utcnow().isoformat()
-            })
+        db.collection('comments').document(comment_id).update({
+            'likes': firestore.Increment(1 if increment else -1)
+        })
         logger.info(f"✅ Comment likes updated: {comment_id}")
         return True
         
     except Exception as e:
         logger.error(f"❌ Failed to update comment likes: {e}")
+        record_firestore_error(e)
         return False
 
+@_tracked
+def apply_counter_increments(increments: Dict[Tuple[str, str], Dict[str, int]]) -> Set[Tuple[str, str]]:
+    """
+    Apply merged counter increments ({(collection, doc_id): {field: amount}}) as
+    batched writes. Documents that no longer exist are skipped. Returns the keys
+    whose increments were not written (the caller may retry exactly those).
+    """
+    db = get_firestore_client()
+    if not db:
+        return set(increments)
+
+    items = [(key, fields) for key, fields in increments.items() if any(fields.values())]
+    failed: Set[Tuple[str, str]] = set()
+    for start in range(0, len(items), FIRESTORE_BATCH_LIMIT):
+        chunk = items[start:start + FIRESTORE_BATCH_LIMIT]
+        try:
+            writes = [
+                (collection, doc_id, fields, _counter_write(db, collection, doc_id, fields))
+                for (collection, doc_id), fields in chunk
+            ]
+            batch = db.batch()
+            for _, _, _, (ref, data, sharded) in writes:
+                _commit_counter_write(ref, data, sharded, batch=batch)
+            try:
+                batch.commit()
+                applied = writes
+            except NotFound:
+                # One of the documents is gone (the whole batch was rejected): apply
+                # them one by one so only the missing ones are lost
+                applied = []
+                for write in writes:
+                    try:
+                        _commit_counter_write(*write[3])
+                        applied.append(write)
+                    except NotFound:
+                        logger.warning(f"⚠️ Skipping counter increments for missing {write[0]}/{write[1]}")
+                    except Exception as e:
+                        logger.error(f"❌ Failed to apply counter increments to {write[0]}/{write[1]}: {e}")
+                        record_firestore_error(e)
+                        failed.add((write[0], write[1]))
+        except Exception as e:
+            # Nothing in this batch was committed; earlier batches were
+            logger.error(f"❌ Failed to apply counter increments: {e}")
+            record_firestore_error(e)
+            failed.update(key for key, _ in chunk)
+            continue
+        for collection, doc_id, fields, (_, _, sharded) in applied:
+            _after_counter_write(db, collection, doc_id, fields, sharded)
+
+    logger.info(f"✅ Applied counter increments to {len(items) - len(failed)} documents ({len(failed)} failed)")
+    return failed
+
+@firestore.transactional
+def _delete_comment_in_transaction(transaction, db, comment_id: str):
+    """Soft delete a comment and decrement its post's and thread's counters; returns (post_id, sharded) or None"""
+    comment_ref = db.collection('comments').document(comment_id)
+    comment_doc = comment_ref.get(transaction=transaction)
+    comment_data = comment_doc.to_dict() if comment_doc.exists else None
+    if not comment_data or comment_data.get('is_deleted', False):
+        return None
+    thread_ref = None
+    if comment_data.get('thread_id'):
+        thread_ref = db.collection('comments').document(comment_data['thread_id'])
+        if not thread_ref.get(transaction=transaction).exists:
+            thread_ref = None  # Root already purged
+
+    if thread_ref is not None:
+        transaction.update(thread_ref, {'reply_count': firestore.Increment(-1)})
+    transaction.update(comment_ref, {
+        'is_deleted': True,
+        'updated_at': datetime.utcnow().isoformat()
+    })
+    post_id = comment_data.get('post_id')
+    if not post_id:
+        return None
+    counter_ref, counter_data, sharded = _counter_write(db, 'posts', post_id, {'comments': -1})
+    _commit_counter_write(counter_ref, counter_data, sharded, batch=transaction)
+    return post_id, sharded
+
+@_tracked
 def delete_comment(comment_id: str) -> bool:
     """Soft delete comment"""
     try:
@@ -527,62 +900,175 @@ def delete_comment(comment_id: str) -> bool:
         if not db:
             return False
             
-        # Get comment to update post count
-        comment_doc = db.collection('comments').document(comment_id).get()
-        if comment_doc.exists:
-            comment_data = comment_doc.to_dict()
-            post_id = comment_data.get('post_id')
-            
-            # Soft delete comment
-            db.collection('comments').document(comment_id).update({
-                'is_deleted': True,
-                'updated_at': datetime.utcnow().isoformat()
-            })
-            
-            # Update post comment count
-            if post_id:
-                db.collection('posts').document(post_id).update({
-                    'comments': firestore.Increment(-1),
-                    'updated_at': datetime.utcnow().isoformat()
-                })
+        # The post to decrement is only known from the comment, so read and
+        # write in one transaction; deleting an already deleted comment is a no-op
+        deleted = _delete_comment_in_transaction(db.transaction(), db, comment_id)
+        if deleted:
+            post_id, sharded = deleted
+            _after_counter_write(db, 'posts', post_id, {'comments': -1}, sharded)
         
         logger.info(f"✅ Comment deleted: {comment_id}")
         return True
         
     except Exception as e:
         logger.error(f"❌ Failed to delete comment: {e}")
+        record_firestore_error(e)
         return False
 
+# Bulk mutations (clear-all, tombstone purges, migrations). Pages of matching
+# documents are read with a cursor while earlier pages' batches (up to 500
+# writes each) commit on a small thread pool; transient commit errors are
+# retried with exponential backoff and jitter.
+_RETRYABLE_ERRORS = (Aborted, DeadlineExceeded, InternalServerError, ResourceExhausted, ServiceUnavailable)
+
+def _commit_with_retry(db, ops: List[Tuple[str, Any, Optional[Dict[str, Any]]]]) -> int:
+    """Commit ``ops`` as one batch; returns how many writes were lost after the retries ran out"""
+    for attempt in range(BULK_MAX_RETRIES + 1):
+        batch = db.batch()
+        for kind, ref, data in ops:
+            if kind == 'delete':
+                batch.delete(ref)
+            else:
+                batch.update(ref, data)
+        try:
+            batch.commit()
+            return 0
+        except _RETRYABLE_ERRORS as e:
+            if attempt == BULK_MAX_RETRIES:
+                logger.error(f"❌ Bulk batch of {len(ops)} writes failed after {attempt + 1} attempts: {e}")
+                return len(ops)
+            time.sleep(BULK_RETRY_DELAY * (2 ** attempt) * (0.5 + random.random()))
+        except NotFound as e:
+            # An update target vanished mid-job; the rest of the batch was rejected with it
+            logger.warning(f"⚠️ Bulk batch of {len(ops)} writes hit a missing document: {e}")
+            return len(ops)
+    return len(ops)
+
+def _bulk_write(collection: str, plan: Callable[[Any], List[Tuple[str, Any, Optional[Dict[str, Any]]]]],
+                filters: Optional[List[Tuple[str, str, Any]]] = None, fields: Optional[List[str]] = None,
+                progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    db = get_firestore_client()
+    if not db:
+        raise RuntimeError("No Firestore client available")
+
+    query = db.collection(collection)
+    for field, op, value in filters or []:
+        query = query.where(field, op, value)
+    if fields is not None:
+        # Cursors need the filtered fields on each snapshot, so keep them in the projection;
+        # with nothing else to read, fetch document names only
+        projection = sorted(set(fields) | {field for field, _, _ in filters or []})
+        query = query.select(projection or ['__name__'])
+
+    batch_size = max(1, min(BULK_BATCH_SIZE, FIRESTORE_BATCH_LIMIT))
+    totals = {'written': 0, 'failed': 0}
+    lock = threading.Lock()
+
+    def commit(ops):
+        failed = _commit_with_retry(db, ops)
+        with lock:
+            totals['written'] += len(ops) - failed
+            totals['failed'] += failed
+        if progress:
+            progress(len(ops) - failed, failed)
+
+    with ThreadPoolExecutor(max_workers=max(1, BULK_PARALLELISM), thread_name_prefix='bulk') as pool:
+        in_flight = set()
+        last_doc = None
+        while True:
+            page = query.limit(BULK_PAGE_SIZE)
+            if last_doc is not None:
+                page = page.start_after(last_doc)
+            docs = list(page.stream())
+            if not docs:
+                break
+            last_doc = docs[-1]
+
+            ops = [op for doc in docs for op in plan(doc)]
+            for start in range(0, len(ops), batch_size):
+                while len(in_flight) >= 2 * BULK_PARALLELISM:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                in_flight.add(pool.submit(commit, ops[start:start + batch_size]))
+        for future in in_flight:
+            future.result()
+
+    record_firestore_success()
+    return totals
+
+def bulk_delete(collection: str, filters: Optional[List[Tuple[str, str, Any]]] = None,
+                progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    """Delete every document of ``collection`` matching ``filters`` (and the counter shards of posts)"""
+    def plan(doc):
+        ops = [('delete', doc.reference, None)]
+        if collection == 'posts':
+            shards = doc.to_dict().get('counter_shards') or 0
+            ops.extend(('delete', doc.reference.collection('counter_shards').document(str(shard)), None)
+                       for shard in range(shards))
+        return ops
+
+    totals = _bulk_write(collection, plan, filters=filters,
+                         fields=['counter_shards'] if collection == 'posts' else [], progress=progress)
+    if collection == 'posts':
+        post_counters.clear()
+    logger.info(f"✅ Bulk deleted {totals['written']} documents from {collection} ({totals['failed']} failed)")
+    return totals
+
+def bulk_update(collection: str, transform: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+                filters: Optional[List[Tuple[str, str, Any]]] = None,
+                progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    """Merge ``transform(document)`` into every matching document (None skips it); for migrations"""
+    def plan(doc):
+        update = transform(doc.to_dict())
+        return [('update', doc.reference, update)] if update else []
+
+    totals = _bulk_write(collection, plan, filters=filters, progress=progress)
+    logger.info(f"✅ Bulk updated {totals['written']} documents in {collection} ({totals['failed']} failed)")
+    return totals
+
+def scan_documents(collection: str, filters: Optional[List[Tuple[str, str, Any]]] = None,
+                   fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Read-only paged iteration over a collection (``BULK_PAGE_SIZE`` documents per query)"""
+    db = get_firestore_client()
+    if not db:
+        raise RuntimeError("No Firestore client available")
+
+    query = db.collection(collection)
+    for field, op, value in filters or []:
+        query = query.where(field, op, value)
+    if fields is not None:
+        query = query.select(sorted(set(fields) | {field for field, _, _ in filters or []}))
+
+    last_doc = None
+    while True:
+        page = query.limit(BULK_PAGE_SIZE)
+        if last_doc is not None:
+            page = page.start_after(last_doc)
+        docs = list(page.stream())
+        if not docs:
+            return
+        last_doc = docs[-1]
+        for doc in docs:
+            yield doc.to_dict()
+
 def clear_all_collections():
-    """Clear all collections from Firestore (for testing)"""
+    """Clear all collections from Firestore (for testing); False if any document could not be deleted"""
     try:
-        db = get_firestore_client()
-        if not db:
+        failed = 0
+        for collection in ('posts', 'comments', 'likes', 'users'):
+            failed += bulk_delete(collection)['failed']
+        if failed:
+            logger.error(f"❌ Failed to clear collections: {failed} documents could not be deleted")
             return False
-        
-        # Clear posts collection
-        posts_ref = db.collection('posts')
-        for doc in posts_ref.stream():
-            doc.reference.delete()
-        
-        # Clear users collection
-        users_ref = db.collection('users')
-        for doc in users_ref.stream():
-            doc.reference.delete()
-        
-        # Clear comments collection
-        comments_ref = db.collection('comments')
-        for doc in comments_ref.stream():
-            doc.reference.delete()
-        
         logger.info("✅ All collections cleared successfully")
         return True
         
     except Exception as e:
         logger.error(f"❌ Failed to clear collections: {e}")
+        record_firestore_error(e)
         return False
 
 # Initialize Firebase on module import
 if not firebase_initialized:
-    initialize_firebase()
-    test_firestore_connection() 
\ No newline at end of file
+    initialize_firebase() 
\ No newline at end of file
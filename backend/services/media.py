@@ -0,0 +1,94 @@
+"""
+Image ingest pipeline.
+
+Inline uploads are decoded, resized and re-encoded once, in a process pool so
+the CPU work stays off the event loop. The original and every rendered variant
+go into the blob store; documents keep only hashes and URLs.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any
+import asyncio
+import logging
+import multiprocessing
+import os
+
+from services.blob_store import get_blob_store, media_url
+from services.datastore import run_blocking
+from utils.images import process_image, is_remote_image
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', '2'))
+IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', '80'))
+
+# Variant name -> longest edge in pixels
+POST_IMAGE_VARIANTS = {
+    "thumb": int(os.getenv('IMAGE_THUMB_SIZE', '480')),   # Feed cards
+    "full": int(os.getenv('IMAGE_FULL_SIZE', '1600')),    # Single post view
+}
+AVATAR_VARIANTS = {
+    "avatar": int(os.getenv('IMAGE_AVATAR_SIZE', '256')),
+}
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Get (or lazily create) the image processing pool"""
+    global _process_pool
+    if _process_pool is None:
+        # spawn, not fork: the parent holds gRPC/HTTP threads that must not be forked
+        _process_pool = ProcessPoolExecutor(
+            max_workers=IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+        logger.info(f"✅ Image pipeline started with {IMAGE_WORKERS} workers")
+    return _process_pool
+
+def shutdown_image_pool():
+    """Shut down the image processing pool (called from the app lifespan)"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True, cancel_futures=True)
+        _process_pool = None
+        logger.info("✅ Image pipeline shut down")
+
+def _store_rendered(data: bytes, mime: str, variants: Dict[str, tuple]) -> Dict[str, Any]:
+    store = get_blob_store()
+    original_hash = store.put(data, mime)
+    variant_urls = {}
+    for name, (variant_data, variant_mime) in variants.items():
+        variant_urls[name] = media_url(store.put(variant_data, variant_mime))
+    return {"image_hash": original_hash, "image_url": media_url(original_hash), "image_variants": variant_urls}
+
+async def _ingest(value: Optional[str], sizes: Dict[str, int]) -> Optional[Dict[str, Any]]:
+    if not value or not value.strip() or is_remote_image(value):
+        return None
+    loop = asyncio.get_running_loop()
+    data, mime, variants = await loop.run_in_executor(
+        get_process_pool(), process_image, value, sizes, IMAGE_QUALITY
+    )
+    stored = await run_blocking(_store_rendered, data, mime, variants)
+    logger.info(f"✅ Ingested image {stored['image_hash'][:12]} with variants {sorted(stored['image_variants'])}")
+    return stored
+
+async def ingest_image(value: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Store an inline base64 post image and its feed/full variants. Returns the
+    fields to save on the post (``image_hash``, ``image_url``, ``image_variants``),
+    or None when there is nothing to ingest (empty value or an existing URL).
+    Raises ValueError for bad images.
+    """
+    return await _ingest(value, POST_IMAGE_VARIANTS)
+
+async def ingest_avatar(value: Optional[str]) -> Optional[str]:
+    """
+    Store an inline base64 profile image and return the avatar-sized URL to keep
+    on the user (the original when no smaller variant could be rendered).
+    Returns the value unchanged when it is empty or already a URL.
+    """
+    stored = await _ingest(value, AVATAR_VARIANTS)
+    if not stored:
+        return value
+    return stored["image_variants"].get("avatar", stored["image_url"])
@@ -0,0 +1,160 @@
+"""
+Hedged requests across moderation model tiers.
+
+``race`` starts the call on the first tier. If that has not answered within
+the hedge delay, it fires the same call at the next tier, and so on, taking
+the first valid result and cancelling the rest. A tier that fails hands over
+to the next one immediately. The hedge delay for each tier is a percentile
+(``MODERATION_HEDGE_PERCENTILE``) of that tier's recent latencies,
+so hedges only fire for its slow tail. Per-model attempts, wins and latency
+percentiles are kept for tuning the tier order.
+"""
+
+from collections import deque
+from typing import Awaitable, Callable, Dict, Any, List, Optional, TypeVar
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MODERATION_HEDGE_ENABLED = os.getenv('MODERATION_HEDGE_ENABLED', 'true').lower() == 'true'
+MODERATION_HEDGE_PERCENTILE = float(os.getenv('MODERATION_HEDGE_PERCENTILE', '95'))
+MODERATION_HEDGE_DELAY_MS = float(os.getenv('MODERATION_HEDGE_DELAY_MS', '3000'))  # Until enough samples exist
+MODERATION_HEDGE_MIN_DELAY_MS = float(os.getenv('MODERATION_HEDGE_MIN_DELAY_MS', '200'))
+MIN_SAMPLES = 20
+
+T = TypeVar('T')
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+class ModelStats:
+    """Recent latency and race outcomes for one model"""
+
+    def __init__(self, model: str, samples: int = 500):
+        self.model = model
+        self.latencies = deque(maxlen=samples)
+        self.attempts = 0
+        self.hedged_attempts = 0  # Started as a hedge rather than first
+        self.wins = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for this model before hedging to the next tier"""
+        if len(self.latencies) < MIN_SAMPLES:
+            return MODERATION_HEDGE_DELAY_MS / 1000
+        return max(MODERATION_HEDGE_MIN_DELAY_MS / 1000, percentile(list(self.latencies), MODERATION_HEDGE_PERCENTILE))
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = list(self.latencies)
+        def ms(pct):
+            return round(percentile(latencies, pct) * 1000, 1) if latencies else None
+        return {
+            "attempts": self.attempts,
+            "hedged_attempts": self.hedged_attempts,
+            "wins": self.wins,
+            "win_rate": round(self.wins / self.attempts, 4) if self.attempts else 0.0,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+            "p50_ms": ms(50),
+            "p90_ms": ms(90),
+            "p99_ms": ms(99),
+            "hedge_delay_ms": round(self.hedge_delay() * 1000, 1)
+        }
+
+class ModelRacer:
+    """Runs a per-model coroutine across model tiers with hedging"""
+
+    def __init__(self, models: List[str], hedge: bool = MODERATION_HEDGE_ENABLED):
+        if not models:
+            raise ValueError("ModelRacer needs at least one model")
+        self.models = models
+        self.hedge = hedge and len(models) > 1
+        self.model_stats = {model: ModelStats(model) for model in models}
+        self.races = 0
+        self.hedged_races = 0
+
+    async def race(self, call: Callable[[str], Awaitable[T]]) -> T:
+        """
+        First valid result of ``call(model)`` over the tiers. Raises the last
+        error when every tier failed.
+        """
+        self.races += 1
+        if not self.hedge:
+            return await self._timed(self.models[0], call, hedged=False)
+
+        pending: Dict[asyncio.Task, str] = {}
+        next_tier = 0
+        last_error: Optional[BaseException] = None
+
+        def launch():
+            nonlocal next_tier
+            model = self.models[next_tier]
+            next_tier += 1
+            pending[asyncio.ensure_future(self._timed(model, call, hedged=next_tier > 1))] = model
+            if next_tier == 2:
+                self.hedged_races += 1
+
+        launch()
+        try:
+            while pending:
+                # Wait for the newest tier's hedge delay; if there is no tier left to hedge to, wait indefinitely
+                timeout = self.model_stats[self.models[next_tier - 1]].hedge_delay() if next_tier < len(self.models) else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch()
+                    continue
+                for task in done:
+                    model = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        self.model_stats[model].wins += 1
+                        if next_tier > 1:
+                            logger.info(f"[Moderation] Hedged race won by {model}")
+                        return task.result()
+                    last_error = error
+                if next_tier < len(self.models):
+                    # A tier failed: hand over to the next one without waiting
+                    launch()
+            raise last_error
+        finally:
+            for task, model in pending.items():
+                task.cancel()
+                self.model_stats[model].cancelled += 1
+
+    async def _timed(self, model: str, call: Callable[[str], Awaitable[T]], hedged: bool) -> T:
+        stats = self.model_stats[model]
+        stats.attempts += 1
+        if hedged:
+            stats.hedged_attempts += 1
+        started = time.monotonic()
+        try:
+            result = await call(model)
+        except asyncio.CancelledError:
+            # Lost a race: the call took at least this long, so keep it as a (censored) sample
+            # rather than letting the percentile forget the slow tail
+            stats.latencies.append(time.monotonic() - started)
+            raise
+        except Exception:
+            stats.errors += 1
+            raise
+        stats.latencies.append(time.monotonic() - started)
+        if not self.hedge:
+            stats.wins += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "models": self.models,
+            "hedging": self.hedge,
+            "races": self.races,
+            "hedged_races": self.hedged_races,  # Races that started more than one tier
+            "hedge_rate": round(self.hedged_races / self.races, 4) if self.races else 0.0,
+            "per_model": {model: stats.stats() for model, stats in self.model_stats.items()}
+        }
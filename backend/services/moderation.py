@@ -0,0 +1,170 @@
+"""
+Moderation pipeline used by the post and AI routes.
+
+``moderate_text`` returns a verdict dict (``trust_score``, ``trust_tag``,
+``explanation``, and ``source``: ``prefilter``, ``classifier``, ``model`` or
+``fallback``). Each stage only sees what the previous one could not settle:
+
+1. the local pre-filter (``services.prefilter``) for clear-cut posts,
+2. the verdict cache for repeat texts,
+3. the local classifier (``services.classifier``) when it is confident,
+4. the OpenRouter model, micro-batched with other concurrent misses
+   (``services.moderation_batcher``) behind a circuit breaker, falling back
+   to local analysis when the model is unavailable or the breaker is open.
+   Fallback verdicts are never cached.
+
+Long texts go through stages 2-4 chunk by chunk (``utils.chunking``).
+"""
+
+from typing import Dict, Any
+import asyncio
+import logging
+import os
+
+from services.datastore import run_blocking
+from services.moderation_batcher import ModerationBatcher
+from services.moderation_cache import VerdictCache
+from services.moderation_examples import ExampleLog
+from services.prefilter import PreFilter
+from services.classifier import ModerationCascade
+from services.openrouter_client import (
+    fallback_verdict, get_api_key, start_http_client, close_http_client, upstream_available,
+    breaker_stats, model_racer, ModerationUnavailable, MODERATION_MODELS
+)
+from utils.chunking import chunk_text, estimate_tokens
+from utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# Posts scoring below this are rejected
+MIN_TRUST_SCORE = int(os.getenv('MIN_TRUST_SCORE', '60'))
+
+# Long posts are moderated in chunks of about this many tokens
+MODERATION_CHUNK_TOKENS = int(os.getenv('MODERATION_CHUNK_TOKENS', '400'))
+MODERATION_CHUNK_MIN_TOKENS = int(os.getenv('MODERATION_CHUNK_MIN_TOKENS', '150'))
+MODERATION_CHUNK_OVERLAP = int(os.getenv('MODERATION_CHUNK_OVERLAP', '1'))  # Sentences repeated from the previous chunk
+
+# Any tier of the hedged race may answer, so verdicts are cached under the whole tier list
+# (changing MODERATION_MODELS starts a fresh cache)
+VERDICT_CACHE_MODEL = ",".join(MODERATION_MODELS)
+
+verdict_cache = VerdictCache()
+example_log = ExampleLog()
+batcher = ModerationBatcher()
+prefilter = PreFilter()
+cascade = ModerationCascade()
+
+register_metrics("moderation_cache", verdict_cache.stats)
+register_metrics("moderation_examples", example_log.stats)
+register_metrics("moderation_batches", batcher.stats)
+register_metrics("moderation_prefilter", prefilter.stats)
+register_metrics("moderation_classifier", cascade.stats)
+register_metrics("moderation_breaker", breaker_stats)
+register_metrics("moderation_models", model_racer.stats)
+
+chunk_stats = {"chunked_posts": 0, "chunks": 0, "chunk_cache_hits": 0}
+register_metrics("moderation_chunking", lambda: dict(chunk_stats))
+
+async def start_moderation():
+    """Load persisted verdicts and the local classifier, and open the upstream client (called from the app lifespan)"""
+    await run_blocking(verdict_cache.open)
+    await run_blocking(example_log.open)
+    await run_blocking(cascade.load)
+    await start_http_client()
+
+async def stop_moderation():
+    """Release moderation resources (called from the app lifespan)"""
+    await batcher.drain()
+    await close_http_client()
+    await run_blocking(verdict_cache.close)
+    await run_blocking(example_log.close)
+
+async def moderate_text(text: str, allow_fallback: bool = True) -> Dict[str, Any]:
+    """
+    Moderate a post text, reusing cached verdicts for identical content.
+
+    Texts longer than ``MODERATION_CHUNK_TOKENS`` are split into overlapping
+    chunks that are moderated concurrently (and cached individually); the post
+    gets the verdict of its worst chunk.
+
+    With ``allow_fallback=False`` a post that needs the model raises
+    ModerationUnavailable instead of getting a local fallback verdict while the
+    model is down (used by the moderation queue, which can wait).
+    """
+    text = text or ""
+    local_verdict = prefilter.classify(text)
+    if local_verdict is not None:
+        return local_verdict
+
+    if estimate_tokens(text) > MODERATION_CHUNK_TOKENS:
+        return await _moderate_chunked(text, allow_fallback)
+    return await _moderate_chunk(text, allow_fallback)
+
+async def _moderate_chunked(text: str, allow_fallback: bool) -> Dict[str, Any]:
+    chunks = chunk_text(text, MODERATION_CHUNK_TOKENS, MODERATION_CHUNK_MIN_TOKENS, MODERATION_CHUNK_OVERLAP)
+    chunk_stats["chunked_posts"] += 1
+    chunk_stats["chunks"] += len(chunks)
+    verdicts = await asyncio.gather(*(_moderate_chunk(chunk, allow_fallback, True) for chunk in chunks))
+
+    # Worst-chunk rule: one bad passage sinks the post
+    worst = min(range(len(chunks)), key=lambda i: verdicts[i].get('trust_score', 50))
+    verdict = dict(verdicts[worst])
+    verdict["explanation"] = f"{verdict.get('explanation', '')} (part {worst + 1} of {len(chunks)})".strip()
+    return verdict
+
+async def _moderate_chunk(text: str, allow_fallback: bool, is_chunk: bool = False) -> Dict[str, Any]:
+    if is_chunk:
+        local_verdict = prefilter.classify(text)
+        if local_verdict is not None:
+            return local_verdict
+
+    cached = verdict_cache.get(text, VERDICT_CACHE_MODEL)
+    if cached is not None:
+        cached.setdefault("source", "model")  # Only model verdicts are cached; older entries lack the tag
+        if is_chunk:
+            chunk_stats["chunk_cache_hits"] += 1
+        return cached
+
+    local_verdict, probability = cascade.classify(text)
+    if local_verdict is not None:
+        return local_verdict
+
+    if not get_api_key():
+        return fallback_verdict(text)
+
+    if not upstream_available():
+        # Breaker open: answer now instead of waiting on a failing upstream
+        if not allow_fallback:
+            raise ModerationUnavailable("Circuit breaker open")
+        return fallback_verdict(text)
+
+    try:
+        verdict = await batcher.submit(text)
+    except Exception as e:
+        logger.error(f"[Moderation] AI moderation failed: {e}")
+        if not allow_fallback:
+            raise ModerationUnavailable(str(e))
+        return fallback_verdict(text)
+
+    cascade.record(probability, verdict)
+    verdict_cache.set(text, VERDICT_CACHE_MODEL, verdict)
+    await run_blocking(_persist_verdict, text, verdict)
+    return verdict
+
+def _persist_verdict(text: str, verdict: Dict[str, Any]):
+    """Write a model verdict to the verdict cache file and the training example log (blocking)"""
+    verdict_cache.persist(text, VERDICT_CACHE_MODEL, verdict)
+    example_log.record(text, VERDICT_CACHE_MODEL, verdict)
+
+def is_acceptable(verdict: Dict[str, Any]) -> bool:
+    return verdict.get('trust_score', 50) >= MIN_TRUST_SCORE
+
+def verdict_fields(verdict: Dict[str, Any]) -> Dict[str, Any]:
+    """The AI moderation fields stored on an accepted post"""
+    trust_score = verdict.get('trust_score', 50)
+    return {
+        "ai_verified": trust_score >= 90,
+        "ai_trust_score": trust_score,
+        "ai_explanation": verdict.get('explanation', 'AI moderation unavailable'),
+        "ai_source": verdict.get('source')  # Lets training keep only model verdicts
+    }
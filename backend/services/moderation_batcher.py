@@ -0,0 +1,113 @@
+"""
+Micro-batching for moderation requests.
+
+Cache misses that arrive within a short window are sent to the model as one
+numbered batch prompt instead of one completion each, so a burst of posts
+costs one round trip and one copy of the instructions. A batch is flushed when
+it is full (``MODERATION_BATCH_MAX``) or when the oldest item has waited
+``MODERATION_BATCH_WAIT_MS``. If the model's batch reply can't be mapped back
+to every post, the batch is retried as individual requests.
+"""
+
+from typing import List, Tuple, Dict, Any, Optional
+import asyncio
+import logging
+import os
+
+from services.openrouter_client import request_verdict, request_batch_verdicts
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MODERATION_BATCH_ENABLED = os.getenv('MODERATION_BATCH_ENABLED', 'true').lower() == 'true'
+MODERATION_BATCH_MAX = int(os.getenv('MODERATION_BATCH_MAX', '8'))
+MODERATION_BATCH_WAIT_MS = float(os.getenv('MODERATION_BATCH_WAIT_MS', '10'))
+MODERATION_BATCH_MAX_CHARS = int(os.getenv('MODERATION_BATCH_MAX_CHARS', '2000'))  # Longer texts go alone
+
+class ModerationBatcher:
+    """Collects concurrent moderation requests and sends them as batch prompts"""
+
+    def __init__(self, model: Optional[str] = None, max_batch: int = MODERATION_BATCH_MAX,
+                 wait_ms: float = MODERATION_BATCH_WAIT_MS, max_chars: int = MODERATION_BATCH_MAX_CHARS,
+                 enabled: bool = MODERATION_BATCH_ENABLED):
+        self.model = model
+        self.max_batch = max(1, max_batch)
+        self.wait = max(0.0, wait_ms) / 1000
+        self.max_chars = max_chars
+        self.enabled = enabled and self.max_batch > 1
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.batches = 0
+        self.batched_items = 0
+        self.single_requests = 0
+        self.batch_fallbacks = 0
+
+    async def submit(self, text: str) -> Dict[str, Any]:
+        """Get a verdict for ``text``, possibly sharing a completion with other posts"""
+        if not self.enabled or len(text) > self.max_chars:
+            self.single_requests += 1
+            return await request_verdict(text, self.model)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        texts = [text for text, _ in batch]
+        if len(batch) == 1:
+            self.single_requests += 1
+            results = await asyncio.gather(request_verdict(texts[0], self.model), return_exceptions=True)
+        else:
+            try:
+                results = await request_batch_verdicts(texts, self.model)
+                self.batches += 1
+                self.batched_items += len(batch)
+            except Exception as e:
+                logger.warning(f"[Moderation] Batch of {len(batch)} failed ({e}), retrying individually")
+                self.batch_fallbacks += 1
+                self.single_requests += len(batch)
+                results = await asyncio.gather(
+                    *(request_verdict(text, self.model) for text in texts), return_exceptions=True
+                )
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def drain(self):
+        """Flush anything still queued and wait for in-flight batches (called on shutdown)"""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "batched_items": self.batched_items,
+            "avg_batch_size": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+            "single_requests": self.single_requests,
+            "batch_fallbacks": self.batch_fallbacks
+        }
@@ -0,0 +1,108 @@
+"""
+Moderation verdict cache.
+
+Verdicts are keyed by SHA-256 of the moderation model name plus the normalized
+post text, so reposts, spam floods and the frontend's verify-then-create flow
+reuse one upstream call. Entries live in a bounded in-memory LRU+TTL cache and
+are optionally persisted to a SQLite file (``MODERATION_CACHE_PATH``) that is
+loaded back on startup. Training examples for the local classifier are kept
+separately (``services.moderation_examples``).
+"""
+
+from typing import Optional, Dict, Any
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MODERATION_CACHE_SIZE = int(os.getenv('MODERATION_CACHE_SIZE', '10000'))
+MODERATION_CACHE_TTL = float(os.getenv('MODERATION_CACHE_TTL', str(7 * 24 * 3600)))
+MODERATION_CACHE_PATH = os.getenv('MODERATION_CACHE_PATH', '')  # Empty disables persistence
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys: NFKC, case-folded, whitespace collapsed"""
+    return " ".join(unicodedata.normalize('NFKC', text or "").casefold().split())
+
+def verdict_key(text: str, model: str) -> str:
+    return hashlib.sha256(f"{model}\x00{normalize_text(text)}".encode('utf-8')).hexdigest()
+
+class VerdictCache:
+    """In-memory verdict cache with optional SQLite persistence"""
+
+    def __init__(self, max_size: int = MODERATION_CACHE_SIZE, ttl: float = MODERATION_CACHE_TTL,
+                 path: str = MODERATION_CACHE_PATH):
+        self.memory = TTLCache(max_size=max_size, ttl=ttl)
+        self.ttl = ttl
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.disk_writes = 0
+        self.loaded_from_disk = 0
+
+    def get(self, text: str, model: str) -> Optional[Dict[str, Any]]:
+        verdict = self.memory.get(verdict_key(text, model))
+        return dict(verdict) if verdict is not None else None
+
+    def set(self, text: str, model: str, verdict: Dict[str, Any]):
+        """Cache in memory; call ``persist`` (blocking) to also write it to disk"""
+        self.memory.set(verdict_key(text, model), dict(verdict))
+
+    # Persistence (blocking; run on the datastore executor)
+    def open(self):
+        """Open the SQLite file and warm the memory cache from unexpired entries"""
+        if not self.path or self._db is not None:
+            return
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts (key TEXT PRIMARY KEY, verdict TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        now = time.time()
+        with self._db_lock:
+            self._db.execute("DELETE FROM verdicts WHERE expires_at < ?", (now,))
+            rows = self._db.execute(
+                "SELECT key, verdict, expires_at FROM verdicts ORDER BY expires_at DESC LIMIT ?",
+                (self.memory.max_size,)
+            ).fetchall()
+        # Oldest first so the freshest entries end up most recently used
+        for key, verdict, expires_at in reversed(rows):
+            self.memory.set(key, json.loads(verdict), ttl=expires_at - now)
+        self.loaded_from_disk = len(rows)
+        logger.info(f"✅ Moderation cache loaded {len(rows)} verdicts from {self.path}")
+
+    def persist(self, text: str, model: str, verdict: Dict[str, Any]):
+        if self._db is None:
+            return
+        try:
+            key = verdict_key(text, model)
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO verdicts (key, verdict, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(verdict), time.time() + self.ttl)
+                )
+            self.disk_writes += 1
+        except Exception as e:
+            logger.error(f"❌ Failed to persist moderation verdict: {e}")
+
+    def close(self):
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.memory.stats(),
+            "persistent": self._db is not None,
+            "disk_writes": self.disk_writes,
+            "loaded_from_disk": self.loaded_from_disk
+        }
@@ -0,0 +1,76 @@
+"""
+Training examples for the local moderation classifier.
+
+Every verdict the moderation model returns is logged here with its text,
+rejections included. Rejected posts are never stored, so this is the only
+place their labels survive. The log is a SQLite file
+(``MODERATION_EXAMPLES_PATH``), one row per distinct normalized text,
+that ``train_moderation_model.py`` reads. Only model verdicts are recorded;
+pre-filter, classifier and fallback verdicts would teach the classifier its
+own guesses.
+"""
+
+from typing import Optional, Dict, Any
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from services.moderation_cache import verdict_key
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MODERATION_EXAMPLES_PATH = os.getenv('MODERATION_EXAMPLES_PATH', 'moderation_examples.db')  # Empty disables the log
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS examples (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    trust_score REAL NOT NULL,
+    model TEXT,
+    created_at REAL NOT NULL
+);
+"""
+
+class ExampleLog:
+    """SQLite log of model verdicts. All methods are blocking; run them on the datastore executor."""
+
+    def __init__(self, path: str = MODERATION_EXAMPLES_PATH):
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def open(self):
+        if not self.path or self._db is not None:
+            return
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        if self.path != ':memory:':
+            self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(SCHEMA)
+        logger.info(f"✅ Moderation examples logged to {self.path}")
+
+    def record(self, text: str, model: str, verdict: Dict[str, Any]):
+        """Log a model verdict (later verdicts for the same text replace earlier ones)"""
+        if self._db is None or not isinstance(verdict.get('trust_score'), (int, float)):
+            return
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO examples (key, text, trust_score, model, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (verdict_key(text, ""), text, float(verdict['trust_score']), model, time.time())
+                )
+            self.recorded += 1
+        except Exception as e:
+            logger.error(f"❌ Failed to log moderation example: {e}")
+
+    def close(self):
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+            self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self._db is not None, "recorded": self.recorded}
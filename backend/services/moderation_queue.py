@@ -0,0 +1,206 @@
+"""
+Durable moderation job queue.
+
+In asynchronous moderation mode a new post is accepted straight away and its
+document is parked here as a job until a worker has a verdict for it. The
+queue is a SQLite file (``MODERATION_QUEUE_PATH``) so pending posts survive
+restarts and can be shared by several workers on one host. Jobs are claimed
+with a lease: a job whose worker died is handed out again once its lease
+expires.
+
+Job states: ``pending_moderation`` (queued or being moderated), ``published``,
+``rejected`` and ``failed`` (gave up after ``MODERATION_MAX_ATTEMPTS``).
+Finished jobs are kept for ``MODERATION_JOB_RETENTION`` seconds so clients can
+still poll the outcome.
+"""
+
+from typing import Optional, List, Dict, Any
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MODERATION_QUEUE_PATH = os.getenv('MODERATION_QUEUE_PATH', 'moderation_queue.db')
+MODERATION_JOB_LEASE = float(os.getenv('MODERATION_JOB_LEASE', '120'))  # Seconds a claimed job stays reserved
+MODERATION_MAX_ATTEMPTS = int(os.getenv('MODERATION_MAX_ATTEMPTS', '5'))
+MODERATION_JOB_RETENTION = float(os.getenv('MODERATION_JOB_RETENTION', str(24 * 3600)))
+
+PENDING = "pending_moderation"
+PUBLISHED = "published"
+REJECTED = "rejected"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS moderation_jobs (
+    post_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_moderation_jobs_ready ON moderation_jobs (status, available_at);
+"""
+
+class ModerationQueue:
+    """SQLite-backed job queue. All methods are blocking; run them on the datastore executor."""
+
+    def __init__(self, path: str = MODERATION_QUEUE_PATH, lease: float = MODERATION_JOB_LEASE,
+                 max_attempts: int = MODERATION_MAX_ATTEMPTS, retention: float = MODERATION_JOB_RETENTION):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.completed = {PUBLISHED: 0, REJECTED: 0, FAILED: 0}
+        self.retries = 0
+        self.deferred = 0
+
+    def open(self):
+        if self._conn is not None:
+            return
+        self._conn = sqlite3.connect(self.path or ':memory:', check_same_thread=False, isolation_level=None)
+        if self.path and self.path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA busy_timeout=5000')
+        self._conn.executescript(SCHEMA)
+        depth = self._conn.execute(
+            "SELECT COUNT(*) FROM moderation_jobs WHERE status = ?", (PENDING,)
+        ).fetchone()[0]
+        logger.info(f"✅ Moderation queue ready: {self.path} ({depth} pending jobs)")
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.open()
+        return self._conn
+
+    def enqueue(self, post_id: str, payload: Dict[str, Any]):
+        """Queue a post for moderation, replacing any earlier job for the same post id"""
+        now = time.time()
+        with self._lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO moderation_jobs "
+                "(post_id, status, payload, result, attempts, enqueued_at, available_at, updated_at) "
+                "VALUES (?, ?, ?, NULL, 0, ?, ?, ?)",
+                (post_id, PENDING, json.dumps(payload), now, now, now)
+            )
+
+    def claim(self, limit: int) -> List[Dict[str, Any]]:
+        """Reserve up to ``limit`` ready jobs for ``lease`` seconds and return them, oldest first"""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                rows = db.execute(
+                    "SELECT post_id, payload, attempts, enqueued_at FROM moderation_jobs "
+                    "WHERE status = ? AND available_at <= ? ORDER BY available_at LIMIT ?",
+                    (PENDING, now, limit)
+                ).fetchall()
+                db.executemany(
+                    "UPDATE moderation_jobs SET available_at = ?, attempts = attempts + 1, updated_at = ? "
+                    "WHERE post_id = ?",
+                    [(now + self.lease, now, row[0]) for row in rows]
+                )
+                db.execute('COMMIT')
+            except Exception:
+                db.execute('ROLLBACK')
+                raise
+        return [
+            {"post_id": post_id, "payload": json.loads(payload), "attempts": attempts + 1, "enqueued_at": enqueued_at}
+            for post_id, payload, attempts, enqueued_at in rows
+        ]
+
+    def complete(self, post_id: str, status: str, result: Dict[str, Any]):
+        """Record the outcome of a job"""
+        with self._lock:
+            self._db().execute(
+                "UPDATE moderation_jobs SET status = ?, result = ?, updated_at = ? WHERE post_id = ?",
+                (status, json.dumps(result), time.time(), post_id)
+            )
+        self.completed[status] = self.completed.get(status, 0) + 1
+
+    def retry(self, post_id: str, attempts: int, error: str):
+        """Release a job after a failed attempt, backing off exponentially; marks it failed when out of attempts"""
+        if attempts >= self.max_attempts:
+            logger.error(f"❌ Moderation job {post_id} failed after {attempts} attempts: {error}")
+            self.complete(post_id, FAILED, {"error": error})
+            return
+        delay = min(300, 2 ** attempts)
+        with self._lock:
+            self._db().execute(
+                "UPDATE moderation_jobs SET available_at = ?, updated_at = ? WHERE post_id = ?",
+                (time.time() + delay, time.time(), post_id)
+            )
+        self.retries += 1
+
+    def release(self, post_id: str, delay: float):
+        """Hand a claimed job back without using up an attempt (the upstream is unavailable)"""
+        with self._lock:
+            self._db().execute(
+                "UPDATE moderation_jobs SET available_at = ?, attempts = MAX(attempts - 1, 0), updated_at = ? "
+                "WHERE post_id = ?",
+                (time.time() + delay, time.time(), post_id)
+            )
+        self.deferred += 1
+
+    def get(self, post_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT status, result, attempts, enqueued_at, updated_at FROM moderation_jobs WHERE post_id = ?",
+                (post_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, result, attempts, enqueued_at, updated_at = row
+        return {
+            "post_id": post_id,
+            "status": status,
+            "result": json.loads(result) if result else None,
+            "attempts": attempts,
+            "enqueued_at": enqueued_at,
+            "updated_at": updated_at
+        }
+
+    def purge_finished(self) -> int:
+        """Drop finished jobs older than the retention window"""
+        with self._lock:
+            return self._db().execute(
+                "DELETE FROM moderation_jobs WHERE status != ? AND updated_at < ?",
+                (PENDING, time.time() - self.retention)
+            ).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        if self._conn is None:
+            return {"open": False}
+        now = time.time()
+        with self._lock:
+            depth, oldest, ready = self._conn.execute(
+                "SELECT COUNT(*), MIN(enqueued_at), SUM(available_at <= ?) FROM moderation_jobs WHERE status = ?",
+                (now, PENDING)
+            ).fetchone()
+        return {
+            "open": True,
+            "depth": depth,
+            "ready": ready or 0,  # The rest are claimed by a worker or backing off
+            "oldest_age_seconds": round(now - oldest, 3) if oldest else 0.0,
+            "published": self.completed[PUBLISHED],
+            "rejected": self.completed[REJECTED],
+            "failed": self.completed[FAILED],
+            "retries": self.retries,
+            "deferred": self.deferred
+        }
@@ -0,0 +1,141 @@
+"""
+Asynchronous moderation.
+
+With ``MODERATION_MODE=async`` the create-post route no longer waits for the
+model: it parks the post on the durable moderation queue and answers 202.
+Worker tasks started from the app lifespan claim jobs, moderate them (the
+batcher groups concurrent jobs into one completion) and either publish the
+post to storage or mark it rejected. Clients poll
+``GET /api/posts/{post_id}/moderation`` for the outcome.
+
+With ``MODERATION_DEGRADED_MODE=queue`` the same path is used in sync mode
+while the upstream circuit breaker is open. Jobs that need the model while it
+is unavailable are handed back to the queue without using up an attempt; on
+their last attempt they take the local fallback verdict instead.
+"""
+
+from typing import Optional, Dict, Any, List
+import asyncio
+import logging
+import os
+import time
+
+from services.datastore import run_blocking, create_post
+from services.moderation import moderate_text, is_acceptable, verdict_fields
+from services.moderation_queue import ModerationQueue, PUBLISHED, REJECTED
+from services.openrouter_client import ModerationUnavailable, upstream_available, upstream_state, upstream_retry_after
+from utils.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MODERATION_MODE = os.getenv('MODERATION_MODE', 'sync').lower()  # sync | async
+MODERATION_DEGRADED_MODE = os.getenv('MODERATION_DEGRADED_MODE', 'fallback').lower()  # fallback | queue
+MODERATION_WORKERS = int(os.getenv('MODERATION_WORKERS', '2'))
+MODERATION_QUEUE_CLAIM = int(os.getenv('MODERATION_QUEUE_CLAIM', '8'))  # Jobs a worker moderates concurrently
+MODERATION_QUEUE_POLL = float(os.getenv('MODERATION_QUEUE_POLL', '1'))  # Seconds between idle polls
+PURGE_INTERVAL = 600
+
+moderation_queue = ModerationQueue()
+
+register_metrics("moderation_queue", moderation_queue.stats)
+
+_workers: List[asyncio.Task] = []
+_wake: Optional[asyncio.Event] = None
+
+def is_async_moderation() -> bool:
+    return MODERATION_MODE == 'async'
+
+def queue_enabled() -> bool:
+    return is_async_moderation() or MODERATION_DEGRADED_MODE == 'queue'
+
+def should_queue() -> bool:
+    """Whether a new post goes to the moderation queue instead of being moderated inline"""
+    return is_async_moderation() or (MODERATION_DEGRADED_MODE == 'queue' and not upstream_available())
+
+async def enqueue_post(post_data: Dict[str, Any]):
+    """Accept a post for moderation; it is published once a worker approves it"""
+    await run_blocking(moderation_queue.enqueue, post_data['post_id'], post_data)
+    if _wake is not None:
+        _wake.set()
+
+async def get_moderation_job(post_id: str) -> Optional[Dict[str, Any]]:
+    if not queue_enabled():
+        return None
+    return await run_blocking(moderation_queue.get, post_id)
+
+async def _process(job: Dict[str, Any]):
+    post_id = job['post_id']
+    post_data = job['payload']
+    try:
+        try:
+            verdict = await moderate_text(
+                post_data.get('text'), allow_fallback=job['attempts'] >= moderation_queue.max_attempts
+            )
+        except ModerationUnavailable as e:
+            if upstream_state() == "closed":
+                raise
+            # Breaker open or probing: wait for it rather than burning attempts
+            await run_blocking(moderation_queue.release, post_id, max(1.0, upstream_retry_after()))
+            return
+        outcome = {
+            "trust_score": verdict.get('trust_score', 50),
+            "trust_tag": verdict.get('trust_tag', '🟡'),
+            "explanation": verdict.get('explanation', 'AI moderation unavailable'),
+            "source": verdict.get('source')
+        }
+        if not is_acceptable(verdict):
+            await run_blocking(moderation_queue.complete, post_id, REJECTED, outcome)
+            logger.info(f"Post {post_id} rejected by AI moderation (trust score {outcome['trust_score']})")
+            return
+
+        post_data.update(verdict_fields(verdict))
+        if not await create_post(post_data):
+            raise RuntimeError("Failed to store moderated post")
+        await run_blocking(moderation_queue.complete, post_id, PUBLISHED, outcome)
+        logger.info(f"✅ Post {post_id} published after {time.time() - job['enqueued_at']:.2f}s in moderation")
+    except Exception as e:
+        logger.error(f"❌ Moderation job {post_id} attempt {job['attempts']} failed: {e}")
+        await run_blocking(moderation_queue.retry, post_id, job['attempts'], str(e))
+
+async def _worker():
+    last_purge = 0.0
+    while True:
+        try:
+            _wake.clear()
+            jobs = await run_blocking(moderation_queue.claim, MODERATION_QUEUE_CLAIM)
+            if jobs:
+                await asyncio.gather(*(_process(job) for job in jobs))
+                continue
+            if time.monotonic() - last_purge > PURGE_INTERVAL:
+                last_purge = time.monotonic()
+                await run_blocking(moderation_queue.purge_finished)
+            try:
+                await asyncio.wait_for(_wake.wait(), MODERATION_QUEUE_POLL)
+            except asyncio.TimeoutError:
+                pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Moderation worker error: {e}")
+            await asyncio.sleep(MODERATION_QUEUE_POLL)
+
+async def start_moderation_workers():
+    """Open the queue and start the workers when the queue is in use (called from the app lifespan)"""
+    global _wake
+    if not queue_enabled() or _workers:
+        return
+    await run_blocking(moderation_queue.open)
+    _wake = asyncio.Event()
+    for _ in range(max(1, MODERATION_WORKERS)):
+        _workers.append(asyncio.create_task(_worker()))
+    logger.info(f"✅ Async moderation started with {len(_workers)} workers")
+
+async def stop_moderation_workers():
+    """Stop the workers; jobs they held are picked up again after their lease expires"""
+    for task in _workers:
+        task.cancel()
+    if _workers:
+        await asyncio.gather(*_workers, return_exceptions=True)
+        _workers.clear()
+    await run_blocking(moderation_queue.close)
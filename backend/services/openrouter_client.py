@@ -1,68 +1,315 @@
 import os
 import httpx
-from utils.prompt_template import get_moderation_prompt
-import ast
+from utils.prompt_template import get_moderation_prompt, get_batch_moderation_prompt
+from typing import Optional, List
+import asyncio
+import json
 import logging
+import secrets
+import time
+from pydantic import ValidationError
+from models.ai import AIResponse
+from utils.circuit_breaker import CircuitBreaker
+from utils.json_scanner import JSONValueScanner
+from services.model_racing import ModelRacer
 logger = logging.getLogger(__name__)
 
-async def call_openrouter(post_text: str):
-    # Check if API key is available
-    api_key = os.getenv('OPENROUTER_API_KEY')
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_WARMUP_URL = "https://openrouter.ai/api/v1/models"
+OPENROUTER_MODEL = os.getenv('OPENROUTER_MODEL', "mistralai/mistral-7b-instruct:free")  # Free model, widely available
+OPENROUTER_TIMEOUT = float(os.getenv('OPENROUTER_TIMEOUT', '15'))
+OPENROUTER_HTTP2 = os.getenv('OPENROUTER_HTTP2', 'true').lower() == 'true'
+OPENROUTER_MAX_CONNECTIONS = int(os.getenv('OPENROUTER_MAX_CONNECTIONS', '50'))
+OPENROUTER_MAX_KEEPALIVE = int(os.getenv('OPENROUTER_MAX_KEEPALIVE', '20'))
+OPENROUTER_KEEPALIVE_EXPIRY = float(os.getenv('OPENROUTER_KEEPALIVE_EXPIRY', '120'))
+MODERATION_STREAMING = os.getenv('MODERATION_STREAMING', 'true').lower() == 'true'
+MODERATION_MAX_TOKENS = int(os.getenv('MODERATION_MAX_TOKENS', '200'))  # Per verdict; batches scale it
+
+def parse_model_tiers(value: str) -> List[str]:
+    """Split a comma-separated model list; an empty or blank list means OPENROUTER_MODEL alone"""
+    return [m.strip() for m in value.split(',') if m.strip()] or [OPENROUTER_MODEL]
+
+# Model tiers, fastest/preferred first; later tiers are hedged to (see services.model_racing)
+MODERATION_MODELS = parse_model_tiers(os.getenv('MODERATION_MODELS', OPENROUTER_MODEL))
+
+def _make_breaker(model: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        f"openrouter:{model}",
+        window=int(os.getenv('MODERATION_BREAKER_WINDOW', '20')),
+        min_calls=int(os.getenv('MODERATION_BREAKER_MIN_CALLS', '5')),
+        failure_threshold=float(os.getenv('MODERATION_BREAKER_ERROR_RATE', '0.5')),
+        slow_call_seconds=float(os.getenv('MODERATION_BREAKER_SLOW_CALL', '8')),
+        slow_threshold=float(os.getenv('MODERATION_BREAKER_SLOW_RATE', '0.8')),
+        open_seconds=float(os.getenv('MODERATION_BREAKER_OPEN_SECONDS', '30')),
+        half_open_calls=int(os.getenv('MODERATION_BREAKER_PROBES', '1'))
+    )
+
+# Circuit breakers, one per model: stop waiting on a model that is failing or slow
+model_breakers = {model: _make_breaker(model) for model in MODERATION_MODELS}
+model_racer = ModelRacer(MODERATION_MODELS)
+
+# One pooled client per worker, created in the app lifespan, so TLS handshakes
+# and DNS lookups are paid once instead of once per moderation call
+_http_client: Optional[httpx.AsyncClient] = None
+
+class ModerationUnavailable(Exception):
+    """The upstream moderation model could not produce a verdict"""
+
+def breaker_for(model: str) -> CircuitBreaker:
+    if model not in model_breakers:
+        model_breakers[model] = _make_breaker(model)
+    return model_breakers[model]
+
+def upstream_state() -> str:
+    """Best breaker state across the model tiers: closed, half_open or open"""
+    states = {breaker.state for breaker in model_breakers.values()}
+    for state in ("closed", "half_open"):
+        if state in states:
+            return state
+    return "open"
+
+def upstream_available() -> bool:
+    """False while every model's circuit breaker is refusing calls (does not use up a half-open probe)"""
+    return upstream_state() != "open"
+
+def upstream_retry_after() -> float:
+    """Seconds until some open breaker lets a probe through"""
+    return min(breaker.retry_after() for breaker in model_breakers.values())
+
+def breaker_stats():
+    return {model: breaker.stats() for model, breaker in model_breakers.items()}
+
+def get_api_key():
+    return os.getenv('OPENROUTER_API_KEY')
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared OpenRouter client, creating it on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        http2 = OPENROUTER_HTTP2 and _http2_available()
+        _http_client = httpx.AsyncClient(
+            timeout=OPENROUTER_TIMEOUT,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=OPENROUTER_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENROUTER_MAX_KEEPALIVE,
+                keepalive_expiry=OPENROUTER_KEEPALIVE_EXPIRY
+            )
+        )
+        logger.info(f"[OpenRouter] HTTP client created (http2={http2}, max_connections={OPENROUTER_MAX_CONNECTIONS})")
+    return _http_client
+
+async def start_http_client():
+    """Create the shared client and warm a connection (called from the app lifespan)"""
+    client = get_http_client()
+    if not get_api_key():
+        return
+    try:
+        response = await client.get(OPENROUTER_WARMUP_URL, timeout=5)
+        logger.info(f"[OpenRouter] Connection warmed up ({response.http_version}, status {response.status_code})")
+    except httpx.HTTPError as e:
+        logger.warning(f"[OpenRouter] Warm-up request failed: {e}")
+
+async def close_http_client():
+    """Close the shared client (called from the app lifespan)"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        logger.info("[OpenRouter] HTTP client closed")
+
+def _completion_payload(prompt: str, model: str, max_tokens: int, stream: bool) -> dict:
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": "You are a content moderation AI for a social platform."},
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": max_tokens,
+        "stream": stream
+    }
+
+def _headers(api_key: str) -> dict:
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+
+async def _read_full_completion(payload: dict, api_key: str, scanner: JSONValueScanner) -> Optional[str]:
+    response = await get_http_client().post(OPENROUTER_URL, headers=_headers(api_key), json=payload)
+    logger.info(f"[OpenRouter] Response status: {response.status_code}")
+    if response.status_code != 200:
+        logger.error(f"[OpenRouter] API error: {response.status_code} - {response.text}")
+        raise ModerationUnavailable(f"API returned status {response.status_code}")
+
+    result = response.json()
+    if 'choices' not in result or not result['choices']:
+        raise ModerationUnavailable("No choices in API response")
+    content = result['choices'][0]['message']['content'] or ""
+    logger.info(f"[OpenRouter] Raw AI response: {content}")
+    return scanner.feed(content)
+
+async def _read_streamed_completion(payload: dict, api_key: str, scanner: JSONValueScanner) -> Optional[str]:
+    """Read server-sent deltas until the scanner has a complete JSON value, then close the stream"""
+    async with get_http_client().stream("POST", OPENROUTER_URL, headers=_headers(api_key), json=payload) as response:
+        logger.info(f"[OpenRouter] Response status: {response.status_code}")
+        if response.status_code != 200:
+            body = (await response.aread()).decode('utf-8', 'replace')
+            logger.error(f"[OpenRouter] API error: {response.status_code} - {body}")
+            raise ModerationUnavailable(f"API returned status {response.status_code}")
+
+        async for line in response.aiter_lines():
+            # SSE: "data: {...}" events, ": keep-alive" comments, "data: [DONE]" at the end
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            try:
+                event = json.loads(data)
+            except ValueError:
+                continue
+            if 'error' in event:
+                raise ModerationUnavailable(f"Stream error: {event['error']}")
+            choices = event.get('choices') or []
+            delta = (choices[0].get('delta') or {}).get('content') if choices else None
+            if delta and scanner.feed(delta) is not None:
+                # Verdict complete: leaving the block closes the stream and stops generation
+                logger.info(f"[OpenRouter] Verdict complete after {scanner.consumed} characters, closing stream")
+                break
+    return scanner.result
+
+async def _send_completion(prompt: str, model: str, log_text: str, opening: str, max_tokens: int) -> str:
+    api_key = get_api_key()
     if not api_key:
+        raise ModerationUnavailable("No API key configured")
+
+    scanner = JSONValueScanner(opening)
+    payload = _completion_payload(prompt, model, max_tokens, MODERATION_STREAMING)
+    try:
+        logger.info(f"[OpenRouter] Sending moderation request for {log_text}")
+        if MODERATION_STREAMING:
+            snippet = await _read_streamed_completion(payload, api_key, scanner)
+        else:
+            snippet = await _read_full_completion(payload, api_key, scanner)
+    except httpx.HTTPError as e:
+        raise ModerationUnavailable(f"Request failed: {e}")
+
+    if snippet is None:
+        raise ModerationUnavailable("No JSON value in AI response")
+    return snippet
+
+async def _chat_completion(prompt: str, model: str, log_text: str, opening: str = '{',
+                           max_tokens: int = MODERATION_MAX_TOKENS) -> str:
+    """
+    Send one chat completion through the circuit breaker and return the raw
+    text of the first JSON value (``opening`` is ``{`` or ``[``) in the reply.
+    Raises ModerationUnavailable, immediately when the breaker is open.
+    """
+    breaker = breaker_for(model)
+    if not breaker.allow():
+        raise ModerationUnavailable(f"Circuit breaker open for {model}")
+    started = time.monotonic()
+    try:
+        snippet = await _send_completion(prompt, model, log_text, opening, max_tokens)
+    except asyncio.CancelledError:
+        breaker.record_cancelled()
+        raise
+    except Exception as e:
+        breaker.record_failure(time.monotonic() - started, str(e))
+        raise
+    breaker.record_success(time.monotonic() - started)
+    return snippet
+
+def _validate_verdict(item) -> dict:
+    """Check a parsed verdict against the AIResponse schema and tag it as the model's"""
+    if not isinstance(item, dict):
+        raise ModerationUnavailable("Verdict is not an object")
+    try:
+        return {**AIResponse(**item).dict(), "source": "model"}
+    except ValidationError as e:
+        raise ModerationUnavailable(f"Invalid verdict: {e.errors()[0].get('msg')}")
+
+def _load_json(snippet: str):
+    try:
+        return json.loads(snippet)
+    except ValueError as parse_error:
+        logger.error(f"[OpenRouter] Failed to parse AI response: {parse_error}")
+        raise ModerationUnavailable("Unparseable AI response")
+
+async def _request_verdict(post_text: str, model: str):
+    snippet = await _chat_completion(
+        get_moderation_prompt(post_text), model, f"text: {post_text[:50]}..."
+    )
+    return _validate_verdict(_load_json(snippet))
+
+async def request_verdict(post_text: str, model: Optional[str] = None):
+    """
+    Ask the moderation model for a verdict, hedging across the model tiers
+    unless ``model`` pins one. Raises ModerationUnavailable on any failure.
+    """
+    if model:
+        return await _request_verdict(post_text, model)
+    return await model_racer.race(lambda tier: _request_verdict(post_text, tier))
+
+async def _request_batch_verdicts(post_texts: List[str], model: str) -> List[dict]:
+    # Fresh random ids per batch, so a post can't name another post's id ahead of time
+    ids = [f"p{secrets.token_hex(4)}" for _ in post_texts]
+    snippet = await _chat_completion(
+        get_batch_moderation_prompt(post_texts, ids), model, f"batch of {len(post_texts)} posts",
+        opening='[', max_tokens=MODERATION_MAX_TOKENS * len(post_texts)
+    )
+    parsed_result = _load_json(snippet)
+    if not isinstance(parsed_result, list) or len(parsed_result) != len(post_texts):
+        raise ModerationUnavailable("Batch response is not a list with one verdict per post")
+
+    positions = {post_id: position for position, post_id in enumerate(ids)}
+    verdicts: List[Optional[dict]] = [None] * len(post_texts)
+    for item in parsed_result:
+        item_id = item.pop('id', None) if isinstance(item, dict) else None
+        position = positions.get(item_id) if isinstance(item_id, str) else None
+        if position is None or verdicts[position] is not None:
+            raise ModerationUnavailable("Batch item id unknown or duplicated")
+        verdicts[position] = _validate_verdict(item)
+    return verdicts
+
+async def request_batch_verdicts(post_texts: List[str], model: Optional[str] = None) -> List[dict]:
+    """
+    Moderate several posts with one completion (hedged across the model tiers
+    unless ``model`` pins one). Returns verdicts in input order. Raises
+    ModerationUnavailable if the reply can't be mapped back to every post.
+    """
+    if model:
+        return await _request_batch_verdicts(post_texts, model)
+    return await model_racer.race(lambda tier: _request_batch_verdicts(post_texts, tier))
+
+def fallback_verdict(post_text: str):
+    """Verdict to use when the moderation model is unavailable"""
+    if not get_api_key():
         logger.warning("[OpenRouter] No API key found, using fallback moderation")
         return {
             "trust_score": 75,
             "trust_tag": "🟡",
-            "explanation": "AI moderation unavailable - no API key configured"
+            "explanation": "AI moderation unavailable - no API key configured",
+            "source": "fallback"
         }
-    
-    prompt = get_moderation_prompt(post_text)
-    payload = {
-        "model": "mistralai/mistral-7b-instruct:free",  # Free model, widely available
-        "messages": [
-            {"role": "system", "content": "You are a content moderation AI for a social platform."},
-            {"role": "user", "content": prompt}
-        ]
-    }
-    
+    # Fallback: analyze content manually
+    return {**analyze_content_manually(post_text), "source": "fallback"}
+
+async def call_openrouter(post_text: str):
     try:
-        logger.info(f"[OpenRouter] Sending moderation request for text: {post_text[:50]}...")
-        async with httpx.AsyncClient(timeout=15) as client:
-            response = await client.post("https://openrouter.ai/api/v1/chat/completions", headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }, json=payload)
-            
-            logger.info(f"[OpenRouter] Response status: {response.status_code}")
-            
-            if response.status_code != 200:
-                logger.error(f"[OpenRouter] API error: {response.status_code} - {response.text}")
-                raise Exception(f"API returned status {response.status_code}")
-            
-            result = response.json()
-            
-            if 'choices' not in result or not result['choices']:
-                raise Exception("No choices in API response")
-            
-            content = result['choices'][0]['message']['content']
-            logger.info(f"[OpenRouter] Raw AI response: {content}")
-            
-            # Try to parse the JSON response
-            try:
-                parsed_result = ast.literal_eval(content.strip())
-                if isinstance(parsed_result, dict) and 'trust_score' in parsed_result:
-                    return parsed_result
-                else:
-                    raise Exception("Invalid response format")
-            except (ValueError, SyntaxError) as parse_error:
-                logger.error(f"[OpenRouter] Failed to parse AI response: {parse_error}")
-                # Fallback: analyze content manually
-                return analyze_content_manually(post_text)
-                
+        return await request_verdict(post_text)
     except Exception as e:
-        logger.error(f"[OpenRouter] AI moderation failed: {e}")
-        # Fallback: analyze content manually
-        return analyze_content_manually(post_text)
+        if get_api_key():
+            logger.error(f"[OpenRouter] AI moderation failed: {e}")
+        return fallback_verdict(post_text)
 
 def analyze_content_manually(text: str):
     """Fallback content analysis when AI is unavailable"""
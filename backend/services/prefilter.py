@@ -0,0 +1,195 @@
+"""
+Local moderation pre-filter.
+
+Runs before the verdict cache and the model. Weighted lexicons are compiled
+into one regular expression, so a post is scanned once however many terms
+there are. Terms only match on word boundaries ("scam" does not match
+"scampi"). The scan settles clear-cut posts locally:
+
+- ``block``: the weight of harmful *phrases* reaches ``PREFILTER_BLOCK_SCORE``
+  (obvious spam, scams, threats). Single harmful words ("hate", "scam") never
+  block on their own, since "I hate violence" or "that account is a scam" is
+  usually a complaint; they only stop a local allow and send the post to the
+  model.
+- ``allow``: the text is empty, or it is short, has enough benign weight and
+  every word in it is a benign term or a stopword ("thanks everyone, gm!").
+  One unknown word is enough to escalate, since an insult can sit next to
+  any number of pleasantries.
+
+Everything else returns None and goes to the model.
+
+Lexicons are built in; ``PREFILTER_LEXICON_PATH`` may point to a JSON file of
+the form ``{"harmful": {"term": weight}, "benign": {"term": weight}}`` that
+adds to (or reweights) the defaults. A weight of 0 removes a term.
+"""
+
+from typing import Optional, Dict, Any, Tuple
+import json
+import logging
+import os
+import re
+import time
+
+from services.moderation_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+PREFILTER_ENABLED = os.getenv('PREFILTER_ENABLED', 'true').lower() == 'true'
+PREFILTER_LEXICON_PATH = os.getenv('PREFILTER_LEXICON_PATH', '')
+PREFILTER_BLOCK_SCORE = float(os.getenv('PREFILTER_BLOCK_SCORE', '6'))
+PREFILTER_ALLOW_SCORE = float(os.getenv('PREFILTER_ALLOW_SCORE', '2'))
+PREFILTER_ALLOW_MAX_CHARS = int(os.getenv('PREFILTER_ALLOW_MAX_CHARS', '200'))
+PREFILTER_BLOCK_TRUST = int(os.getenv('PREFILTER_BLOCK_TRUST', '20'))
+PREFILTER_ALLOW_TRUST = int(os.getenv('PREFILTER_ALLOW_TRUST', '80'))
+
+HARMFUL = "harmful"
+BENIGN = "benign"
+
+DEFAULT_LEXICONS: Dict[str, Dict[str, float]] = {
+    HARMFUL: {
+        # Crypto/giveaway spam
+        "free crypto": 4, "free sol": 4, "free airdrop": 4, "claim your airdrop": 5, "airdrop claim": 4,
+        "double your sol": 6, "double your crypto": 6, "guaranteed returns": 5, "guaranteed profit": 5,
+        "100x gem": 4, "send sol to": 4, "connect your wallet": 3, "seed phrase": 4, "private key": 3,
+        "wallet drainer": 6, "pump and dump": 4,
+        # Generic spam
+        "click here": 3, "dm me for": 2, "limited time offer": 3, "act now": 2, "buy followers": 5,
+        "work from home": 2, "make money fast": 4, "giveaway": 2, "promo code": 2,
+        # Abuse and threats
+        "kill yourself": 8, "kys": 6, "i will kill you": 8, "die in a fire": 6,
+        # Single words only escalate to the model (see PreFilter.classify)
+        "hate": 2, "violence": 2, "abuse": 2, "scam": 3, "scammer": 3, "fake": 1, "spam": 2,
+    },
+    BENIGN: {
+        "gm": 1, "gn": 1, "hello": 1, "hi everyone": 1, "thanks": 1, "thank you": 1, "congrats": 1,
+        "congratulations": 1, "welcome": 1, "love": 1, "peace": 1, "support": 1, "community": 1,
+        "great": 1, "awesome": 1, "beautiful": 1, "happy": 1, "good morning": 1, "good night": 1,
+        "help": 1, "positive": 1,
+    },
+}
+
+# Function words that may appear around benign terms in a locally allowed post
+STOPWORDS = frozenset("""
+a an the and or but so to for of in on at by with from as is are was were be been am it its this that
+these those i me my we us our you your yall y'all all everyone everybody guys fam folks friends team
+very so much many really just too again today tonight here there now always
+""".split())
+
+_WORD = re.compile(r"\w+(?:'\w+)?")
+
+def load_lexicons(path: str = PREFILTER_LEXICON_PATH) -> Dict[str, Dict[str, float]]:
+    """Defaults merged with the optional JSON lexicon file"""
+    lexicons = {category: dict(terms) for category, terms in DEFAULT_LEXICONS.items()}
+    if path:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                overrides = json.load(f)
+            for category, terms in overrides.items():
+                lexicons.setdefault(category, {}).update({term: float(weight) for term, weight in terms.items()})
+            logger.info(f"✅ Pre-filter lexicon loaded from {path}")
+        except Exception as e:
+            logger.error(f"❌ Failed to load pre-filter lexicon {path}: {e}")
+    return lexicons
+
+class LexiconMatcher:
+    """All lexicon terms compiled into a single alternation with word-boundary guards"""
+
+    def __init__(self, lexicons: Dict[str, Dict[str, float]]):
+        self.terms: Dict[str, Tuple[str, float]] = {}
+        for category, terms in lexicons.items():
+            for term, weight in terms.items():
+                key = normalize_text(term)
+                if key and weight:
+                    self.terms[key] = (category, weight)
+        # Longest first so "free crypto" wins over a shorter overlapping term
+        alternation = "|".join(re.escape(term) for term in sorted(self.terms, key=len, reverse=True))
+        # Lookarounds rather than \b so terms that start or end with punctuation still work
+        self.pattern = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)") if alternation else None
+
+    def scan(self, normalized_text: str) -> Dict[str, Dict[str, float]]:
+        """``{category: {term: total weight}}`` for every match in already-normalized text"""
+        hits: Dict[str, Dict[str, float]] = {}
+        if self.pattern is None:
+            return hits
+        for match in self.pattern.finditer(normalized_text):
+            category, weight = self.terms[match.group(0)]
+            category_hits = hits.setdefault(category, {})
+            category_hits[match.group(0)] = category_hits.get(match.group(0), 0) + weight
+        return hits
+
+    def residue(self, normalized_text: str, category: str) -> str:
+        """``normalized_text`` with every ``category`` term blanked out"""
+        if self.pattern is None:
+            return normalized_text
+        return self.pattern.sub(
+            lambda match: " " if self.terms[match.group(0)][0] == category else match.group(0),
+            normalized_text
+        )
+
+class PreFilter:
+    """Settles clear-cut posts locally; returns None when the model should decide"""
+
+    def __init__(self, matcher: Optional[LexiconMatcher] = None, enabled: bool = PREFILTER_ENABLED):
+        self.matcher = matcher or LexiconMatcher(load_lexicons())
+        self.enabled = enabled
+        self.checked = 0
+        self.blocked = 0
+        self.allowed = 0
+        self.escalated = 0
+        self.scan_seconds = 0.0
+
+    def classify(self, text: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        started = time.perf_counter()
+        normalized = normalize_text(text)
+        hits = self.matcher.scan(normalized)
+        self.scan_seconds += time.perf_counter() - started
+        self.checked += 1
+
+        harmful = hits.get(HARMFUL, {})
+        # Only multi-word phrases count towards blocking; a single word is too ambiguous
+        phrases = {term: weight for term, weight in harmful.items() if " " in term}
+        harmful_score = sum(phrases.values())
+        benign_score = sum(hits.get(BENIGN, {}).values())
+
+        if harmful_score >= PREFILTER_BLOCK_SCORE:
+            self.blocked += 1
+            terms = ", ".join(sorted(phrases, key=phrases.get, reverse=True)[:3])
+            return {
+                "trust_score": PREFILTER_BLOCK_TRUST,
+                "trust_tag": "🔴",
+                "explanation": f"Content matches known spam or abuse patterns ({terms})",
+                "source": "prefilter"
+            }
+        if not harmful and (not normalized or (
+                len(normalized) <= PREFILTER_ALLOW_MAX_CHARS and benign_score >= PREFILTER_ALLOW_SCORE
+                and self._only_benign(normalized))):
+            self.allowed += 1
+            return {
+                "trust_score": PREFILTER_ALLOW_TRUST,
+                "trust_tag": "🟢",
+                "explanation": "Short content appears positive and community-friendly" if normalized
+                               else "No text to moderate",
+                "source": "prefilter"
+            }
+        self.escalated += 1
+        return None
+
+    def _only_benign(self, normalized: str) -> bool:
+        """Every word is covered by a benign term or is a stopword"""
+        leftover = self.matcher.residue(normalized, BENIGN)
+        return all(word in STOPWORDS for word in _WORD.findall(leftover))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "terms": len(self.matcher.terms),
+            "checked": self.checked,
+            "blocked": self.blocked,
+            "allowed": self.allowed,
+            "escalated": self.escalated,
+            "short_circuit_ratio": round((self.blocked + self.allowed) / self.checked, 4) if self.checked else 0.0,
+            "avg_scan_us": round(self.scan_seconds / self.checked * 1e6, 2) if self.checked else 0.0
+        }
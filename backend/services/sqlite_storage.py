@@ -0,0 +1,680 @@
+"""
+SQLite storage backend.
+
+Mirrors the Firestore semantics of ``services/firebase.py`` (soft deletes,
+``(created_at, id)`` ordering and keyset pagination, counter increments and
+update-fails-if-missing) on a local SQLite database. Each collection is a table
+holding the document as JSON next to the columns it is queried by. Use the path
+``:memory:`` for a throwaway in-process store.
+"""
+
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Tuple
+from datetime import datetime
+import json
+import logging
+import sqlite3
+import threading
+import uuid
+
+from services.storage import StorageBackend, NotFoundError, BULK_BATCH_SIZE
+from utils.mappers import map_post_firestore_to_frontend, map_post_firestore_to_backend, FEED_IMAGE_VARIANT
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    username TEXT,
+    is_deleted INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_users_username ON users (username, is_deleted);
+
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    wallet_address TEXT,
+    created_at TEXT,
+    is_deleted INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+DROP INDEX IF EXISTS idx_posts_feed;
+DROP INDEX IF EXISTS idx_posts_user;
+CREATE INDEX IF NOT EXISTS idx_posts_feed_page ON posts (is_deleted, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_posts_user_page ON posts (is_deleted, wallet_address, created_at, id);
+
+CREATE TABLE IF NOT EXISTS comments (
+    id TEXT PRIMARY KEY,
+    post_id TEXT,
+    created_at TEXT,
+    is_deleted INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+DROP INDEX IF EXISTS idx_comments_post;
+CREATE INDEX IF NOT EXISTS idx_comments_post_page ON comments (post_id, is_deleted, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_comments_thread ON comments (json_extract(data, '$.thread_id'), is_deleted, created_at, id);
+
+CREATE TABLE IF NOT EXISTS likes (
+    wallet_address TEXT NOT NULL,
+    post_id TEXT NOT NULL,
+    created_at TEXT,
+    PRIMARY KEY (wallet_address, post_id)
+);
+"""
+
+COUNTER_COLLECTIONS = ('posts', 'comments')
+DOCUMENT_COLLECTIONS = ('users', 'posts', 'comments')
+FILTER_OPS = ('==', '<', '<=', '>', '>=', 'in')
+LIKE_COLUMNS = ('wallet_address', 'post_id')  # The like ledger has no JSON document; filter on its columns
+
+class SQLiteStorage(StorageBackend):
+    """Storage backed by a local SQLite database"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = ':memory:'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        logger.info(f"✅ SQLite storage ready: {path}")
+
+    # Internal helpers
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    def _increment(self, table: str, doc_id: str, field: str, amount: int) -> int:
+        """Atomically add ``amount`` to a numeric field; returns the number of rows touched"""
+        return self._execute(
+            f"UPDATE {table} SET data = json_set(data, '$.{field}', "
+            f"COALESCE(json_extract(data, '$.{field}'), 0) + ?) WHERE id = ?",
+            (amount, doc_id)
+        )
+
+    def _merge(self, table: str, doc_id: str, fields: Dict[str, Any],
+               live_only: bool = False) -> Optional[Dict[str, Any]]:
+        """Merge ``fields`` into an existing (optionally non-deleted) document; returns the merged document"""
+        with self._transaction() as conn:
+            sql = f"SELECT data FROM {table} WHERE id = ?" + (" AND is_deleted = 0" if live_only else "")
+            row = conn.execute(sql, (doc_id,)).fetchone()
+            if not row:
+                return None
+            data = json.loads(row[0])
+            data.update(fields)
+            conn.execute(
+                f"UPDATE {table} SET data = ?, is_deleted = ? WHERE id = ?",
+                (json.dumps(data), int(bool(data.get('is_deleted', False))), doc_id)
+            )
+            return data
+
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed statements under the lock in a single transaction"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    # Connection
+    def test_connection(self) -> bool:
+        try:
+            self._query("SELECT 1")
+            return True
+        except Exception as e:
+            logger.error(f"❌ SQLite connection test failed: {e}")
+            return False
+
+    def is_connected(self) -> bool:
+        return True
+
+    def get_connection_status(self) -> Dict[str, Any]:
+        return {
+            "status": "connected",
+            "timestamp": datetime.utcnow().isoformat(),
+            "backend": self.name,
+            "path": self.path
+        }
+
+    # Users
+    def create_user(self, wallet_address, username, display_name, profile_image=None, bio=None,
+                    website=None, twitter=None, instagram=None, location=None, email=None):
+        try:
+            if profile_image and len(profile_image.encode('utf-8')) > 500000:  # ~500KB limit
+                logger.warning(f"Profile image too large for user {wallet_address}, skipping image")
+                profile_image = None
+
+            default_display_name = f"{wallet_address[:8]}...{wallet_address[-4:]}"
+            profile_completed = display_name != default_display_name and display_name.strip() != ""
+
+            user_data = {
+                'wallet_address': wallet_address,
+                'username': username,
+                'display_name': display_name,
+                'profile_image': profile_image,
+                'bio': bio,
+                'website': website,
+                'twitter': twitter,
+                'instagram': instagram,
+                'location': location,
+                'email': email,
+                'created_at': datetime.utcnow().isoformat(),
+                'updated_at': datetime.utcnow().isoformat(),
+                'is_deleted': False,
+                'profile_completed': profile_completed
+            }
+
+            with self._transaction() as conn:
+                if username != "" and conn.execute(
+                    "SELECT 1 FROM users WHERE username = ? LIMIT 1", (username,)
+                ).fetchone():
+                    logger.warning(f"Username {username} already taken")
+                    return False
+                # set(merge=True): merge into an existing document or create it
+                row = conn.execute("SELECT data FROM users WHERE id = ?", (wallet_address,)).fetchone()
+                if row:
+                    user_data = {**json.loads(row[0]), **user_data}
+                conn.execute(
+                    "INSERT OR REPLACE INTO users (id, username, is_deleted, data) VALUES (?, ?, 0, ?)",
+                    (wallet_address, username, json.dumps(user_data))
+                )
+            logger.info(f"✅ User created/updated successfully: {wallet_address}")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Failed to create user: {e}")
+            return False
+
+    def get_user(self, wallet_address):
+        try:
+            rows = self._query("SELECT data FROM users WHERE id = ? AND is_deleted = 0", (wallet_address,))
+            return json.loads(rows[0][0]) if rows else None
+        except Exception as e:
+            logger.error(f"❌ Failed to get user: {e}")
+            return None
+
+    def update_user_profile(self, wallet_address, display_name, profile_image=None, bio=None,
+                            website=None, twitter=None, instagram=None, location=None, email=None):
+        try:
+            if profile_image and len(profile_image.encode('utf-8')) > 500000:
+                logger.warning(f"Profile image too large for user {wallet_address}, skipping image update")
+                profile_image = None
+
+            default_display_name = f"{wallet_address[:8]}...{wallet_address[-4:]}"
+            profile_completed = display_name != default_display_name and display_name.strip() != ""
+
+            update_data = {
+                'display_name': display_name,
+                'updated_at': datetime.utcnow().isoformat(),
+                'bio': bio,
+                'website': website,
+                'twitter': twitter,
+                'instagram': instagram,
+                'location': location,
+                'email': email,
+                'profile_completed': profile_completed
+            }
+            if profile_image:
+                update_data['profile_image'] = profile_image
+
+            if not self._merge('users', wallet_address, update_data):
+                logger.error(f"❌ Failed to update user profile: no user {wallet_address}")
+                return False
+            logger.info(f"✅ User profile updated: {wallet_address}")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Failed to update user profile: {e}")
+            return False
+
+    def get_user_by_username(self, username):
+        try:
+            rows = self._query(
+                "SELECT data FROM users WHERE username = ? AND is_deleted = 0 LIMIT 1", (username,)
+            )
+            return json.loads(rows[0][0]) if rows else None
+        except Exception as e:
+            logger.error(f"❌ Failed to get user by username: {e}")
+            return None
+
+    def soft_delete_user(self, wallet_address):
+        try:
+            if not self._merge('users', wallet_address, {
+                'is_deleted': True,
+                'updated_at': datetime.utcnow().isoformat()
+            }):
+                logger.error(f"❌ Failed to delete user: no user {wallet_address}")
+                return False
+            logger.info(f"✅ User soft deleted: {wallet_address}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to delete user: {e}")
+            return False
+
+    # Posts
+    def create_post(self, post_data):
+        try:
+            if (not post_data.get('text', '').strip() and
+                not post_data.get('image_url', '').strip()):
+                logger.error("Post must have text, image, or both")
+                return None
+
+            post_data['created_at'] = datetime.utcnow().isoformat()
+            post_data['updated_at'] = datetime.utcnow().isoformat()
+            post_data['is_deleted'] = False
+            post_data['likes'] = 0
+            post_data['comments'] = 0
+            post_data['tags'] = post_data.get('tags', [])
+            post_data['location'] = post_data.get('location')
+
+            self._execute(
+                "INSERT OR REPLACE INTO posts (id, wallet_address, created_at, is_deleted, data) "
+                "VALUES (?, ?, ?, 0, ?)",
+                (post_data['post_id'], post_data.get('wallet_address'),
+                 post_data['created_at'], json.dumps(post_data))
+            )
+            logger.info(f"✅ Post created successfully: {post_data['post_id']}")
+            return dict(post_data)
+
+        except Exception as e:
+            logger.error(f"❌ Failed to create post: {e}")
+            return None
+
+    def update_post(self, post_id, update_data):
+        try:
+            if (not update_data.get('text', '').strip() and
+                not update_data.get('image_url', '').strip()):
+                logger.error("Post must have text, image, or both")
+                return None
+
+            update_data['updated_at'] = datetime.utcnow().isoformat()
+            update_data['action_type'] = 1  # Edit action
+
+            post_data = self._merge('posts', post_id, update_data, live_only=True)
+            if post_data is None:
+                raise NotFoundError(f"no post {post_id}")
+            logger.info(f"✅ Post updated successfully: {post_id}")
+            return post_data
+
+        except NotFoundError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Failed to update post: {e}")
+            return None
+
+    def fetch_posts(self, limit=50, after=None, wallet_address=None, for_backend=False):
+        try:
+            sql = "SELECT data FROM posts WHERE is_deleted = 0"
+            params: list = []
+            if wallet_address:
+                sql += " AND wallet_address = ?"
+                params.append(wallet_address)
+            if after:
+                sql += " AND (created_at, id) < (?, ?)"
+                params.extend(after)
+            sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+            params.append(limit + 1)
+
+            rows = self._query(sql, tuple(params))
+            has_more = len(rows) > limit
+            mapper = map_post_firestore_to_backend if for_backend else map_post_firestore_to_frontend
+            posts = [mapper(json.loads(row[0]), FEED_IMAGE_VARIANT) for row in rows[:limit]]
+
+            logger.info(f"✅ Fetched {len(posts)} posts (has_more: {has_more})")
+            return posts, has_more
+        except Exception as e:
+            logger.error(f"❌ Failed to fetch posts: {e}")
+            return [], False
+
+    def get_post_by_id(self, post_id, for_backend=False):
+        try:
+            rows = self._query("SELECT data FROM posts WHERE id = ? AND is_deleted = 0", (post_id,))
+            if not rows:
+                return None
+            post_data = json.loads(rows[0][0])
+            return map_post_firestore_to_backend(post_data) if for_backend else post_data
+        except Exception as e:
+            logger.error(f"❌ Failed to get post: {e}")
+            return None
+
+    def soft_delete_post(self, post_id):
+        try:
+            if not self._merge('posts', post_id, {
+                'is_deleted': True,
+                'updated_at': datetime.utcnow().isoformat(),
+                'action_type': 2  # Delete action
+            }):
+                raise NotFoundError(f"no post {post_id}")
+            logger.info(f"✅ Post soft deleted: {post_id}")
+            return True
+        except NotFoundError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Failed to delete post: {e}")
+            return False
+
+    def update_post_likes(self, post_id, increment=True):
+        try:
+            if not self._increment('posts', post_id, 'likes', 1 if increment else -1):
+                logger.error(f"❌ Failed to update post likes: no post {post_id}")
+                return False
+            logger.info(f"✅ Post likes updated: {post_id} ({'increment' if increment else 'decrement'})")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to update post likes: {e}")
+            return False
+
+    # Like ledger
+    def set_post_like(self, wallet_address, post_id, liked):
+        try:
+            if liked:
+                changed = self._execute(
+                    "INSERT OR IGNORE INTO likes (wallet_address, post_id, created_at) VALUES (?, ?, ?)",
+                    (wallet_address, post_id, datetime.utcnow().isoformat())
+                )
+            else:
+                changed = self._execute(
+                    "DELETE FROM likes WHERE wallet_address = ? AND post_id = ?", (wallet_address, post_id)
+                )
+            return bool(changed)
+        except Exception as e:
+            logger.error(f"❌ Failed to update like ledger: {e}")
+            return None
+
+    def get_liked_post_ids(self, wallet_address, post_ids):
+        if not post_ids:
+            return set()
+        try:
+            placeholders = ", ".join("?" for _ in post_ids)
+            rows = self._query(
+                f"SELECT post_id FROM likes WHERE wallet_address = ? AND post_id IN ({placeholders})",
+                (wallet_address, *post_ids)
+            )
+            return {row[0] for row in rows}
+        except Exception as e:
+            logger.error(f"❌ Failed to read like ledger: {e}")
+            return None
+
+    # Comments
+    def create_comment(self, comment_data):
+        try:
+            if 'comment_id' not in comment_data:
+                comment_data['comment_id'] = str(uuid.uuid4())
+
+            comment_data['created_at'] = datetime.utcnow().isoformat()
+            comment_data['updated_at'] = datetime.utcnow().isoformat()
+            comment_data['is_deleted'] = False
+            comment_data['likes'] = 0
+
+            with self._transaction() as conn:
+                parent_id = comment_data.get('parent_comment_id')
+                if parent_id:
+                    row = conn.execute(
+                        "SELECT json_extract(data, '$.thread_id') FROM comments "
+                        "WHERE id = ? AND post_id = ? AND is_deleted = 0",
+                        (parent_id, comment_data['post_id'])
+                    ).fetchone()
+                    if not row:
+                        raise NotFoundError(f"no comment {parent_id} on post {comment_data['post_id']}")
+                    comment_data['thread_id'] = row[0] or parent_id
+                    self._bump_reply_count(conn, comment_data['thread_id'], 1)
+                else:
+                    comment_data['thread_id'] = None
+                    comment_data['reply_count'] = 0
+                touched = conn.execute(
+                    "UPDATE posts SET data = json_set(data, '$.comments', "
+                    "COALESCE(json_extract(data, '$.comments'), 0) + 1) WHERE id = ?",
+                    (comment_data['post_id'],)
+                ).rowcount
+                if not touched:
+                    raise NotFoundError(f"no post {comment_data['post_id']}")
+                conn.execute(
+                    "INSERT OR REPLACE INTO comments (id, post_id, created_at, is_deleted, data) "
+                    "VALUES (?, ?, ?, 0, ?)",
+                    (comment_data['comment_id'], comment_data['post_id'],
+                     comment_data['created_at'], json.dumps(comment_data))
+                )
+
+            logger.info(f"✅ Comment created successfully: {comment_data['comment_id']}")
+            return dict(comment_data)
+
+        except NotFoundError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Failed to create comment: {e}")
+            return None
+
+    def _bump_reply_count(self, conn, thread_id, amount):
+        conn.execute(
+            "UPDATE comments SET data = json_set(data, '$.reply_count', "
+            "MAX(0, COALESCE(json_extract(data, '$.reply_count'), 0) + ?)) WHERE id = ?",
+            (amount, thread_id)
+        )
+
+    def _comment_page(self, where, params, limit, after):
+        if after:
+            where += " AND (created_at, id) > (?, ?)"
+            params += tuple(after)
+        rows = self._query(
+            f"SELECT data FROM comments WHERE {where} AND is_deleted = 0 ORDER BY created_at, id LIMIT ?",
+            (*params, limit)
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def get_post_comments(self, post_id, limit=50, after=None):
+        try:
+            comments = self._comment_page(
+                "post_id = ? AND json_extract(data, '$.parent_comment_id') IS NULL", (post_id,), limit, after
+            )
+            logger.info(f"✅ Fetched {len(comments)} comments for post: {post_id}")
+            return comments
+        except Exception as e:
+            logger.error(f"❌ Failed to fetch comments: {e}")
+            return []
+
+    def get_comment_replies(self, thread_id, limit=50, after=None):
+        try:
+            replies = self._comment_page("json_extract(data, '$.thread_id') = ?", (thread_id,), limit, after)
+            logger.info(f"✅ Fetched {len(replies)} replies for comment: {thread_id}")
+            return replies
+        except Exception as e:
+            logger.error(f"❌ Failed to fetch replies: {e}")
+            return []
+
+    def get_reply_previews(self, thread_ids, limit):
+        if not thread_ids:
+            return {}
+        try:
+            # One query: number each thread's replies and keep the first ``limit``
+            rows = self._query(
+                "SELECT thread_id, data FROM ("
+                "  SELECT json_extract(data, '$.thread_id') AS thread_id, data, created_at, id,"
+                "         ROW_NUMBER() OVER (PARTITION BY json_extract(data, '$.thread_id') ORDER BY created_at, id) AS n"
+                "  FROM comments"
+                f"  WHERE json_extract(data, '$.thread_id') IN ({', '.join('?' * len(thread_ids))}) AND is_deleted = 0"
+                ") WHERE n <= ? ORDER BY created_at, id",
+                (*thread_ids, limit)
+            )
+            previews = {thread_id: [] for thread_id in thread_ids}
+            for thread_id, data in rows:
+                previews[thread_id].append(json.loads(data))
+            return previews
+        except Exception as e:
+            logger.error(f"❌ Failed to fetch reply previews: {e}")
+            return {}
+
+    def update_comment_likes(self, comment_id, increment=True):
+        try:
+            if not self._increment('comments', comment_id, 'likes', 1 if increment else -1):
+                logger.error(f"❌ Failed to update comment likes: no comment {comment_id}")
+                return False
+            logger.info(f"✅ Comment likes updated: {comment_id}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to update comment likes: {e}")
+            return False
+
+    def delete_comment(self, comment_id):
+        try:
+            now = datetime.utcnow().isoformat()
+            with self._transaction() as conn:
+                row = conn.execute(
+                    "SELECT post_id, json_extract(data, '$.thread_id') FROM comments "
+                    "WHERE id = ? AND is_deleted = 0", (comment_id,)
+                ).fetchone()
+                if row:
+                    if row[1]:
+                        self._bump_reply_count(conn, row[1], -1)
+                    conn.execute(
+                        "UPDATE comments SET is_deleted = 1, data = json_set(data, "
+                        "'$.is_deleted', json('true'), '$.updated_at', ?) WHERE id = ?",
+                        (now, comment_id)
+                    )
+                    if row[0]:
+                        conn.execute(
+                            "UPDATE posts SET data = json_set(data, '$.comments', "
+                            "COALESCE(json_extract(data, '$.comments'), 0) - 1) WHERE id = ?",
+                            (row[0],)
+                        )
+
+            logger.info(f"✅ Comment deleted: {comment_id}")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Failed to delete comment: {e}")
+            return False
+
+    def apply_counter_increments(self, increments):
+        try:
+            with self._transaction() as conn:
+                for (collection, doc_id), fields in increments.items():
+                    fields = {field: amount for field, amount in fields.items() if amount}
+                    if not fields:
+                        continue
+                    if collection not in COUNTER_COLLECTIONS:
+                        raise ValueError(f"no counters on {collection}")
+                    assignments = ", ".join(
+                        f"'$.{field}', COALESCE(json_extract(data, '$.{field}'), 0) + ?" for field in fields
+                    )
+                    touched = conn.execute(
+                        f"UPDATE {collection} SET data = json_set(data, {assignments}) WHERE id = ?",
+                        (*fields.values(), doc_id)
+                    ).rowcount
+                    if not touched:
+                        logger.warning(f"⚠️ Skipping counter increments for missing {collection}/{doc_id}")
+            logger.info(f"✅ Applied counter increments to {len(increments)} documents")
+            return set()
+        except Exception as e:
+            # One transaction: nothing was written
+            logger.error(f"❌ Failed to apply counter increments: {e}")
+            return set(increments)
+
+    # Maintenance
+    def _filter_sql(self, collection: str, filters) -> Tuple[str, tuple]:
+        if collection not in DOCUMENT_COLLECTIONS + ('likes',):
+            raise ValueError(f"unknown collection {collection}")
+        clauses, params = [], []
+        for field, op, value in filters or []:
+            if (op not in FILTER_OPS or not field.replace('_', '').isalnum()
+                    or (collection == 'likes' and field not in LIKE_COLUMNS)):
+                raise ValueError(f"unsupported filter on {collection}: {field} {op}")
+            column = field if collection == 'likes' else f"json_extract(data, '$.{field}')"
+            if op == 'in':
+                values = list(value)
+                clauses.append(f"{column} IN ({', '.join('?' for _ in values)})" if values else "0")
+                params.extend(values)
+            else:
+                clauses.append(f"{column} {'=' if op == '==' else op} ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", tuple(params)
+
+    def bulk_delete(self, collection, filters=None, progress=None):
+        where, params = self._filter_sql(collection, filters)
+        totals = {'written': 0, 'failed': 0}
+        # One short transaction per batch so other writers aren't locked out for the whole job
+        while True:
+            deleted = self._execute(
+                f"DELETE FROM {collection} WHERE rowid IN (SELECT rowid FROM {collection}{where} LIMIT ?)",
+                (*params, BULK_BATCH_SIZE)
+            )
+            if not deleted:
+                break
+            totals['written'] += deleted
+            if progress:
+                progress(deleted, 0)
+        logger.info(f"✅ Bulk deleted {totals['written']} documents from {collection}")
+        return totals
+
+    def bulk_update(self, collection, transform, filters=None, progress=None):
+        if collection not in DOCUMENT_COLLECTIONS:
+            raise ValueError(f"no documents in {collection}")
+        where, params = self._filter_sql(collection, filters)
+        where = f"{where} AND id > ?" if where else " WHERE id > ?"
+        totals = {'written': 0, 'failed': 0}
+        last_id = ''
+        while True:
+            with self._transaction() as conn:
+                rows = conn.execute(
+                    f"SELECT id, data FROM {collection}{where} ORDER BY id LIMIT ?",
+                    (*params, last_id, BULK_BATCH_SIZE)
+                ).fetchall()
+                written = 0
+                for doc_id, raw in rows:
+                    data = json.loads(raw)
+                    update = transform(data)
+                    if not update:
+                        continue
+                    data.update(update)
+                    conn.execute(
+                        f"UPDATE {collection} SET data = ?, is_deleted = ? WHERE id = ?",
+                        (json.dumps(data), int(bool(data.get('is_deleted', False))), doc_id)
+                    )
+                    written += 1
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            totals['written'] += written
+            if progress:
+                progress(written, 0)
+        logger.info(f"✅ Bulk updated {totals['written']} documents in {collection}")
+        return totals
+
+    def scan_documents(self, collection, filters=None, fields=None):
+        if collection not in DOCUMENT_COLLECTIONS:
+            raise ValueError(f"no documents in {collection}")
+        where, params = self._filter_sql(collection, filters)
+        where = f"{where} AND id > ?" if where else " WHERE id > ?"
+        last_id = ''
+        while True:
+            # Plain reads: no write transaction, so writers aren't held up by the scan
+            rows = self._query(
+                f"SELECT id, data FROM {collection}{where} ORDER BY id LIMIT ?",
+                (*params, last_id, BULK_BATCH_SIZE)
+            )
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            for _, raw in rows:
+                data = json.loads(raw)
+                yield {field: data.get(field) for field in fields} if fields is not None else data
+
+    def clear_all_collections(self):
+        try:
+            for collection in ('posts', 'comments', 'likes', 'users'):
+                self.bulk_delete(collection)
+            logger.info("✅ All collections cleared successfully")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to clear collections: {e}")
+            return False
@@ -0,0 +1,304 @@
+"""
+Pluggable storage backends.
+
+``StorageBackend`` is the contract the data layer (``services/datastore.py``)
+programs against. ``FirestoreStorage`` wraps the existing ``services/firebase.py``
+functions; ``services/sqlite_storage.py`` provides an in-process SQLite engine
+with the same semantics for local runs, load tests and single-node deployments.
+
+Select one with ``STORAGE_BACKEND`` (``firestore``, ``sqlite`` or ``memory``).
+"""
+
+from abc import ABC, abstractmethod
+from typing import Optional, List, Dict, Any, Set, Tuple, Callable, Iterator
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'firestore').lower()
+SQLITE_DB_PATH = os.getenv('SQLITE_DB_PATH', 'vortex.db')
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', '500'))  # Writes per bulk commit (Firestore caps it at 500)
+
+# Bulk mutation filters: (field, op, value) with op one of ==, <, <=, >, >= or in (a list of at most 30 values)
+Filters = List[Tuple[str, str, Any]]
+ProgressCallback = Callable[[int, int], None]  # (written, failed) after each committed batch
+
+class NotFoundError(LookupError):
+    """A write's precondition failed: the document it targets does not exist (or is deleted)"""
+
+class StorageBackend(ABC):
+    """Users, posts, comments and their counters"""
+
+    name = "base"
+
+    # Connection
+    @abstractmethod
+    def test_connection(self) -> bool:
+        """Actively check that the backend is reachable"""
+
+    @abstractmethod
+    def is_connected(self) -> bool:
+        """Last known connectivity, without doing any I/O"""
+
+    @abstractmethod
+    def get_connection_status(self) -> Dict[str, Any]:
+        """Detailed connection status"""
+
+    # Users
+    @abstractmethod
+    def create_user(self, wallet_address: str, username: str, display_name: str,
+                    profile_image: Optional[str] = None, bio: Optional[str] = None,
+                    website: Optional[str] = None, twitter: Optional[str] = None,
+                    instagram: Optional[str] = None, location: Optional[str] = None,
+                    email: Optional[str] = None) -> bool:
+        """Create or merge a user; fails if the username is taken"""
+
+    @abstractmethod
+    def get_user(self, wallet_address: str) -> Optional[Dict[str, Any]]:
+        """Get a non-deleted user by wallet address"""
+
+    @abstractmethod
+    def update_user_profile(self, wallet_address: str, display_name: str,
+                            profile_image: Optional[str] = None, bio: Optional[str] = None,
+                            website: Optional[str] = None, twitter: Optional[str] = None,
+                            instagram: Optional[str] = None, location: Optional[str] = None,
+                            email: Optional[str] = None) -> bool:
+        """Update an existing user's profile; fails if the user does not exist"""
+
+    def check_user_exists(self, wallet_address: str) -> bool:
+        """Check if user exists and profile is completed"""
+        try:
+            user = self.get_user(wallet_address)
+            return user is not None and user.get('profile_completed', False)
+        except Exception as e:
+            logger.error(f"❌ Failed to check user existence: {e}")
+            return False
+
+    @abstractmethod
+    def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
+        """Get a non-deleted user by username"""
+
+    @abstractmethod
+    def soft_delete_user(self, wallet_address: str) -> bool:
+        """Mark a user as deleted"""
+
+    # Posts
+    @abstractmethod
+    def create_post(self, post_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create a post, filling in timestamps, flags and counters; returns the stored post or None"""
+
+    @abstractmethod
+    def update_post(self, post_id: str, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a live post and return its committed state; raises NotFoundError if there is none"""
+
+    @abstractmethod
+    def fetch_posts(self, limit: int = 50, after: Optional[Tuple[str, str]] = None,
+                    wallet_address: Optional[str] = None,
+                    for_backend: bool = False) -> Tuple[List[Dict[str, Any]], bool]:
+        """Non-deleted posts by (created_at, post_id) descending, after the ``after`` key, with a has_more flag"""
+
+    def get_user_posts(self, wallet_address: str, limit: int = 20,
+                       for_backend: bool = False) -> List[Dict[str, Any]]:
+        posts, _ = self.fetch_posts(limit=limit, wallet_address=wallet_address, for_backend=for_backend)
+        return posts
+
+    @abstractmethod
+    def get_post_by_id(self, post_id: str, for_backend: bool = False) -> Optional[Dict[str, Any]]:
+        """Get a non-deleted post by ID"""
+
+    @abstractmethod
+    def soft_delete_post(self, post_id: str) -> bool:
+        """Mark a post as deleted; raises NotFoundError if it does not exist"""
+
+    @abstractmethod
+    def update_post_likes(self, post_id: str, increment: bool = True) -> bool:
+        """Increment or decrement a post's like counter (counter bumps leave ``updated_at`` alone)"""
+
+    # Like ledger
+    @abstractmethod
+    def set_post_like(self, wallet_address: str, post_id: str, liked: bool) -> Optional[bool]:
+        """Record or remove a user's like; True if it changed, False if it already was ``liked``, None on failure"""
+
+    @abstractmethod
+    def get_liked_post_ids(self, wallet_address: str, post_ids: List[str]) -> Optional[Set[str]]:
+        """The subset of ``post_ids`` the user has liked, in one lookup; None if the lookup failed"""
+
+    # Comments
+    @abstractmethod
+    def create_comment(self, comment_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create a comment and bump the post's comment counter (and the thread's ``reply_count`` for a reply);
+        raises NotFoundError if the post or the parent comment does not exist"""
+
+    @abstractmethod
+    def get_post_comments(self, post_id: str, limit: int = 50,
+                          after: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+        """Non-deleted top-level comments of a post by (created_at, comment_id), after the ``after`` key"""
+
+    @abstractmethod
+    def get_comment_replies(self, thread_id: str, limit: int = 50,
+                            after: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+        """Non-deleted replies in a thread by (created_at, comment_id), after the ``after`` key"""
+
+    @abstractmethod
+    def get_reply_previews(self, thread_ids: List[str], limit: int) -> Dict[str, List[Dict[str, Any]]]:
+        """The first ``limit`` non-deleted replies of each thread, keyed by thread ID"""
+
+    @abstractmethod
+    def update_comment_likes(self, comment_id: str, increment: bool = True) -> bool:
+        """Increment or decrement a comment's like counter"""
+
+    @abstractmethod
+    def delete_comment(self, comment_id: str) -> bool:
+        """Soft delete a comment and decrement the post's comment counter (and the thread's ``reply_count``)"""
+
+    @abstractmethod
+    def apply_counter_increments(self, increments: Dict[Tuple[str, str], Dict[str, int]]) -> Set[Tuple[str, str]]:
+        """Apply {(collection, doc_id): {field: amount}} in batches, skipping missing documents;
+        returns the keys that were not written"""
+
+    # Maintenance
+    @abstractmethod
+    def bulk_delete(self, collection: str, filters: Optional[Filters] = None,
+                    progress: Optional[ProgressCallback] = None) -> Dict[str, int]:
+        """Delete every matching document in batches; returns {"written", "failed"}, raises if the job can't run"""
+
+    @abstractmethod
+    def bulk_update(self, collection: str, transform: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+                    filters: Optional[Filters] = None,
+                    progress: Optional[ProgressCallback] = None) -> Dict[str, int]:
+        """Merge ``transform(document)`` into every matching document (None skips it), in batches"""
+
+    @abstractmethod
+    def scan_documents(self, collection: str, filters: Optional[Filters] = None,
+                       fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Read-only iteration over every matching document (including soft-deleted ones), a page at a time;
+        ``fields`` limits what is read. Raises if the scan can't run."""
+
+    @abstractmethod
+    def clear_all_collections(self) -> bool:
+        """Remove every user, post, comment and like (for testing)"""
+
+class FirestoreStorage(StorageBackend):
+    """Storage backed by Firebase Firestore (``services/firebase.py``)"""
+
+    name = "firestore"
+
+    def __init__(self):
+        # Imported here so the other backends run without firebase_admin installed
+        from services import firebase
+        self._fb = firebase
+
+    def test_connection(self) -> bool:
+        return self._fb.test_firestore_connection()
+
+    def is_connected(self) -> bool:
+        return self._fb.is_firestore_connected()
+
+    def get_connection_status(self) -> Dict[str, Any]:
+        return self._fb.get_connection_status()
+
+    def create_user(self, wallet_address, username, display_name, profile_image=None, bio=None,
+                    website=None, twitter=None, instagram=None, location=None, email=None):
+        return self._fb.create_user(
+            wallet_address, username, display_name, profile_image=profile_image, bio=bio,
+            website=website, twitter=twitter, instagram=instagram, location=location, email=email
+        )
+
+    def get_user(self, wallet_address):
+        return self._fb.get_user(wallet_address)
+
+    def update_user_profile(self, wallet_address, display_name, profile_image=None, bio=None,
+                            website=None, twitter=None, instagram=None, location=None, email=None):
+        return self._fb.update_user_profile(
+            wallet_address, display_name, profile_image=profile_image, bio=bio,
+            website=website, twitter=twitter, instagram=instagram, location=location, email=email
+        )
+
+    def get_user_by_username(self, username):
+        return self._fb.get_user_by_username(username)
+
+    def soft_delete_user(self, wallet_address):
+        return self._fb.soft_delete_user(wallet_address)
+
+    def create_post(self, post_data):
+        return self._fb.create_post(post_data)
+
+    def update_post(self, post_id, update_data):
+        return self._fb.update_post(post_id, update_data)
+
+    def fetch_posts(self, limit=50, after=None, wallet_address=None, for_backend=False):
+        return self._fb.fetch_posts(limit=limit, after=after,
+                                    wallet_address=wallet_address, for_backend=for_backend)
+
+    def get_post_by_id(self, post_id, for_backend=False):
+        return self._fb.get_post_by_id(post_id, for_backend=for_backend)
+
+    def soft_delete_post(self, post_id):
+        return self._fb.soft_delete_post(post_id)
+
+    def update_post_likes(self, post_id, increment=True):
+        return self._fb.update_post_likes(post_id, increment=increment)
+
+    def set_post_like(self, wallet_address, post_id, liked):
+        return self._fb.set_post_like(wallet_address, post_id, liked)
+
+    def get_liked_post_ids(self, wallet_address, post_ids):
+        return self._fb.get_liked_post_ids(wallet_address, post_ids)
+
+    def create_comment(self, comment_data):
+        return self._fb.create_comment(comment_data)
+
+    def get_post_comments(self, post_id, limit=50, after=None):
+        return self._fb.get_post_comments(post_id, limit=limit, after=after)
+
+    def get_comment_replies(self, thread_id, limit=50, after=None):
+        return self._fb.get_comment_replies(thread_id, limit=limit, after=after)
+
+    def get_reply_previews(self, thread_ids, limit):
+        return self._fb.get_reply_previews(thread_ids, limit)
+
+    def update_comment_likes(self, comment_id, increment=True):
+        return self._fb.update_comment_likes(comment_id, increment=increment)
+
+    def delete_comment(self, comment_id):
+        return self._fb.delete_comment(comment_id)
+
+    def apply_counter_increments(self, increments):
+        return self._fb.apply_counter_increments(increments)
+
+    def bulk_delete(self, collection, filters=None, progress=None):
+        return self._fb.bulk_delete(collection, filters=filters, progress=progress)
+
+    def bulk_update(self, collection, transform, filters=None, progress=None):
+        return self._fb.bulk_update(collection, transform, filters=filters, progress=progress)
+
+    def scan_documents(self, collection, filters=None, fields=None):
+        return self._fb.scan_documents(collection, filters=filters, fields=fields)
+
+    def clear_all_collections(self):
+        return self._fb.clear_all_collections()
+
+_storage: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+
+def create_storage(backend: str = STORAGE_BACKEND) -> StorageBackend:
+    """Build a storage backend by name"""
+    if backend == 'firestore':
+        return FirestoreStorage()
+    if backend in ('sqlite', 'memory'):
+        from services.sqlite_storage import SQLiteStorage
+        return SQLiteStorage(':memory:' if backend == 'memory' else SQLITE_DB_PATH)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+def get_storage() -> StorageBackend:
+    """Get the process-wide storage backend selected by STORAGE_BACKEND"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+                logger.info(f"✅ Using {_storage.name} storage backend")
+    return _storage
@@ -0,0 +1,54 @@
+import asyncio
+
+from services import bulk_jobs, firebase
+from services.sqlite_storage import SQLiteStorage
+
+WALLET = "B" * 44
+
+def run_purge(storage, monkeypatch):
+    monkeypatch.setattr(bulk_jobs, "get_storage", lambda: storage)
+
+    async def scenario():
+        job = bulk_jobs.start_tombstone_purge(0)
+        while job.status in (bulk_jobs.QUEUED, bulk_jobs.RUNNING):
+            await asyncio.sleep(0.01)
+        return job
+
+    return asyncio.run(scenario())
+
+def test_purge_cascades_to_comments_and_likes_of_purged_posts(monkeypatch):
+    storage = SQLiteStorage(':memory:')
+    for post_id in ("gone", "kept"):
+        storage.create_post({"post_id": post_id, "wallet_address": WALLET, "text": post_id})
+        storage.create_comment({"post_id": post_id, "comment_id": f"{post_id}-c", "wallet_address": WALLET,
+                                "text": "comment"})
+        storage.set_post_like(WALLET, post_id, True)
+    storage.soft_delete_post("gone")
+
+    job = run_purge(storage, monkeypatch)
+    assert job.status == bulk_jobs.COMPLETED, job.error
+    assert list(storage.scan_documents('posts', fields=['post_id'])) == [{"post_id": "kept"}]
+    assert list(storage.scan_documents('comments', fields=['comment_id'])) == [{"comment_id": "kept-c"}]
+    assert storage.get_liked_post_ids(WALLET, ["gone", "kept"]) == {"kept"}
+
+def test_purge_keeps_posts_whose_children_could_not_be_deleted(monkeypatch):
+    storage = SQLiteStorage(':memory:')
+    storage.create_post({"post_id": "gone", "wallet_address": WALLET, "text": "gone"})
+    storage.soft_delete_post("gone")
+    real_delete = storage.bulk_delete
+
+    def flaky_delete(collection, filters=None, progress=None):
+        if collection == 'likes':
+            return {'written': 0, 'failed': 1}
+        return real_delete(collection, filters=filters, progress=progress)
+
+    monkeypatch.setattr(storage, "bulk_delete", flaky_delete)
+    job = run_purge(storage, monkeypatch)
+    assert job.status == bulk_jobs.FAILED
+    assert [post["post_id"] for post in storage.scan_documents('posts', fields=['post_id'])] == ["gone"]
+
+def test_clear_all_reports_failed_deletes(monkeypatch):
+    monkeypatch.setattr(firebase, "bulk_delete", lambda collection: {'written': 3, 'failed': 1 if collection == 'likes' else 0})
+    assert firebase.clear_all_collections() is False
+    monkeypatch.setattr(firebase, "bulk_delete", lambda collection: {'written': 3, 'failed': 0})
+    assert firebase.clear_all_collections() is True
@@ -0,0 +1,54 @@
+import time
+
+from utils.cache import TTLCache
+
+def test_get_set_and_lru_eviction():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_entries_expire():
+    cache = TTLCache(max_size=4, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_invalidation_drops_fill_of_same_key():
+    cache = TTLCache()
+    token = cache.token("a")
+    cache.invalidate("a")
+    cache.set("a", "stale", token=token)
+    assert cache.get("a") is None
+
+def test_invalidation_keeps_fills_of_other_keys():
+    cache = TTLCache()
+    token = cache.token("a")
+    cache.invalidate("b")
+    cache.set("a", "fresh", token=token)
+    assert cache.get("a") == "fresh"
+
+def test_clear_drops_every_in_flight_fill():
+    cache = TTLCache()
+    token = cache.token("a")
+    cache.clear()
+    cache.set("a", "stale", token=token)
+    assert cache.get("a") is None
+
+def test_forgotten_versions_void_outstanding_tokens():
+    cache = TTLCache(max_size=1)
+    token = cache.token("a")
+    cache.invalidate("a")
+    cache.invalidate(*range(cache._max_versions + 1))
+    cache.set("a", "stale", token=token)
+    assert cache.get("a") is None
+
+def test_zero_size_cache_stores_nothing():
+    cache = TTLCache(max_size=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
@@ -0,0 +1,32 @@
+from utils.chunking import chunk_text, estimate_tokens, split_sentences
+
+def sentences(count, start=0):
+    return [f"Sentence number {i} talks about topic {i * 7 % 13} at some length." for i in range(start, start + count)]
+
+def test_chunks_cover_every_sentence_within_the_size_limit():
+    parts = sentences(200)
+    chunks = chunk_text(" ".join(parts), max_tokens=100, min_tokens=40, overlap=0)
+    assert len(chunks) > 1
+    assert " ".join(chunks) == " ".join(parts)
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+
+def test_each_chunk_repeats_the_end_of_the_previous_one():
+    chunks = chunk_text(" ".join(sentences(100)), max_tokens=100, min_tokens=40, overlap=1)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        last_sentence = split_sentences(previous, 100)[-1]
+        assert chunk.startswith(last_sentence)
+
+def test_an_edit_only_changes_nearby_chunks():
+    parts = sentences(300)
+    original = chunk_text(" ".join(parts), max_tokens=100, min_tokens=40)
+    edited_parts = list(parts)
+    edited_parts[150] = "An entirely different sentence was written here instead."
+    edited = chunk_text(" ".join(edited_parts), max_tokens=100, min_tokens=40)
+    unchanged = set(original) & set(edited)
+    assert len(unchanged) >= len(original) - 4
+
+def test_overlong_sentences_are_cut_on_word_boundaries():
+    pieces = split_sentences(" ".join(["word"] * 400), max_tokens=50)
+    assert len(pieces) > 1
+    assert all(estimate_tokens(piece) <= 50 for piece in pieces)
+    assert " ".join(pieces).split() == ["word"] * 400
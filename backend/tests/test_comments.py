@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from services import datastore
+from services.storage import get_storage, NotFoundError
+from utils.cursors import InvalidCursorError
+
+WALLET = "C" * 44
+
+def comment(post_id, comment_id, parent=None):
+    # IDs sort in creation order, so pages are stable even when timestamps tie
+    data = {"post_id": post_id, "comment_id": comment_id, "wallet_address": WALLET, "text": comment_id}
+    if parent:
+        data["parent_comment_id"] = parent
+    return get_storage().create_comment(data)
+
+def test_threads_page_with_nested_reply_previews():
+    get_storage().create_post({"post_id": "thread-post", "wallet_address": WALLET, "text": "post"})
+    for comment_id in ("t1", "t2", "t3"):
+        comment("thread-post", comment_id)
+    comment("thread-post", "t1-r1", parent="t1")
+    comment("thread-post", "t1-r2", parent="t1-r1")
+    comment("thread-post", "t1-r3", parent="t1")
+
+    async def scenario():
+        first, cursor = await datastore.get_post_comments("thread-post", limit=2, previews=2)
+        second, last_cursor = await datastore.get_post_comments("thread-post", limit=2, cursor=cursor)
+        replies, replies_cursor = await datastore.get_comment_replies("t1", cursor=first[0]["replies_cursor"])
+        return first, second, last_cursor, replies, replies_cursor
+
+    first, second, last_cursor, replies, replies_cursor = asyncio.run(scenario())
+    assert [thread["comment_id"] for thread in first] == ["t1", "t2"]
+    assert [thread["comment_id"] for thread in second] == ["t3"]
+    assert last_cursor is None
+
+    t1 = first[0]
+    assert t1["reply_count"] == 3
+    # The reply to a reply is nested under its parent in the preview
+    assert [reply["comment_id"] for reply in t1["replies"]] == ["t1-r1"]
+    assert [reply["comment_id"] for reply in t1["replies"][0]["replies"]] == ["t1-r2"]
+    assert all(reply["thread_id"] == "t1" for reply in [t1["replies"][0], *t1["replies"][0]["replies"]])
+    # The rest of the thread comes from the replies cursor
+    assert [reply["comment_id"] for reply in replies] == ["t1-r3"]
+    assert replies_cursor is None
+
+def test_cursors_are_bound_to_their_list():
+    get_storage().create_post({"post_id": "scope-post", "wallet_address": WALLET, "text": "post"})
+    for comment_id in ("s1", "s2"):
+        comment("scope-post", comment_id)
+
+    async def scenario():
+        _, cursor = await datastore.get_post_comments("scope-post", limit=1)
+        with pytest.raises(InvalidCursorError):
+            await datastore.get_post_comments("thread-post", limit=1, cursor=cursor)
+        with pytest.raises(InvalidCursorError):
+            await datastore.get_comment_replies("s1", cursor=cursor)
+
+    asyncio.run(scenario())
+
+def test_replies_need_a_live_parent_on_the_same_post():
+    for post_id in ("orphan-post", "other-post"):
+        get_storage().create_post({"post_id": post_id, "wallet_address": WALLET, "text": "post"})
+    comment("other-post", "x1")
+    with pytest.raises(NotFoundError):
+        comment("orphan-post", "o1", parent="x1")
+    with pytest.raises(NotFoundError):
+        comment("orphan-post", "o2", parent="missing")
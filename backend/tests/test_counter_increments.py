@@ -0,0 +1,97 @@
+from google.api_core.exceptions import NotFound, ServiceUnavailable
+
+from services import firebase
+
+class FakeRef:
+    def __init__(self, db, path):
+        self.db = db
+        self.path = path
+
+    def collection(self, name):
+        return FakeCollection(self.db, f"{self.path}/{name}")
+
+    def update(self, data):
+        self.db.commit([(self, data)])
+
+class FakeCollection:
+    def __init__(self, db, path):
+        self.db = db
+        self.path = path
+
+    def document(self, doc_id):
+        return FakeRef(self.db, f"{self.path}/{doc_id}")
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.ops = []
+
+    def update(self, ref, data):
+        self.ops.append((ref, data))
+
+    def set(self, ref, data, merge=False):
+        self.ops.append((ref, data))
+
+    def commit(self):
+        self.db.commit(self.ops)
+
+class FakeDB:
+    """Counts committed updates; documents in ``missing`` raise NotFound, commits touching ``broken`` fail"""
+
+    def __init__(self, missing=(), broken=()):
+        self.missing = set(missing)
+        self.broken = set(broken)
+        self.applied = {}
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def commit(self, ops):
+        paths = [ref.path for ref, _ in ops]
+        if self.broken.intersection(paths):
+            raise ServiceUnavailable("unavailable")
+        if self.missing.intersection(paths):
+            raise NotFound("missing")
+        for path in paths:
+            self.applied[path] = self.applied.get(path, 0) + 1
+
+def apply(monkeypatch, db, increments, batch_limit=500):
+    monkeypatch.setattr(firebase, "get_firestore_client", lambda: db)
+    monkeypatch.setattr(firebase, "FIRESTORE_BATCH_LIMIT", batch_limit)
+    monkeypatch.setattr(firebase.post_counters, "promote_rate", 0)
+    return firebase.apply_counter_increments(increments)
+
+def test_everything_applied(monkeypatch):
+    db = FakeDB()
+    increments = {("comments", "a"): {"likes": 1}, ("comments", "b"): {"likes": 2}}
+    assert apply(monkeypatch, db, increments) == set()
+    assert db.applied == {"comments/a": 1, "comments/b": 1}
+
+def test_failed_batch_reports_only_its_keys(monkeypatch):
+    db = FakeDB(broken={"comments/b"})
+    increments = {("comments", "a"): {"likes": 1}, ("comments", "b"): {"likes": 1}, ("comments", "c"): {"likes": 1}}
+    assert apply(monkeypatch, db, increments, batch_limit=1) == {("comments", "b")}
+    assert db.applied == {"comments/a": 1, "comments/c": 1}
+
+def test_missing_documents_are_skipped_not_retried(monkeypatch):
+    db = FakeDB(missing={"comments/gone"})
+    increments = {("comments", "a"): {"likes": 1}, ("comments", "gone"): {"likes": 1}}
+    assert apply(monkeypatch, db, increments) == set()
+    assert db.applied == {"comments/a": 1}
+
+def test_no_client_fails_every_key(monkeypatch):
+    increments = {("comments", "a"): {"likes": 1}}
+    assert apply(monkeypatch, None, increments) == {("comments", "a")}
+
+def test_sharded_posts_are_incremented_on_a_shard(monkeypatch):
+    db = FakeDB()
+    firebase.post_counters.mark_sharded("hot", 4)
+    try:
+        assert apply(monkeypatch, db, {("posts", "hot"): {"likes": 1}}) == set()
+    finally:
+        firebase.post_counters.forget("hot")
+    [path] = db.applied
+    assert path.startswith("posts/hot/counter_shards/")
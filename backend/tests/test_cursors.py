@@ -0,0 +1,52 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from services import datastore, sqlite_storage
+from services.storage import get_storage
+from utils.cursors import encode_cursor, decode_cursor, InvalidCursorError
+
+WALLET = "P" * 44
+
+def test_cursor_round_trip():
+    token = encode_cursor("2024-01-01T00:00:00", "post-1", scope="posts:")
+    assert decode_cursor(token, 2, scope="posts:") == ("2024-01-01T00:00:00", "post-1")
+
+@pytest.mark.parametrize("token, size, scope", [
+    (encode_cursor("a", "b", scope="posts:"), 2, "posts:someone"),  # issued for another list
+    (encode_cursor("a", "b", scope="posts:"), 3, "posts:"),  # wrong key size
+    (encode_cursor("a", 1, scope="posts:"), 2, "posts:"),  # non-string value
+    ("not-a-cursor", 2, "posts:"),
+    ("", 2, "posts:"),
+])
+def test_bad_cursors_are_rejected(token, size, scope):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, size, scope=scope)
+
+def test_tampered_cursor_is_rejected():
+    _, signature = encode_cursor("2024-01-01", "post-1").split('.')
+    forged = encode_cursor("2030-01-01", "post-1").split('.')[0]
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(f"{forged}.{signature}", 2)
+
+def test_posts_sharing_a_timestamp_are_paged_without_gaps(monkeypatch):
+    class FrozenDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime(2024, 1, 1)
+
+    monkeypatch.setattr(sqlite_storage, "datetime", FrozenDatetime)
+    post_ids = [f"tie-{i:02d}" for i in range(7)]
+    for post_id in post_ids:
+        get_storage().create_post({"post_id": post_id, "wallet_address": WALLET, "text": post_id})
+
+    async def scenario():
+        seen, cursor = [], None
+        while True:
+            posts, cursor = await datastore.get_user_posts(WALLET, limit=3, cursor=cursor, for_backend=True)
+            seen.extend(post["post_id"] for post in posts)
+            if cursor is None:
+                return seen
+
+    assert asyncio.run(scenario()) == sorted(post_ids, reverse=True)
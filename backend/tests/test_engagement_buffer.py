@@ -0,0 +1,44 @@
+import asyncio
+
+from services import engagement_buffer as module
+from services.engagement_buffer import EngagementBuffer
+
+def run_flushes(monkeypatch, results, events, max_retries=3):
+    """Feed ``events`` to a buffer whose storage answers with ``results`` (failed keys), one per flush"""
+    writes = []
+
+    async def fake_apply(increments):
+        writes.append({key: dict(fields) for key, fields in increments.items()})
+        return set(results.pop(0)) if results else set()
+
+    monkeypatch.setattr(module, "apply_counter_increments", fake_apply)
+
+    async def scenario():
+        buffer = EngagementBuffer(flush_ms=60000, max_pending=1000, max_retries=max_retries)
+        for collection, doc_id, amount in events:
+            buffer.add(collection, doc_id, "likes", amount)
+        await buffer.drain()
+        return buffer
+
+    return asyncio.run(scenario()), writes
+
+def test_increments_to_one_document_are_merged(monkeypatch):
+    buffer, writes = run_flushes(monkeypatch, [], [("posts", "a", 1)] * 5 + [("posts", "a", -1)])
+    assert writes == [{("posts", "a"): {"likes": 4}}]
+    assert buffer.stats()["events_per_doc_write"] == 6.0
+
+def test_only_failed_documents_are_retried(monkeypatch):
+    buffer, writes = run_flushes(monkeypatch, [{("posts", "b")}], [("posts", "a", 1), ("posts", "b", 2)])
+    assert writes == [
+        {("posts", "a"): {"likes": 1}, ("posts", "b"): {"likes": 2}},
+        {("posts", "b"): {"likes": 2}},
+    ]
+    assert buffer.flushed_docs == 2
+    assert buffer.dropped_increments == 0
+
+def test_increments_are_dropped_after_max_retries(monkeypatch):
+    always_failing = [{("posts", "a")}] * 10
+    buffer, writes = run_flushes(monkeypatch, always_failing, [("posts", "a", 3)], max_retries=2)
+    assert len(writes) == 3
+    assert buffer.dropped_increments == 3
+    assert buffer.stats()["pending_docs"] == 0
@@ -0,0 +1,44 @@
+from services import firebase
+
+class FlakyDB:
+    """Like-ledger reads fail while ``down`` is set"""
+
+    def __init__(self):
+        self.down = False
+
+    def collection(self, name):
+        return self
+
+    def document(self, doc_id):
+        return doc_id
+
+    def get_all(self, refs, field_paths=None):
+        if self.down:
+            raise RuntimeError("unavailable")
+        return []
+
+def test_successful_operations_reset_the_error_count(monkeypatch):
+    db = FlakyDB()
+    monkeypatch.setattr(firebase, "get_firestore_client", lambda: db)
+    monkeypatch.setattr(firebase, "firebase_initialized", True)
+    monkeypatch.setattr(firebase, "FIRESTORE_ERROR_THRESHOLD", 3)
+    monkeypatch.setitem(firebase._connection_state, "consecutive_errors", 0)
+    monkeypatch.setitem(firebase._connection_state, "connected", True)
+
+    def read(down):
+        db.down = down
+        return firebase.get_liked_post_ids("wallet", ["post"])
+
+    # Scattered failures between successes never add up to the threshold
+    for _ in range(5):
+        assert read(down=True) is None
+        assert read(down=False) == set()
+    assert firebase.is_firestore_connected()
+    assert firebase._connection_state["consecutive_errors"] == 0
+
+    for _ in range(3):
+        read(down=True)
+    assert not firebase.is_firestore_connected()
+
+    read(down=False)
+    assert firebase.is_firestore_connected()
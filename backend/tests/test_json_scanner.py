@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from utils.json_scanner import JSONValueScanner
+
+def feed_all(scanner, chunks):
+    for chunk in chunks:
+        result = scanner.feed(chunk)
+        if result is not None:
+            return result
+    return None
+
+def test_object_is_found_inside_prose_and_fences():
+    reply = 'Sure! ```json\n{"trust_score": 80, "explanation": "ok"}\n``` Anything else?'
+    result = feed_all(JSONValueScanner(), [reply])
+    assert json.loads(result) == {"trust_score": 80, "explanation": "ok"}
+
+def test_value_split_across_chunks_completes_on_its_closing_bracket():
+    reply = 'Here: {"a": {"b": [1, 2]}, "c": 3} trailing text'
+    scanner = JSONValueScanner()
+    chunks = [reply[i:i + 3] for i in range(0, len(reply), 3)]
+    result = feed_all(scanner, chunks)
+    assert json.loads(result) == {"a": {"b": [1, 2]}, "c": 3}
+    assert scanner.complete
+    assert scanner.consumed == reply.index(' trailing')
+
+def test_brackets_and_escaped_quotes_inside_strings_are_ignored():
+    reply = '{"explanation": "says \\"}\\" and {not json]", "trust_score": 10}'
+    result = feed_all(JSONValueScanner(), [reply[:20], reply[20:]])
+    assert json.loads(result)["trust_score"] == 10
+
+def test_array_scanner_returns_the_whole_array():
+    result = feed_all(JSONValueScanner('['), ['prefix [{"id": "p1"}, {"id": "p2"}] done'])
+    assert [item["id"] for item in json.loads(result)] == ["p1", "p2"]
+
+def test_incomplete_value_returns_none():
+    scanner = JSONValueScanner()
+    assert feed_all(scanner, ['{"trust_score": ', '80']) is None
+    assert not scanner.complete
+
+def test_only_objects_and_arrays_can_be_scanned():
+    with pytest.raises(ValueError):
+        JSONValueScanner('"')
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from services import datastore
+from services.storage import get_storage, NotFoundError
+
+WALLET = "L" * 44
+
+def setup_function():
+    datastore.clear_caches()
+
+def make_post(post_id):
+    get_storage().create_post({"post_id": post_id, "wallet_address": WALLET, "text": "post"})
+
+def test_liked_ids_are_cached_per_viewer():
+    make_post("like-a")
+    make_post("like-b")
+
+    async def scenario():
+        await datastore.set_post_like(WALLET, "like-a", True)
+        datastore.like_cache.clear()
+        first = await datastore.get_liked_post_ids(WALLET, ["like-a", "like-b"])
+        hits = datastore.like_cache.hits
+        second = await datastore.get_liked_post_ids(WALLET, ["like-a", "like-b"])
+        return first, second, datastore.like_cache.hits - hits
+
+    first, second, new_hits = asyncio.run(scenario())
+    assert first == second == {"like-a"}
+    assert new_hits == 1
+
+def test_failed_lookup_is_not_cached(monkeypatch):
+    make_post("like-c")
+    storage = get_storage()
+    real_lookup = storage.get_liked_post_ids
+
+    async def scenario():
+        await datastore.set_post_like(WALLET, "like-c", True)
+        datastore.like_cache.clear()
+        monkeypatch.setattr(storage, "get_liked_post_ids", lambda wallet, post_ids: None)
+        during_outage = await datastore.get_liked_post_ids(WALLET, ["like-c"])
+        monkeypatch.setattr(storage, "get_liked_post_ids", real_lookup)
+        after_outage = await datastore.get_liked_post_ids(WALLET, ["like-c"])
+        return during_outage, after_outage
+
+    during_outage, after_outage = asyncio.run(scenario())
+    assert during_outage == set()
+    assert after_outage == {"like-c"}
+
+def test_missing_or_deleted_posts_cannot_be_liked():
+    make_post("like-d")
+
+    async def scenario():
+        await datastore.soft_delete_post("like-d")
+        for post_id in ("like-d", "like-missing"):
+            with pytest.raises(NotFoundError):
+                await datastore.set_post_like(WALLET, post_id, True)
+        return get_storage().get_liked_post_ids(WALLET, ["like-d", "like-missing"])
+
+    assert asyncio.run(scenario()) == set()
+
+def test_like_routes_return_404_for_missing_or_deleted_posts():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from routes.posts import router
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/posts")
+    client = TestClient(app)
+    make_post("like-e")
+    make_post("like-f")
+    asyncio.run(datastore.soft_delete_post("like-e"))
+
+    for post_id in ("like-e", "like-missing"):
+        for action in ("like", "unlike"):
+            response = client.post(f"/api/posts/{post_id}/{action}", json={"wallet_address": WALLET})
+            assert response.status_code == 404, (post_id, action)
+            assert response.json()["detail"] == "Post not found"
+
+    response = client.post("/api/posts/like-f/unlike", json={"wallet_address": WALLET})
+    assert response.status_code == 200
+    assert response.json()["message"] == "Post was not liked"
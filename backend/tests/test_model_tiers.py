@@ -0,0 +1,15 @@
+import pytest
+
+from services.model_racing import ModelRacer
+from services.openrouter_client import parse_model_tiers, OPENROUTER_MODEL
+
+@pytest.mark.parametrize("value", ["", "   ", " , ,"])
+def test_empty_model_list_falls_back_to_default_model(value):
+    assert parse_model_tiers(value) == [OPENROUTER_MODEL]
+
+def test_model_list_is_split_in_order():
+    assert parse_model_tiers(" fast , ,slow") == ["fast", "slow"]
+
+def test_racer_needs_a_model():
+    with pytest.raises(ValueError):
+        ModelRacer([])
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from services import moderation
+from services.moderation_examples import ExampleLog
+
+TEXT = "A long announcement about the community meetup schedule and venue"
+
+@pytest.fixture
+def model_calls(monkeypatch):
+    """Send moderation misses to a fake model and record the texts it saw"""
+    calls = []
+
+    async def fake_submit(text):
+        calls.append(text)
+        return {"trust_score": 80, "trust_tag": "🟢", "explanation": "fine", "source": "model"}
+
+    monkeypatch.setattr(moderation, "get_api_key", lambda: "key")
+    monkeypatch.setattr(moderation, "upstream_available", lambda: True)
+    monkeypatch.setattr(moderation.batcher, "submit", fake_submit)
+    monkeypatch.setattr(moderation.cascade, "classify", lambda text: (None, 0.5))
+    monkeypatch.setattr(moderation.cascade, "record", lambda probability, verdict: None)
+    moderation.verdict_cache.memory.clear()
+    return calls
+
+def test_verdicts_are_cached_for_the_tier_list(model_calls):
+    async def scenario():
+        return [await moderation.moderate_text(TEXT) for _ in range(2)]
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert model_calls == [TEXT]
+    assert moderation.verdict_cache.get(TEXT, moderation.VERDICT_CACHE_MODEL) == first
+
+def test_one_bad_chunk_sinks_a_long_post(model_calls, monkeypatch):
+    async def fake_submit(text):
+        model_calls.append(text)
+        score = 10 if "BAD PASSAGE" in text else 90
+        return {"trust_score": score, "trust_tag": "🟢", "explanation": "checked"}
+
+    monkeypatch.setattr(moderation.batcher, "submit", fake_submit)
+    monkeypatch.setattr(moderation, "MODERATION_CHUNK_TOKENS", 60)
+    monkeypatch.setattr(moderation, "MODERATION_CHUNK_MIN_TOKENS", 20)
+    text = " ".join(f"Paragraph {i} describes the meetup agenda in detail." for i in range(40))
+    text += " BAD PASSAGE here."
+
+    verdict = asyncio.run(moderation.moderate_text(text))
+    assert len(model_calls) > 1
+    assert verdict["trust_score"] == 10
+    assert verdict["explanation"].startswith("checked (part ")
+    assert not moderation.is_acceptable(verdict)
+
+def test_model_rejections_are_logged_as_examples(model_calls, monkeypatch):
+    async def fake_submit(text):
+        return {"trust_score": 15, "trust_tag": "🔴", "explanation": "abusive", "source": "model"}
+
+    log = ExampleLog(":memory:")
+    log.open()
+    monkeypatch.setattr(moderation.batcher, "submit", fake_submit)
+    monkeypatch.setattr(moderation, "example_log", log)
+
+    verdict = asyncio.run(moderation.moderate_text(TEXT))
+    assert not moderation.is_acceptable(verdict)
+    assert log.recorded == 1
@@ -0,0 +1,27 @@
+import asyncio
+
+from routes.posts import store_post_image
+from services import datastore
+from services.storage import get_storage
+from utils.mappers import map_post_firestore_to_frontend
+
+def test_editing_to_a_remote_image_drops_stored_variants():
+    get_storage().create_post({
+        "post_id": "image-a", "wallet_address": "I" * 44, "text": "post",
+        "image_url": "/media/old", "image_hash": "old",
+        "image_variants": {"thumb": "/media/old-thumb", "full": "/media/old-full"}
+    })
+
+    async def scenario():
+        update = {"image_url": "https://example.com/new.png"}
+        await store_post_image(update)
+        return await datastore.update_post("image-a", update)
+
+    post = asyncio.run(scenario())
+    assert post["image_hash"] is None
+    assert map_post_firestore_to_frontend(post, "thumb")["image"] == "https://example.com/new.png"
+
+def test_edits_without_an_image_leave_it_alone():
+    update = {"text": "new text"}
+    asyncio.run(store_post_image(update))
+    assert update == {"text": "new text"}
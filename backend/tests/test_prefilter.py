@@ -0,0 +1,46 @@
+import pytest
+
+from services.prefilter import PreFilter, LexiconMatcher, DEFAULT_LEXICONS
+
+def make_prefilter():
+    return PreFilter(LexiconMatcher(DEFAULT_LEXICONS), enabled=True)
+
+def test_blocks_obvious_scam():
+    verdict = make_prefilter().classify("Double your SOL! Send SOL to this address, guaranteed returns")
+    assert verdict["trust_tag"] == "🔴"
+    assert verdict["source"] == "prefilter"
+
+def test_allows_short_benign_post():
+    verdict = make_prefilter().classify("gm everyone! thanks for the support")
+    assert verdict["trust_tag"] == "🟢"
+
+def test_allows_empty_post():
+    assert make_prefilter().classify("")["trust_tag"] == "🟢"
+
+def test_benign_words_do_not_launder_abuse():
+    assert make_prefilter().classify("thanks for nothing, you great big moron, I hope you die") is None
+
+def test_unknown_word_escalates():
+    assert make_prefilter().classify("thanks, great launch") is None
+
+def test_terms_match_on_word_boundaries_only():
+    assert make_prefilter().matcher.scan("scampi for everyone") == {}
+
+def test_disabled_prefilter_escalates_everything():
+    prefilter = PreFilter(LexiconMatcher(DEFAULT_LEXICONS), enabled=False)
+    assert prefilter.classify("gm") is None
+
+@pytest.mark.parametrize("text", [
+    "I hate violence and abuse",
+    "Stop the hate, stop the violence, report abuse",
+    "Warning: this is a scam, that account is a scammer",
+    "fake spam fake spam scam scam hate",
+])
+def test_single_harmful_words_escalate_instead_of_blocking(text):
+    assert make_prefilter().classify(text) is None
+
+def test_harmful_words_stop_a_local_allow():
+    assert make_prefilter().classify("gm everyone, thanks, scam") is None
+
+def test_threat_phrases_still_block():
+    assert make_prefilter().classify("kill yourself")["trust_tag"] == "🔴"
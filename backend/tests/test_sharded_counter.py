@@ -0,0 +1,40 @@
+from utils.sharded_counter import ShardedCounters
+
+def test_hot_key_is_promoted_once_its_rate_is_reached():
+    counters = ShardedCounters(shards=4, promote_rate=1.0, window=5.0)
+    promoted = [counters.record_write("post") for _ in range(5)]
+    assert promoted == [False, False, False, False, True]
+    assert counters.pick_shard("post") is None  # Not sharded until the storage marks it
+
+    counters.mark_sharded("post", 4)
+    assert counters.record_write("post") is False
+    assert {counters.pick_shard("post") for _ in range(200)} == {"0", "1", "2", "3"}
+    assert counters.stats()["promotions"] == 1
+
+def test_promotion_can_be_disabled():
+    counters = ShardedCounters(promote_rate=0)
+    assert not any(counters.record_write("post") for _ in range(1000))
+
+def test_tracking_is_bounded():
+    counters = ShardedCounters(promote_rate=1.0, window=60.0, max_tracked=3)
+    for key in range(10):
+        counters.record_write(key)
+        counters.mark_sharded(f"sharded-{key}", 2)
+    stats = counters.stats()
+    assert stats["tracked_keys"] == 3
+    assert stats["sharded_keys"] == 3
+    assert counters.shard_count("sharded-0") == 0
+    assert counters.shard_count("sharded-9") == 2
+
+def test_own_writes_update_cached_sums():
+    counters = ShardedCounters()
+    counters.store_sums("post", {"likes": 3, "comments": 1})
+    counters.add_to_sums("post", "likes", 1)
+    assert counters.cached_sums("post") == {"likes": 4, "comments": 1}
+
+def test_stale_sums_are_not_stored_after_a_write():
+    counters = ShardedCounters()
+    token = counters.sums.token("post")
+    counters.forget("post")  # A write lands while the shard sums were being read
+    counters.store_sums("post", {"likes": 3}, token=token)
+    assert counters.cached_sums("post") is None
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    executions = []
+
+    async def fetch():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 1}
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("post", "a", fetch) for _ in range(10)))
+
+    results = asyncio.run(scenario())
+    assert len(executions) == 1
+    assert all(result == {"value": 1} for result in results)
+    assert flights.stats()["key_classes"]["post"] == {
+        "calls": 10, "executions": 1, "coalesced": 9, "coalescing_ratio": 0.9
+    }
+    assert flights.stats()["in_flight"] == 0
+
+def test_errors_are_shared_and_not_remembered():
+    flights = SingleFlight()
+    attempts = []
+
+    async def fetch():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise LookupError("backend down")
+        return "ok"
+
+    async def scenario():
+        results = await asyncio.gather(*(flights.do("post", "a", fetch) for _ in range(3)), return_exceptions=True)
+        return results, await flights.do("post", "a", fetch)
+
+    failed, retried = asyncio.run(scenario())
+    assert all(isinstance(result, LookupError) for result in failed)
+    assert retried == "ok"
+    assert len(attempts) == 2
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flights = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    async def scenario():
+        impatient = asyncio.ensure_future(flights.do("post", "a", fetch))
+        patient = asyncio.ensure_future(flights.do("post", "a", fetch))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await impatient
+        return await patient
+
+    assert asyncio.run(scenario()) == "ok"
+
+def test_forget_starts_a_fresh_call():
+    flights = SingleFlight()
+    versions = iter(["old", "new"])
+
+    async def fetch():
+        value = next(versions)
+        await asyncio.sleep(0.01)
+        return value
+
+    async def scenario():
+        before_write = asyncio.ensure_future(flights.do("post", "a", fetch))
+        await asyncio.sleep(0)
+        flights.forget("post", "a")
+        after_write = await flights.do("post", "a", fetch)
+        return await before_write, after_write
+
+    assert asyncio.run(scenario()) == ("old", "new")
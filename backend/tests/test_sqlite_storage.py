@@ -0,0 +1,88 @@
+import pytest
+
+from services import sqlite_storage
+from services.sqlite_storage import SQLiteStorage
+from services.storage import NotFoundError
+
+WALLET = "S" * 44
+
+@pytest.fixture
+def storage():
+    return SQLiteStorage(':memory:')
+
+def make_post(storage, post_id, text="post"):
+    return storage.create_post({"post_id": post_id, "wallet_address": WALLET, "text": text})
+
+def test_usernames_are_unique_and_deleted_users_hidden(storage):
+    assert storage.create_user(WALLET, "alice", "Alice")
+    assert not storage.create_user("T" * 44, "alice", "Other Alice")
+    assert storage.get_user_by_username("alice")["wallet_address"] == WALLET
+
+    assert storage.update_user_profile(WALLET, "Alice B", bio="hi")
+    assert storage.get_user(WALLET)["bio"] == "hi"
+    assert not storage.update_user_profile("T" * 44, "Nobody")
+
+    assert storage.soft_delete_user(WALLET)
+    assert storage.get_user(WALLET) is None
+
+def test_updates_fail_on_missing_or_deleted_posts(storage):
+    make_post(storage, "p1")
+    assert storage.update_post("p1", {"text": "edited"})["text"] == "edited"
+    with pytest.raises(NotFoundError):
+        storage.update_post("missing", {"text": "edited"})
+
+    assert storage.soft_delete_post("p1")
+    assert storage.get_post_by_id("p1") is None
+    with pytest.raises(NotFoundError):
+        storage.update_post("p1", {"text": "again"})
+    with pytest.raises(NotFoundError):
+        storage.soft_delete_post("missing")
+
+def test_counters_and_comments(storage):
+    make_post(storage, "p1")
+    assert storage.update_post_likes("p1")
+    assert not storage.update_post_likes("missing")
+    assert storage.apply_counter_increments({("posts", "p1"): {"likes": 4}, ("posts", "missing"): {"likes": 1}}) == set()
+    assert storage.get_post_by_id("p1")["likes"] == 5
+
+    comment = storage.create_comment({"post_id": "p1", "wallet_address": WALLET, "text": "hello"})
+    with pytest.raises(NotFoundError):
+        storage.create_comment({"post_id": "missing", "wallet_address": WALLET, "text": "hello"})
+    assert storage.get_post_by_id("p1")["comments"] == 1
+    assert storage.delete_comment(comment["comment_id"])
+    assert storage.get_post_by_id("p1")["comments"] == 0
+    assert storage.get_post_comments("p1") == []
+
+def test_like_ledger_is_idempotent(storage):
+    make_post(storage, "p1")
+    assert storage.set_post_like(WALLET, "p1", True) is True
+    assert storage.set_post_like(WALLET, "p1", True) is False
+    assert storage.get_liked_post_ids(WALLET, ["p1", "p2"]) == {"p1"}
+    assert storage.set_post_like(WALLET, "p1", False) is True
+    assert storage.set_post_like(WALLET, "p1", False) is False
+
+def test_bulk_delete_honours_filters(storage):
+    for post_id in ("keep", "gone"):
+        make_post(storage, post_id)
+    storage.soft_delete_post("gone")
+    assert storage.bulk_delete('posts', filters=[('is_deleted', '==', True)])["written"] == 1
+    posts, has_more = storage.fetch_posts(for_backend=True)
+    assert [post["post_id"] for post in posts] == ["keep"]
+    assert not has_more
+
+def test_data_survives_reopening_a_database_file(tmp_path):
+    path = str(tmp_path / "vortex.db")
+    make_post(SQLiteStorage(path), "p1", text="persisted")
+    assert SQLiteStorage(path).get_post_by_id("p1")["text"] == "persisted"
+
+def test_scan_reads_every_page_without_writing(storage, monkeypatch):
+    monkeypatch.setattr(sqlite_storage, "BULK_BATCH_SIZE", 2)
+    for i in range(5):
+        make_post(storage, f"p{i}", text=f"text {i}")
+    storage.soft_delete_post("p4")
+    monkeypatch.setattr(storage, "_transaction", None)  # Any write transaction would fail
+
+    scanned = list(storage.scan_documents('posts', fields=['post_id', 'text']))
+    assert scanned == [{"post_id": f"p{i}", "text": f"text {i}"} for i in range(5)]
+    deleted = list(storage.scan_documents('posts', filters=[('is_deleted', '==', True)], fields=['post_id']))
+    assert deleted == [{"post_id": "p4"}]
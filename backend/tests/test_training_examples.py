@@ -0,0 +1,53 @@
+import train_moderation_model
+from services.moderation import verdict_fields
+from services.moderation_examples import ExampleLog
+from services.moderation_queue import ModerationQueue, PUBLISHED, REJECTED
+from services.storage import get_storage
+from train_moderation_model import load_post_examples, load_examples
+
+def verdict(score, source):
+    return {"trust_score": score, "trust_tag": "🟢", "explanation": "checked", "source": source}
+
+def test_only_model_verdicts_on_stored_posts_are_examples():
+    storage = get_storage()
+    for post_id, text, source in [("train-a", "model approved", "model"),
+                                  ("train-b", "fallback approved", "fallback"),
+                                  ("train-c", "classifier approved", "classifier")]:
+        storage.create_post({"post_id": post_id, "wallet_address": "T" * 44, "text": text,
+                             **verdict_fields(verdict(88, source))})
+
+    examples = load_post_examples()
+    assert examples.get("model approved") == 88
+    assert "fallback approved" not in examples
+    assert "classifier approved" not in examples
+
+def test_only_model_verdicts_from_the_queue_are_examples(tmp_path, monkeypatch):
+    path = str(tmp_path / "queue.db")
+    queue = ModerationQueue(path)
+    queue.open()
+    for post_id, status, result in [("q1", REJECTED, verdict(10, "model")),
+                                    ("q2", REJECTED, verdict(20, "prefilter")),
+                                    ("q3", PUBLISHED, verdict(80, "fallback"))]:
+        queue.enqueue(post_id, {"text": f"text of {post_id}"})
+        queue.complete(post_id, status, result)
+    queue.close()
+    monkeypatch.setattr(train_moderation_model, "MODERATION_QUEUE_PATH", path)
+    monkeypatch.setattr(train_moderation_model, "MODERATION_EXAMPLES_PATH", "")
+    monkeypatch.setattr(train_moderation_model, "MODERATION_CACHE_PATH", "")
+    monkeypatch.setattr(train_moderation_model, "load_post_examples", lambda: {})
+
+    assert load_examples() == {"text of q1": 10}
+
+def test_rejected_model_verdicts_are_logged_for_training(tmp_path, monkeypatch):
+    path = str(tmp_path / "examples.db")
+    log = ExampleLog(path)
+    log.open()
+    log.record("spam spam buy now", "model-a", verdict(5, "model"))
+    log.record("nice meetup today", "model-a", verdict(90, "model"))
+    log.close()
+    monkeypatch.setattr(train_moderation_model, "MODERATION_EXAMPLES_PATH", path)
+    monkeypatch.setattr(train_moderation_model, "MODERATION_CACHE_PATH", "")
+    monkeypatch.setattr(train_moderation_model, "MODERATION_QUEUE_PATH", "")
+    monkeypatch.setattr(train_moderation_model, "load_post_examples", lambda: {})
+
+    assert load_examples() == {"spam spam buy now": 5, "nice meetup today": 90}
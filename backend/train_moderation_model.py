@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Train the local moderation classifier from stored model verdicts.
+
+Reads the model verdicts logged in ``MODERATION_EXAMPLES_PATH`` (accepted and
+rejected; see ``services/moderation_examples.py``), the ``examples`` table that
+older verdict cache databases (``MODERATION_CACHE_PATH``) kept, finished jobs
+of the moderation queue
+(``MODERATION_QUEUE_PATH``) and the verdicts saved on stored posts
+(``ai_trust_score``, read through the configured storage backend). Queue
+and post verdicts are only used when their ``source`` is the model, never
+the pre-filter, the classifier or the fallback. It labels each text
+by whether its trust score reaches ``MIN_TRUST_SCORE``, trains the hashed
+n-gram model and writes it to ``CLASSIFIER_MODEL_PATH``, where the API loads
+it on startup. It also reports holdout accuracy and how many posts a given
+confidence threshold would answer locally.
+
+    python train_moderation_model.py [--holdout 0.2]
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+import numpy as np
+
+from services.classifier import NgramClassifier, CLASSIFIER_MODEL_PATH, CLASSIFIER_FEATURES
+from services.moderation import MIN_TRUST_SCORE
+from services.moderation_cache import MODERATION_CACHE_PATH
+from services.moderation_examples import MODERATION_EXAMPLES_PATH
+from services.moderation_queue import MODERATION_QUEUE_PATH, PUBLISHED, REJECTED
+from services.storage import get_storage
+
+# Only verdicts from the model are labels; local ones would teach the classifier its own guesses
+MODEL_SOURCE = "model"
+
+def load_post_examples():
+    """``{text: trust_score}`` from model verdicts saved on stored posts (one paged scan of ``posts``)"""
+    examples = {}
+    posts = get_storage().scan_documents(
+        'posts', filters=[('ai_source', '==', MODEL_SOURCE)], fields=['text', 'ai_trust_score']
+    )
+    for post in posts:
+        text = post.get('text') or ""
+        trust_score = post.get('ai_trust_score')
+        if text and isinstance(trust_score, (int, float)):
+            examples.setdefault(text, trust_score)
+    return examples
+
+def load_examples():
+    """``{text: trust_score}`` from every local verdict store"""
+    examples = {}
+    for path in (MODERATION_EXAMPLES_PATH, MODERATION_CACHE_PATH):
+        if not path or not os.path.exists(path):
+            continue
+        with sqlite3.connect(path) as db:
+            try:
+                rows = db.execute("SELECT text, trust_score FROM examples").fetchall()
+            except sqlite3.OperationalError:
+                continue  # A verdict cache database without the legacy examples table
+            for text, trust_score in rows:
+                examples.setdefault(text, trust_score)
+    if MODERATION_QUEUE_PATH and os.path.exists(MODERATION_QUEUE_PATH):
+        with sqlite3.connect(MODERATION_QUEUE_PATH) as db:
+            rows = db.execute(
+                "SELECT payload, result FROM moderation_jobs WHERE status IN (?, ?) AND result IS NOT NULL",
+                (PUBLISHED, REJECTED)
+            )
+            for payload, result in rows:
+                text = json.loads(payload).get('text') or ""
+                verdict = json.loads(result)
+                trust_score = verdict.get('trust_score')
+                if text and isinstance(trust_score, (int, float)) and verdict.get('source') == MODEL_SOURCE:
+                    examples.setdefault(text, trust_score)
+    try:
+        for text, trust_score in load_post_examples().items():
+            examples.setdefault(text, trust_score)
+    except Exception as e:
+        print(f"⚠️ Could not read stored posts: {e}")
+    return examples
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local moderation classifier")
+    parser.add_argument("--output", default=CLASSIFIER_MODEL_PATH)
+    parser.add_argument("--features", type=int, default=CLASSIFIER_FEATURES)
+    parser.add_argument("--epochs", type=int, default=8)
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction kept aside for evaluation")
+    args = parser.parse_args()
+
+    examples = list(load_examples().items())
+    labels = [int(score >= MIN_TRUST_SCORE) for _, score in examples]
+    print(f"📚 {len(examples)} examples ({sum(labels)} accepted, {len(labels) - sum(labels)} rejected)")
+    if len(set(labels)) < 2:
+        print("❌ Need both accepted and rejected examples to train")
+        return
+
+    random.Random(0).shuffle(examples)
+    split = int(len(examples) * (1 - args.holdout))
+    train, test = examples[:split], examples[split:]
+
+    model = NgramClassifier.train(
+        [text for text, _ in train], [int(score >= MIN_TRUST_SCORE) for _, score in train],
+        dim=args.features, epochs=args.epochs, threshold=MIN_TRUST_SCORE
+    )
+
+    if test:
+        probabilities = np.array([model.predict(text) for text, _ in test])
+        truth = np.array([score >= MIN_TRUST_SCORE for _, score in test])
+        correct = (probabilities >= 0.5) == truth
+        confidence = np.maximum(probabilities, 1 - probabilities)
+        print(f"🎯 Holdout accuracy: {correct.mean():.3f} on {len(test)} examples")
+        for threshold in (0.8, 0.9, 0.95, 0.99):
+            local = confidence >= threshold
+            accuracy = correct[local].mean() if local.any() else float('nan')
+            print(f"   confidence >= {threshold}: answers {local.mean():.1%} locally, accuracy {accuracy:.3f}")
+
+    # Final model uses every example
+    model = NgramClassifier.train(
+        [text for text, _ in examples], [int(score >= MIN_TRUST_SCORE) for _, score in examples],
+        dim=args.features, epochs=args.epochs, threshold=MIN_TRUST_SCORE
+    )
+    model.save(args.output)
+    print(f"✅ Model written to {args.output}")
+
+if __name__ == "__main__":
+    main()
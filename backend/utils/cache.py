@@ -0,0 +1,102 @@
+"""
+Bounded in-process LRU cache with per-entry TTL and hit/miss/eviction stats.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import threading
+import time
+
+class TTLCache:
+    """LRU cache whose entries also expire ``ttl`` seconds after being stored"""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Per-key versions, bumped when a key is invalidated, so a read that
+        # started before the invalidation can't write back a stale value (see
+        # ``token`` / ``set``). ``_epoch`` is bumped by ``clear`` and when old
+        # versions are forgotten, which voids every outstanding token.
+        self._versions: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._max_versions = max(1024, 4 * max_size)
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def token(self, key: Hashable) -> Tuple[int, int]:
+        """Snapshot to pass to ``set`` when caching the result of a read of ``key`` started now"""
+        with self._lock:
+            return self._epoch, self._versions.get(key, 0)
+
+    def set(self, key: Hashable, value: Any, token: Optional[Tuple[int, int]] = None, ttl: Optional[float] = None):
+        """Store a value; skipped if ``token`` predates an invalidation of ``key``"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if token is not None and token != (self._epoch, self._versions.get(key, 0)):
+                return
+            self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys: Hashable):
+        """Drop the given keys"""
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+                self._versions.move_to_end(key)
+                if self._data.pop(key, None) is not None:
+                    self.invalidations += 1
+            if len(self._versions) > self._max_versions:
+                # Forgetting a version could let a stale fill through; void all tokens instead
+                self._versions.clear()
+                self._epoch += 1
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._epoch += 1
+            self._versions.clear()
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,67 @@
+"""
+Split long post texts into overlapping, edit-stable chunks for moderation.
+
+Texts are cut at sentence and paragraph boundaries. A chunk ends once it
+holds at least ``min_tokens`` and the sentence just added hashes to a
+boundary, or when the next sentence would push it past ``max_tokens``.
+Because the boundaries depend on content rather than fixed offsets, an edit
+only changes the chunks around it and the rest keep their cache keys. Each
+chunk also starts with the last ``overlap`` sentences of the previous chunk,
+so content split across a boundary is still seen together.
+
+Token counts are estimated (about 4 characters per token); no tokenizer is needed.
+"""
+
+from typing import List
+import re
+import zlib
+
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+def split_sentences(text: str, max_tokens: int) -> List[str]:
+    """Sentences/paragraphs, with any piece longer than ``max_tokens`` cut on word boundaries"""
+    sentences = []
+    for piece in _SENTENCE_END_RE.split(text):
+        piece = piece.strip()
+        if not piece:
+            continue
+        if estimate_tokens(piece) <= max_tokens:
+            sentences.append(piece)
+            continue
+        words, current = piece.split(), []
+        for word in words:
+            if current and estimate_tokens(" ".join(current + [word])) > max_tokens:
+                sentences.append(" ".join(current))
+                current = []
+            current.append(word)
+        if current:
+            sentences.append(" ".join(current))
+    return sentences
+
+def chunk_text(text: str, max_tokens: int = 400, min_tokens: int = 150, overlap: int = 1) -> List[str]:
+    """Content-defined chunks of at most ~``max_tokens`` (plus overlap)"""
+    sentences = split_sentences(text, max_tokens)
+    groups: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for sentence in sentences:
+        tokens = estimate_tokens(sentence) + 1
+        if current and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += tokens
+        if current_tokens >= min_tokens and zlib.crc32(sentence.encode('utf-8')) % 3 == 0:
+            groups.append(current)
+            current, current_tokens = [], 0
+    if current:
+        groups.append(current)
+
+    chunks = []
+    for index, group in enumerate(groups):
+        context = groups[index - 1][-overlap:] if index and overlap else []
+        chunks.append(" ".join(context + group))
+    return chunks
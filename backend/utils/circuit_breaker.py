@@ -0,0 +1,150 @@
+"""
+Circuit breaker for calls to a flaky upstream.
+
+States:
+
+- ``closed``: calls pass. Outcomes go into a rolling window of the last
+  ``window`` calls. Once at least ``min_calls`` are recorded, the breaker
+  opens if the error rate reaches ``failure_threshold`` or the share of calls
+  slower than ``slow_call_seconds`` reaches ``slow_threshold``.
+- ``open``: calls are refused immediately for ``open_seconds``.
+- ``half_open``: up to ``half_open_calls`` probe calls pass. If they all
+  succeed the breaker closes; any failure opens it again.
+
+Thread-safe; callers ask ``allow()`` before a call and then report it with
+``record_success`` / ``record_failure`` (or ``record_cancelled``).
+"""
+
+from collections import deque
+from typing import Dict, Any
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    def __init__(self, name: str, window: int = 20, min_calls: int = 5, failure_threshold: float = 0.5,
+                 slow_call_seconds: float = 5.0, slow_threshold: float = 0.8, open_seconds: float = 30.0,
+                 half_open_calls: int = 1):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_threshold = slow_threshold
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(1, half_open_calls)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._outcomes = deque(maxlen=window)  # (failed, slow) per call
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.transitions: Dict[str, int] = {}
+        self.last_transition_at = None
+        self.rejected = 0
+        self.last_error = None
+
+    # State handling (call with the lock held)
+    def _transition(self, state: str):
+        if state == self._state:
+            return
+        key = f"{self._state}_to_{state}"
+        logger.warning(f"[CircuitBreaker] {self.name}: {self._state} -> {state}")
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        self._state = state
+        self.last_transition_at = time.time()
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state == HALF_OPEN:
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+        if state == CLOSED:
+            self._outcomes.clear()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a probe through (0 when not open)"""
+        with self._lock:
+            if self._current_state() != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; half-open admits a limited number of probes"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes_in_flight < self.half_open_calls:
+                self._probes_in_flight += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self, latency: float):
+        with self._lock:
+            slow = latency >= self.slow_call_seconds
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if slow:
+                    self._transition(OPEN)
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_calls:
+                    self._transition(CLOSED)
+                return
+            self._outcomes.append((False, slow))
+            self._evaluate()
+
+    def record_failure(self, latency: float, error: str = ""):
+        with self._lock:
+            self.last_error = error or None
+            if self._state == HALF_OPEN:
+                self._transition(OPEN)
+                return
+            self._outcomes.append((True, latency >= self.slow_call_seconds))
+            self._evaluate()
+
+    def record_cancelled(self):
+        """A call was abandoned without an outcome; frees its half-open probe slot"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def _evaluate(self):
+        if self._state != CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        failures = sum(1 for failed, _ in self._outcomes if failed)
+        slow = sum(1 for _, is_slow in self._outcomes if is_slow)
+        if failures / len(self._outcomes) >= self.failure_threshold or slow / len(self._outcomes) >= self.slow_threshold:
+            self._transition(OPEN)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            outcomes = list(self._outcomes)
+        return {
+            "state": state,
+            "recent_calls": len(outcomes),
+            "recent_error_rate": round(sum(f for f, _ in outcomes) / len(outcomes), 4) if outcomes else 0.0,
+            "recent_slow_rate": round(sum(s for _, s in outcomes) / len(outcomes), 4) if outcomes else 0.0,
+            "transitions": dict(self.transitions),
+            "last_transition_at": self.last_transition_at,
+            "rejected": self.rejected,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,69 @@
+"""
+Opaque, signed pagination cursors.
+
+A cursor is the sort key of the last item on a page, e.g.
+``(created_at, post_id)``, packed into a URL-safe token. Clients hand it back
+unchanged to get the next page. The ID tie-breaks items that share a
+timestamp, so none are skipped or repeated. Tokens carry an HMAC over the
+key and a ``scope`` (the list they were issued for), so clients can't forge
+or reuse them against another list. Set ``CURSOR_SECRET`` to the same value
+on every worker. Without it each process signs with a random key, and its
+cursors stop working after a restart or on another worker.
+"""
+
+from typing import Any, Tuple
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CURSOR_SECRET = os.getenv('CURSOR_SECRET', '')
+
+_SIGNATURE_BYTES = 16
+
+if CURSOR_SECRET:
+    _key = CURSOR_SECRET.encode()
+else:
+    _key = secrets.token_bytes(32)
+    logger.warning("⚠️ CURSOR_SECRET not set; pagination cursors are only valid on this process")
+
+class InvalidCursorError(ValueError):
+    """The cursor token is malformed or was not issued by this API"""
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+def _sign(scope: str, payload: bytes) -> bytes:
+    return hmac.new(_key, scope.encode() + b'\0' + payload, hashlib.sha256).digest()[:_SIGNATURE_BYTES]
+
+def encode_cursor(*values: Any, scope: str = "") -> str:
+    payload = json.dumps(list(values), separators=(',', ':')).encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(scope, payload))}"
+
+def decode_cursor(token: str, size: int, scope: str = "") -> Tuple[Any, ...]:
+    """Sort key packed into ``token``; raises InvalidCursorError unless it was issued for ``scope``
+    and holds ``size`` string values"""
+    try:
+        payload_part, signature_part = token.split('.')
+        payload = _b64decode(payload_part)
+        signature = _b64decode(signature_part)
+    except Exception:
+        raise InvalidCursorError("malformed cursor")
+    if not hmac.compare_digest(signature, _sign(scope, payload)):
+        raise InvalidCursorError("cursor signature mismatch")
+    try:
+        values = json.loads(payload)
+    except Exception:
+        raise InvalidCursorError("malformed cursor")
+    if not isinstance(values, list) or len(values) != size or not all(isinstance(v, str) for v in values):
+        raise InvalidCursorError("malformed cursor")
+    return tuple(values)
@@ -0,0 +1,94 @@
+"""
+Helpers for image payloads sent by the frontend as base64 data URLs.
+"""
+
+from typing import Optional, Tuple, Dict
+import base64
+import binascii
+import io
+import re
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it only the original upload is stored
+    Image = None
+    ImageOps = None
+
+_DATA_URL_RE = re.compile(r'^data:(?P<mime>[\w.+-]+/[\w.+-]+)?(?:;[\w-]+=[^;,]*)*;base64,(?P<data>.*)$', re.DOTALL)
+
+# Leading bytes of the image formats we accept
+_MAGIC_NUMBERS = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+def is_remote_image(value: Optional[str]) -> bool:
+    """True for values that are already URLs/references rather than inline image data"""
+    return bool(value) and value.startswith(('http://', 'https://', '/media/'))
+
+def sniff_image_type(data: bytes) -> Optional[str]:
+    """Detect the image MIME type from its leading bytes"""
+    for magic, mime in _MAGIC_NUMBERS:
+        if data.startswith(magic):
+            return mime
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+def decode_image_data(value: str) -> Tuple[bytes, str]:
+    """
+    Decode a base64 data URL (or bare base64 string) into raw bytes and a MIME type.
+    Raises ValueError if the payload is not a supported image.
+    """
+    match = _DATA_URL_RE.match(value.strip())
+    payload = match.group('data') if match else value.strip()
+
+    try:
+        data = base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("Image is not valid base64 data")
+
+    mime = sniff_image_type(data)
+    if not mime:
+        raise ValueError("Unsupported image format. Use PNG, JPEG, GIF or WebP.")
+    return data, mime
+
+def render_variants(data: bytes, sizes: Dict[str, int], quality: int = 80) -> Dict[str, Tuple[bytes, str]]:
+    """
+    Resize an image to fit each ``{name: max_edge}`` box and re-encode it as WebP.
+
+    CPU bound; meant to run in a process pool. Variants that would not be smaller
+    than the original (and animated images) are omitted so callers fall back to it.
+    """
+    if Image is None:
+        return {}
+
+    source = Image.open(io.BytesIO(data))
+    if getattr(source, 'is_animated', False):
+        return {}
+    source = ImageOps.exif_transpose(source)
+    if source.mode not in ('RGB', 'RGBA'):
+        source = source.convert('RGBA' if 'A' in source.getbands() else 'RGB')
+
+    variants = {}
+    for name, max_edge in sizes.items():
+        image = source.copy()
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format='WEBP', quality=quality, method=4)
+        encoded = buffer.getvalue()
+        if len(encoded) < len(data):
+            variants[name] = (encoded, 'image/webp')
+    return variants
+
+def process_image(value: str, sizes: Dict[str, int], quality: int = 80) -> Tuple[bytes, str, Dict[str, Tuple[bytes, str]]]:
+    """Decode an upload and render its variants: ``(original, mime, variants)``"""
+    data, mime = decode_image_data(value)
+    try:
+        variants = render_variants(data, sizes, quality)
+    except Exception:
+        # Undecodable by Pillow (e.g. truncated file): keep the original only
+        variants = {}
+    return data, mime, variants
@@ -0,0 +1,62 @@
+"""
+Incremental scanner that finds the first complete JSON object or array in a
+stream of text chunks.
+
+Model replies often wrap the JSON in prose or code fences, or keep talking
+after it. The scanner skips everything before the first opening bracket,
+tracks nesting (ignoring brackets inside strings), and reports the value as
+soon as its closing bracket arrives. Callers can then stop reading the
+stream. Work is linear in the characters fed.
+"""
+
+from typing import Optional
+
+class JSONValueScanner:
+    def __init__(self, opening: str = '{'):
+        if opening not in ('{', '['):
+            raise ValueError("opening must be '{' or '['")
+        self.opening = opening
+        self.result: Optional[str] = None
+        self.consumed = 0  # Characters fed so far
+        self._parts = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def complete(self) -> bool:
+        return self.result is not None
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Feed more text; returns the raw JSON text once the value is complete"""
+        if self.result is not None:
+            return self.result
+        start = 0
+        if self._depth == 0:
+            start = chunk.find(self.opening)
+            self.consumed += len(chunk) if start == -1 else start
+            if start == -1:
+                return None
+        for index in range(start, len(chunk)):
+            char = chunk[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[start:index + 1])
+                    self.consumed += index + 1 - start
+                    self.result = "".join(self._parts)
+                    return self.result
+        self._parts.append(chunk[start:])
+        self.consumed += len(chunk) - start
+        return None
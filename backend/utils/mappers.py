@@ -0,0 +1,59 @@
+"""
+Mapping helpers from stored post documents to API payloads.
+
+Shared by every storage backend so they all return identically shaped posts.
+"""
+
+# Image variant shown on feed cards; single post views use "full"
+FEED_IMAGE_VARIANT = "thumb"
+
+def select_image_url(post: dict, image_variant: str = "full") -> str:
+    """URL of the requested image variant, falling back to the stored image_url"""
+    variants = post.get("image_variants") or {}
+    return variants.get(image_variant) or post.get("image_url", "")
+
+def map_post_firestore_to_frontend(post: dict, image_variant: str = "full") -> dict:
+    """Map Firestore post data to frontend format"""
+    return {
+        "id": post.get("post_id", ""),
+        "content": post.get("text", ""),
+        "image": select_image_url(post, image_variant),
+        "timestamp": post.get("timestamp", post.get("created_at", "")),
+        "author": {
+            "address": post.get("wallet_address", ""),
+            "displayName": post.get("display_name", "")
+        },
+        "likes": post.get("likes", 0),
+        "comments": post.get("comments", 0),
+        "post_hash": post.get("post_hash", ""),
+        "solanaTxHash": post.get("solana_tx_hash", None),
+        "is_deleted": post.get("is_deleted", False),
+        "action_type": post.get("action_type", 0),
+        "created_at": post.get("created_at", ""),
+        "updated_at": post.get("updated_at", ""),
+        # Add more fields as needed
+    }
+
+def map_post_firestore_to_backend(post: dict, image_variant: str = "full") -> dict:
+    """Map Firestore post data to backend API format (PostOut model)"""
+    return {
+        "post_id": post.get("post_id", ""),
+        "wallet_address": post.get("wallet_address", ""),
+        "display_name": post.get("display_name", ""),
+        "text": post.get("text", ""),
+        "image_url": select_image_url(post, image_variant),
+        "image_hash": post.get("image_hash", None),
+        "image_variants": post.get("image_variants") or {},
+        "timestamp": post.get("timestamp", post.get("created_at", "")),
+        "created_at": post.get("created_at", ""),
+        "updated_at": post.get("updated_at", ""),
+        "is_deleted": post.get("is_deleted", False),
+        "likes": post.get("likes", 0),
+        "comments": post.get("comments", 0),
+        "solana_tx_hash": post.get("solana_tx_hash", None),
+        "post_hash": post.get("post_hash", ""),
+        "action_type": post.get("action_type", 0),
+        "tags": post.get("tags", []),
+        "location": post.get("location", None),
+        "user_liked": False  # Default value, can be updated later
+    }
@@ -0,0 +1,28 @@
+"""
+Tiny in-process metrics registry.
+
+Subsystems register a provider that returns a JSON-serialisable dict of their
+current stats; ``GET /api/v1/metrics`` returns all of them keyed by name.
+"""
+
+from typing import Any, Callable, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+def register_metrics(name: str, provider: Callable[[], Dict[str, Any]]):
+    """Register (or replace) the stats provider for ``name``"""
+    _providers[name] = provider
+
+def collect_metrics() -> Dict[str, Any]:
+    """Snapshot every registered provider"""
+    snapshot = {}
+    for name, provider in list(_providers.items()):
+        try:
+            snapshot[name] = provider()
+        except Exception as e:
+            logger.error(f"❌ Failed to collect metrics for {name}: {e}")
+            snapshot[name] = {"error": str(e)}
+    return snapshot
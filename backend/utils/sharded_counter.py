@@ -0,0 +1,124 @@
+"""
+Bookkeeping for sharded document counters.
+
+A hot document can only take about one sustained write per second, so a
+viral post's likes get throttled. A sharded document keeps its counters as
+the base field on the document plus deltas spread over ``shards`` shard
+documents. Each write goes to a random shard, and a read adds the shard sums
+to the base. The storage backend owns the documents. This class decides
+which keys are sharded, promotes a key once its write rate (per worker)
+reaches ``promote_rate`` writes/second over ``window`` seconds, and caches
+shard sums for ``sum_ttl`` seconds.
+
+Thread-safe; the storage functions call it from the datastore thread pool.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import random
+import threading
+import time
+
+from utils.cache import TTLCache
+
+class ShardedCounters:
+    def __init__(self, shards: int = 10, promote_rate: float = 1.0, window: float = 10.0,
+                 sum_ttl: float = 5.0, max_tracked: int = 10000):
+        self.shards = max(1, shards)
+        self.promote_rate = promote_rate
+        self.window = max(0.1, window)
+        self.max_tracked = max_tracked
+        self.sums = TTLCache(max_size=max_tracked, ttl=sum_ttl)
+        self._lock = threading.Lock()
+        self._rates: "OrderedDict[Hashable, list]" = OrderedDict()  # key -> [window_start, writes]
+        self._sharded: "OrderedDict[Hashable, int]" = OrderedDict()  # key -> shard count
+        self.promotions = 0
+        self.sharded_writes = 0
+        self.direct_writes = 0
+
+    def shard_count(self, key: Hashable) -> int:
+        """Shards of ``key`` as known to this worker (0 = not sharded)"""
+        with self._lock:
+            return self._sharded.get(key, 0)
+
+    def mark_sharded(self, key: Hashable, shards: int):
+        """Remember that ``key`` is sharded (after promoting it or reading its document)"""
+        with self._lock:
+            self._sharded[key] = shards
+            self._sharded.move_to_end(key)
+            self._rates.pop(key, None)
+            while len(self._sharded) > self.max_tracked:
+                self._sharded.popitem(last=False)
+
+    def pick_shard(self, key: Hashable) -> Optional[str]:
+        """Random shard ID for a write to ``key``, or None to write the document itself"""
+        shards = self.shard_count(key)
+        with self._lock:
+            if shards:
+                self.sharded_writes += 1
+            else:
+                self.direct_writes += 1
+        return str(random.randrange(shards)) if shards else None
+
+    def record_write(self, key: Hashable) -> bool:
+        """Count a direct write to ``key``; True once it should be promoted to shards"""
+        if self.promote_rate <= 0:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if key in self._sharded:
+                return False
+            entry = self._rates.get(key)
+            if entry is None or now - entry[0] >= self.window:
+                entry = self._rates[key] = [now, 0]
+            self._rates.move_to_end(key)
+            entry[1] += 1
+            while len(self._rates) > self.max_tracked:
+                self._rates.popitem(last=False)
+            if entry[1] >= self.promote_rate * self.window:
+                self._rates.pop(key, None)
+                self.promotions += 1
+                return True
+            return False
+
+    def cached_sums(self, key: Hashable) -> Optional[Dict[str, int]]:
+        sums = self.sums.get(key)
+        return dict(sums) if sums is not None else None
+
+    def store_sums(self, key: Hashable, sums: Dict[str, int], token: Optional[Tuple[int, int]] = None):
+        self.sums.set(key, dict(sums), token=token)
+
+    def add_to_sums(self, key: Hashable, field: str, amount: int):
+        """Apply this worker's own shard write to the cached sums, so it reads its writes"""
+        with self._lock:
+            sums = self.sums.get(key)
+            if sums is not None:
+                sums = dict(sums)
+                sums[field] = sums.get(field, 0) + amount
+                self.sums.set(key, sums)
+
+    def forget(self, key: Hashable):
+        with self._lock:
+            self._sharded.pop(key, None)
+            self._rates.pop(key, None)
+        self.sums.invalidate(key)
+
+    def clear(self):
+        with self._lock:
+            self._sharded.clear()
+            self._rates.clear()
+        self.sums.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        writes = self.sharded_writes + self.direct_writes
+        return {
+            "shards": self.shards,
+            "promote_rate": self.promote_rate,
+            "sharded_keys": len(self._sharded),
+            "tracked_keys": len(self._rates),
+            "promotions": self.promotions,
+            "sharded_writes": self.sharded_writes,
+            "direct_writes": self.direct_writes,
+            "sharded_write_ratio": round(self.sharded_writes / writes, 4) if writes else 0.0,
+            "sum_cache": self.sums.stats()
+        }
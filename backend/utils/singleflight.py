@@ -0,0 +1,61 @@
+"""
+Single-flight request coalescing for asyncio.
+
+Concurrent calls for the same key share one in-flight execution and all get
+its result (or exception), so a burst of reads on a hot key costs one backend
+fetch. Keys are grouped into classes (e.g. ``post``, ``user``) for stats.
+
+The shared call runs in its own task: a caller that gives up (client
+disconnect, timeout) does not cancel it for the others. Results are shared
+objects; callers must copy anything they mutate.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+import asyncio
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        self._calls: Dict[str, int] = {}
+        self._executions: Dict[str, int] = {}
+
+    async def do(self, key_class: str, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn()`` unless a call for ``(key_class, key)`` is already in flight, then share its result"""
+        self._calls[key_class] = self._calls.get(key_class, 0) + 1
+        flight_key = (key_class, key)
+        future = self._inflight.get(flight_key)
+        if future is None:
+            self._executions[key_class] = self._executions.get(key_class, 0) + 1
+            future = asyncio.ensure_future(fn())
+            self._inflight[flight_key] = future
+            future.add_done_callback(lambda done: self._release(flight_key, done))
+        return await asyncio.shield(future)
+
+    def _release(self, flight_key: Tuple[str, Hashable], future: asyncio.Future):
+        if self._inflight.get(flight_key) is future:
+            del self._inflight[flight_key]
+        if not future.cancelled():
+            future.exception()  # Mark retrieved so an unawaited failure isn't logged as lost
+
+    def forget(self, key_class: str, *keys: Hashable):
+        """Stop sharing in-flight calls for ``keys`` (after a write, later callers must not get the older read)"""
+        for key in keys:
+            self._inflight.pop((key_class, key), None)
+
+    def clear(self, *key_classes: str):
+        """Stop sharing every in-flight call (of ``key_classes`` if given)"""
+        for flight_key in list(self._inflight):
+            if not key_classes or flight_key[0] in key_classes:
+                del self._inflight[flight_key]
+
+    def stats(self) -> Dict[str, Any]:
+        per_class = {}
+        for key_class, calls in self._calls.items():
+            executions = self._executions.get(key_class, 0)
+            per_class[key_class] = {
+                "calls": calls,
+                "executions": executions,
+                "coalesced": calls - executions,
+                "coalescing_ratio": round((calls - executions) / calls, 4) if calls else 0.0
+            }
+        return {"in_flight": len(self._inflight), "key_classes": per_class}